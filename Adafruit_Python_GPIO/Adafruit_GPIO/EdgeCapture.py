@@ -0,0 +1,188 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import collections
+import io
+import os
+import threading
+
+import numpy as np
+
+from Adafruit_GPIO.GPIOChip import LINE_EVENT_RISING_EDGE, LINE_EVENT_FALLING_EDGE
+
+
+# Events kept by an EdgeCapture before the oldest are overwritten.
+DEFAULT_CAPACITY = 65536
+# Events the kernel buffers for a capture's line between reads.  This is the
+# largest buffer the kernel allows.
+DEFAULT_KERNEL_BUFFER = 1024
+
+# struct gpio_v2_line_event as a NumPy record, so events are read straight
+# from the kernel into arrays.  Id is LINE_EVENT_RISING_EDGE or
+# LINE_EVENT_FALLING_EDGE and timestamp_ns is CLOCK_MONOTONIC.
+LINE_EVENT_DTYPE = np.dtype([('timestamp_ns', '=u8'),
+                             ('id',           '=u4'),
+                             ('offset',       '=u4'),
+                             ('seqno',        '=u4'),
+                             ('line_seqno',   '=u4'),
+                             ('padding',      '=u4', (6,))])
+
+
+# Statistics of a pulse train.  Frequency is in Hz and periods in seconds,
+# measured between consecutive rising edges.  Duty is the fraction of those
+# periods the line was high.  Values that can't be measured from the events
+# are NaN.
+PulseStats = collections.namedtuple('PulseStats',
+    'edges frequency period period_min period_max duty')
+
+
+def pulse_stats(events):
+    """Compute PulseStats from an array of LINE_EVENT_DTYPE events in time
+    order, as returned by EdgeCapture.read() or snapshot().  Duty needs both
+    edges to be captured.
+    """
+    timestamps = events['timestamp_ns'].astype(np.int64)
+    rising = events['id'] == LINE_EVENT_RISING_EDGE
+    rises = timestamps[rising]
+    falls = timestamps[events['id'] == LINE_EVENT_FALLING_EDGE]
+    nan = float('nan')
+    if rises.size < 2:
+        return PulseStats(len(events), nan, nan, nan, nan, nan)
+    periods = np.diff(rises)
+    period = (rises[-1] - rises[0]) / 1e9 / periods.size
+    # Pair each period with the first falling edge after its rise, skipping
+    # periods where that edge was lost.
+    first_fall = np.searchsorted(falls, rises[:-1], side='right')
+    valid = first_fall < falls.size
+    high = falls[first_fall[valid]] - rises[:-1][valid]
+    inside = high < periods[valid]
+    duty = nan
+    if inside.any():
+        duty = high[inside].sum() / float(periods[valid][inside].sum())
+    return PulseStats(len(events), 1.0/period, period,
+                      periods.min()/1e9, periods.max()/1e9, duty)
+
+
+class EdgeCapture(object):
+    """Records the edge events of one gpiochip line into a preallocated ring
+    of capacity LINE_EVENT_DTYPE records, for pulse trains too fast for a
+    callback per edge.  The EdgeDispatcher thread reads whole batches of
+    events from the kernel straight into the ring, so no Python object is
+    created per edge, and read(), snapshot() and stats() work on the
+    recorded events as NumPy arrays.
+
+    When more than capacity events are recorded without being read the
+    oldest are overwritten and counted in overruns.  Events the kernel
+    dropped because its own buffer filled up are counted in kernel_drops.
+
+    Captures are created with GPIOChip.capture(), see there.
+    """
+
+    def __init__(self, fd, pin, dispatcher, capacity=DEFAULT_CAPACITY):
+        """Capture the events read from the line request fd, which is closed
+        by close().  Pin is the line's offset, kept for reference.
+        """
+        self.fd = fd
+        self.pin = pin
+        self.capacity = capacity
+        self.overruns = 0
+        self.kernel_drops = 0
+        self._dispatcher = dispatcher
+        self._ring = np.zeros(capacity, dtype=LINE_EVENT_DTYPE)
+        self._ring_bytes = memoryview(self._ring.view(np.uint8))
+        self._file = io.FileIO(fd, 'rb', closefd=False)
+        self._lock = threading.Lock()
+        # Total events recorded and read, so head % capacity is where the next
+        # event is written.
+        self._head = 0
+        self._tail = 0
+        self._line_seqno = 0
+        dispatcher.watch(fd, self._read)
+
+    @property
+    def count(self):
+        """Total number of events recorded."""
+        return self._head
+
+    @property
+    def pending(self):
+        """Number of recorded events not returned by read() yet."""
+        return self._head - self._tail
+
+    def _read(self):
+        # Called by the dispatcher thread.  Read as many events as fit before
+        # the end of the ring; epoll calls again if the kernel has more.
+        with self._lock:
+            if self.fd is None:
+                return []
+            start = self._head % self.capacity
+            size = LINE_EVENT_DTYPE.itemsize
+            n = self._file.readinto(self._ring_bytes[start*size:self.capacity*size]) // size
+            if not n:
+                return []
+            seqno = int(self._ring['line_seqno'][start+n-1])
+            self.kernel_drops += (seqno - self._line_seqno - n) & 0xffffffff
+            self._line_seqno = seqno
+            self._head += n
+            if self._head - self._tail > self.capacity:
+                self.overruns += self._head - self._tail - self.capacity
+                self._tail = self._head - self.capacity
+        return []
+
+    def _copy(self, start, stop):
+        # Copy the events numbered start to stop, unwrapping the ring.
+        first = start % self.capacity
+        last = first + stop - start
+        if last <= self.capacity:
+            return self._ring[first:last].copy()
+        return np.concatenate((self._ring[first:], self._ring[:last-self.capacity]))
+
+    def read(self):
+        """Return the events recorded since the last read() as an array of
+        LINE_EVENT_DTYPE records in time order.
+        """
+        with self._lock:
+            events = self._copy(self._tail, self._head)
+            self._tail = self._head
+        return events
+
+    def snapshot(self, count=None):
+        """Return up to count of the most recently recorded events, or all
+        the ring holds, without marking them read.
+        """
+        with self._lock:
+            available = min(self._head, self.capacity)
+            if count is not None:
+                available = min(available, count)
+            return self._copy(self._head - available, self._head)
+
+    def stats(self, count=None):
+        """Return PulseStats of the events snapshot(count) returns."""
+        return pulse_stats(self.snapshot(count))
+
+    def close(self):
+        """Stop recording and release the line.  Recorded events can still
+        be read.
+        """
+        with self._lock:
+            if self.fd is None:
+                return
+            self._dispatcher.unwatch(self.fd)
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,278 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import collections
+import errno
+import logging
+import os
+import select
+import threading
+import time
+
+import Adafruit_GPIO as GPIO
+
+
+logger = logging.getLogger(__name__)
+
+# Events kept per pin for events() before the oldest are dropped.
+DEFAULT_QUEUE_SIZE = 64
+
+SYSFS_VALUE_PATH = '/sys/class/gpio/gpio{0}/value'
+
+clock = getattr(time, 'monotonic', time.time)
+
+
+# An edge seen on a pin.  Edge is GPIO.RISING or GPIO.FALLING and timestamp is
+# in seconds: the kernel's CLOCK_MONOTONIC time for gpiochip line events, and
+# the dispatcher's wake up time from clock() for sysfs sources.
+EdgeEvent = collections.namedtuple('EdgeEvent', 'pin edge timestamp')
+
+
+class _PinState(object):
+    # Registered edge, callbacks and received events of one pin.
+
+    def __init__(self, edge, lock, queue_size):
+        self.edge = edge
+        self.callbacks = []
+        self.events = collections.deque(maxlen=queue_size)
+        self.count = 0
+        self.last = None
+        self.detected = False
+        self.cond = threading.Condition(lock)
+
+
+class EdgeDispatcher(object):
+    """Delivers GPIO edge events from many sources using one background
+    thread blocked in epoll, so waiting for edges costs no CPU and watching
+    more pins doesn't add threads.  Sources are file descriptors with a read
+    function returning the EdgeEvents available on them: gpiochip line
+    requests (see GPIOChip) or sysfs value files (see watch_sysfs()).
+
+    Pins are registered with add_pin() and events are matched to them by
+    pin number, so give each GPIO object using it its own dispatcher.  Each
+    received event matching the pin's edge is passed to the pin's callbacks
+    on the dispatcher thread, queued for events(), and wakes threads blocked
+    in wait().
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._pins = {}
+        self._readers = {}
+        self._sysfs = {}
+        self._epoll = select.epoll()
+        # Writing to this pipe wakes the thread up to exit.
+        self._wake_read, self._wake_write = os.pipe()
+        self._epoll.register(self._wake_read, select.EPOLLIN)
+        self._thread = None
+        self._closed = False
+
+    def watch(self, fd, read, eventmask=select.EPOLLIN):
+        """Watch fd for edges.  When epoll reports eventmask on it, read() is
+        called on the dispatcher thread and must return a list of EdgeEvents.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Edge dispatcher is closed.')
+            self._readers[fd] = read
+            self._epoll.register(fd, eventmask)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='EdgeDispatcher')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def unwatch(self, fd):
+        """Stop watching fd.  The caller still owns and must close it."""
+        with self._lock:
+            if self._readers.pop(fd, None) is not None:
+                self._epoll.unregister(fd)
+
+    def watch_sysfs(self, pin, number):
+        """Watch the sysfs value file of exported Linux GPIO number for pin.
+        The GPIO's edge file must already be set to the edges wanted.  Sysfs
+        only reports that an edge happened, so events for a pin added with
+        RISING or FALLING carry that edge, and for BOTH the edge is taken
+        from the level read after waking.
+        """
+        fd = os.open(SYSFS_VALUE_PATH.format(number), os.O_RDONLY)
+        # Reading clears the pending notification so the first poll doesn't
+        # report a stale edge.
+        os.read(fd, 2)
+        def read():
+            os.lseek(fd, 0, os.SEEK_SET)
+            value = os.read(fd, 2)
+            with self._lock:
+                state = self._pins.get(pin)
+                edge = state.edge if state is not None else GPIO.BOTH
+            if edge not in (GPIO.RISING, GPIO.FALLING):
+                # A short pulse may be over by now, so the level only tells
+                # the edge when both are watched.
+                edge = GPIO.RISING if value[:1] == b'1' else GPIO.FALLING
+            return [EdgeEvent(pin, edge, clock())]
+        try:
+            self.watch(fd, read, select.EPOLLPRI | select.EPOLLERR)
+        except Exception:
+            os.close(fd)
+            raise
+        self._sysfs[pin] = fd
+
+    def unwatch_sysfs(self, pin):
+        """Stop watching the sysfs value file of pin."""
+        fd = self._sysfs.pop(pin, None)
+        if fd is not None:
+            self.unwatch(fd)
+            os.close(fd)
+
+    def add_pin(self, pin, edge, callback=None):
+        """Start delivering edges of pin matching edge (GPIO.RISING, FALLING or
+        BOTH), calling callback(event) for each if provided.
+        """
+        with self._lock:
+            if pin in self._pins:
+                raise RuntimeError('Edge detection is already enabled for pin {0}.'.format(pin))
+            self._pins[pin] = _PinState(edge, self._lock, self.queue_size)
+            if callback is not None:
+                self._pins[pin].callbacks.append(callback)
+
+    def remove_pin(self, pin):
+        """Stop delivering edges of pin.  Threads waiting on it return None."""
+        with self._lock:
+            state = self._pins.pop(pin, None)
+            if state is not None:
+                state.cond.notify_all()
+
+    def has_pin(self, pin):
+        """Return True if edges of pin are being delivered."""
+        return pin in self._pins
+
+    def add_callback(self, pin, callback):
+        """Also call callback(event) for each edge of pin."""
+        with self._lock:
+            self._state(pin).callbacks.append(callback)
+
+    def event_detected(self, pin):
+        """Return True if an edge was seen on pin since the last call."""
+        with self._lock:
+            state = self._state(pin)
+            detected, state.detected = state.detected, False
+            return detected
+
+    def events(self, pin):
+        """Return and remove the queued EdgeEvents of pin, oldest first.  Only
+        the newest queue_size events are kept.
+        """
+        with self._lock:
+            state = self._state(pin)
+            events = list(state.events)
+            state.events.clear()
+            return events
+
+    def wait(self, pin, timeout=None, after=None):
+        """Block until pin has an edge and return its EdgeEvent, or return
+        None if timeout seconds pass first or the pin is removed.  By default
+        only edges after the call count.  Otherwise this waits until the pin
+        has had more than after edges since it was added, so after=0 on a new
+        pin doesn't miss edges before the call.
+        """
+        deadline = None if timeout is None else clock() + timeout
+        with self._lock:
+            state = self._state(pin)
+            count = state.count if after is None else after
+            while state.count <= count:
+                if self._pins.get(pin) is not state:
+                    return None
+                if deadline is None:
+                    state.cond.wait()
+                else:
+                    remaining = deadline - clock()
+                    if remaining <= 0:
+                        return None
+                    state.cond.wait(remaining)
+            return state.last
+
+    def close(self):
+        """Stop the dispatcher thread and release its resources.  Watched file
+        descriptors other than sysfs ones stay open.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        for pin in list(self._sysfs):
+            self.unwatch_sysfs(pin)
+        os.write(self._wake_write, b'x')
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._epoll.close()
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+        with self._lock:
+            for state in self._pins.values():
+                state.cond.notify_all()
+            self._pins.clear()
+
+    def _state(self, pin):
+        try:
+            return self._pins[pin]
+        except KeyError:
+            raise RuntimeError('Edge detection is not enabled for pin {0}.'.format(pin))
+
+    def _run(self):
+        while True:
+            try:
+                ready = self._epoll.poll()
+            except (IOError, OSError) as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            for fd, mask in ready:
+                if fd == self._wake_read:
+                    return
+                with self._lock:
+                    read = self._readers.get(fd)
+                if read is None:
+                    continue
+                try:
+                    events = read()
+                except (IOError, OSError) as e:
+                    # The source was closed after unwatch() raced with poll().
+                    logger.debug('Reading edge source {0} failed: {1}'.format(fd, e))
+                    continue
+                for event in events:
+                    self._deliver(event)
+
+    def _deliver(self, event):
+        with self._lock:
+            state = self._pins.get(event.pin)
+            if state is None or not event.edge & state.edge:
+                return
+            state.events.append(event)
+            state.count += 1
+            state.last = event
+            state.detected = True
+            state.cond.notify_all()
+            callbacks = list(state.callbacks)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception('Edge callback for pin {0} failed.'.format(event.pin))
+
@@ -398,6 +398,8 @@ class SPI(object):
         self.set_clock_hz(max_speed_hz)
         self.set_mode(mode)
         self.set_bit_order(bitorder)
+        # The MPSSE length field is 16 bits, so one command moves 65536 bytes.
+        self.max_transfer = 65536
 
     def _assert_cs(self):
         if self._cs is not None:
@@ -19,6 +19,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import os
+
 import Adafruit_GPIO.Platform as Platform
 
 OUT     = 0
@@ -82,6 +84,14 @@ class BaseGPIO(object):
         for pin, value in pins.iteritems():
             self.output(pin, value)
 
+    def input_pins(self, pins):
+        """Read multiple pins at once.  Pins should be a list of pin names, and
+        a list of their values (HIGH/True if pulled high, LOW/False if pulled
+        low) is returned in the same order.
+        """
+        # General implementation that can be improved by subclasses.
+        return [self.input(pin) for pin in pins]
+
     def setup_pins(self, pins):
         """Setup multiple pins as inputs or outputs at once.  Pins should be a
         dict of pin name to pin type (IN or OUT).
@@ -307,8 +317,19 @@ class AdafruitBBIOAdapter(BaseGPIO):
 class AdafruitMinnowAdapter(BaseGPIO):
     """GPIO implementation for the Minnowboard + MAX using the mraa library"""
     
-    def __init__(self,mraa_gpio):
+    def __init__(self,mraa_gpio,use_mmap=True,dispatcher=None):
         self.mraa_gpio = mraa_gpio
+        self._use_mmap = use_mmap
+        # EdgeDispatcher delivering edge events, created on first use.
+        self._dispatcher = dispatcher
+        # Opened mraa.Gpio contexts by pin number.  Opening a pin exports it
+        # through sysfs, so each pin is opened once on first use and reused
+        # until cleanup().
+        self._pins = {}
+        # GPIOChip of each gpiochip used by capture(), by device path, and
+        # the chip and line offset of each captured pin.
+        self._chips = {}
+        self._captures = {}
         # Define mapping of Adafruit GPIO library constants to mraa constants
         self._dir_mapping = { OUT:      self.mraa_gpio.DIR_OUT,
                               IN:       self.mraa_gpio.DIR_IN }
@@ -319,63 +340,151 @@ class AdafruitMinnowAdapter(BaseGPIO):
                               FALLING:  self.mraa_gpio.EDGE_FALLING,
                               BOTH:     self.mraa_gpio.EDGE_BOTH }
 
+    def _pin(self,pin):
+        """Return the mraa.Gpio context for a pin, opening it on first use."""
+        try:
+            return self._pins[pin]
+        except KeyError:
+            pass
+        gpio = self.mraa_gpio.Gpio(pin)
+        if self._use_mmap:
+            # Memory mapped access skips the sysfs value file on every read and
+            # write.  mraa returns an error for pins without it and keeps using
+            # sysfs, so the result can be ignored.
+            gpio.useMmap(True)
+        # Keep whichever context was stored first if another thread raced us.
+        return self._pins.setdefault(pin, gpio)
+
     def setup(self,pin,mode):
         """Set the input or output mode for a specified pin.  Mode should be
         either DIR_IN or DIR_OUT.
         """
-        self.mraa_gpio.Gpio.dir(self.mraa_gpio.Gpio(pin),self._dir_mapping[mode])   
+        self._pin(pin).dir(self._dir_mapping[mode])
 
     def output(self,pin,value):
         """Set the specified pin the provided high/low value.  Value should be
         either 1 (ON or HIGH), or 0 (OFF or LOW) or a boolean.
         """
-        self.mraa_gpio.Gpio.write(self.mraa_gpio.Gpio(pin), value)
+        self._pin(pin).write(value)
     
     def input(self,pin):
         """Read the specified pin and return HIGH/true if the pin is pulled high,
         or LOW/false if pulled low.
         """
-        return self.mraa_gpio.Gpio.read(self.mraa_gpio.Gpio(pin))    
+        return self._pin(pin).read()
     
-    def add_event_detect(self, pin, edge, pyfunc, args):
+    def add_event_detect(self, pin, edge, pyfunc=None, args=None):
         """Enable edge detection events for a particular GPIO channel.  Pin 
         should be type IN.  Edge must be RISING, FALLING or BOTH. pyfunc is a
-        function for the event. args is an argument you can pass to the function.
+        function for the event, called as pyfunc(args) with the optional args.
+        Edges are read from the pin's sysfs value file by the adapter's
+        EdgeDispatcher thread.
         """
-        self.temp_pin = self.mraa_gpio.Gpio(pin)
-        self.temp_pin.dir(self._edge_mapping[edge])
-        self.temp_pin.isr(self._edge_mapping[edge], pyfunc, args)
+        callback = None
+        if pyfunc is not None:
+            callback = lambda event: pyfunc(args)
+        dispatcher = self._get_dispatcher()
+        dispatcher.add_pin(pin, edge, callback)
+        try:
+            gpio = self._pin(pin)
+            gpio.dir(self.mraa_gpio.DIR_IN)
+            gpio.edge(self._edge_mapping[edge])
+            # Edges are only reported through the kernel's GPIO number.
+            dispatcher.watch_sysfs(pin, gpio.getPin(True))
+        except Exception:
+            dispatcher.remove_pin(pin)
+            raise
 
     def remove_event_detect(self, pin):
         """Remove edge detection for a particular GPIO channel.  Pin should be
         type IN.
         """
-        self.mraa_gpio.Gpio.isrExit(self.mraa_gpio.Gpio(pin))
+        dispatcher = self._get_dispatcher()
+        dispatcher.unwatch_sysfs(pin)
+        dispatcher.remove_pin(pin)
+        self._pin(pin).edge(self.mraa_gpio.EDGE_NONE)
 
-    def wait_for_edge(self, pin, edge):
+    def add_event_callback(self, pin, callback):
+        """Add a callback for an event already defined using add_event_detect().
+        Pin should be type IN.  Callback is called with an EdgeEvent holding
+        the pin, edge and timestamp.
+        """
+        self._get_dispatcher().add_callback(pin, callback)
+
+    def event_detected(self, pin):
+        """Returns True if an edge has occured on a given GPIO.  You need to 
+        enable edge detection using add_event_detect() first.   Pin should be 
+        type IN.
+        """
+        return self._get_dispatcher().event_detected(pin)
+
+    def wait_for_edge(self, pin, edge, timeout=None):
         """Wait for an edge.   Pin should be type IN.  Edge must be RISING, 
-        FALLING or BOTH.
+        FALLING or BOTH.  Returns an EdgeEvent, or None if timeout seconds
+        passed first.  If edge detection is already enabled for the pin, its
+        edge setting applies.
         """
-        class Status:
-            status = "run"
-    
-        status = Status()
-
-        def halt(self):
-            status.status = "die" 
-        
-        self.add_event_detect(pin,edge,halt,None)
-        
-        while True:
-            if (status.status == "die"):
-                break
-            continue
+        dispatcher = self._get_dispatcher()
+        if dispatcher.has_pin(pin):
+            return dispatcher.wait(pin, timeout)
+        self.add_event_detect(pin, edge)
+        try:
+            return dispatcher.wait(pin, timeout, after=0)
+        finally:
+            self.remove_event_detect(pin)
+
+    def capture(self, pin, edge=BOTH, capacity=None, pull_up_down=PUD_OFF):
+        """Record the edges of a pin into an EdgeCapture ring buffer, for pulse
+        trains too fast for add_event_detect() callbacks.  Edge must be RISING,
+        FALLING or BOTH.  The pin is released by mraa and its line requested
+        through the gpiochip character device instead, see GPIOChip.capture().
+        The pin can't be used otherwise until cleanup().
+        """
+        import Adafruit_GPIO.GPIOChip as GPIOChip
+        if pin in self._captures:
+            raise ValueError('GPIO {0} is already captured.'.format(pin))
+        # Closing the mraa context unexports the pin so its line can be
+        # requested.
+        number = self._pin(pin).getPin(True)
+        self.cleanup(pin)
+        path, offset = GPIOChip.find_line(number)
+        chip = self._chips.get(path)
+        if chip is None:
+            chip = GPIOChip.GPIOChip(path, dispatcher=self._get_dispatcher())
+            self._chips[path] = chip
+        capture = chip.capture(offset, edge, capacity, pull_up_down)
+        self._captures[pin] = (chip, offset)
+        return capture
+
+    def cleanup(self, pin=None):
+        """Release the mraa context, edge detection and capture of a specific
+        pin, or of all pins if none is specified.
+        """
+        pins = list(self._pins) if pin is None else [pin]
+        dispatcher = self._dispatcher
+        for p in pins:
+            if dispatcher is not None and dispatcher.has_pin(p):
+                dispatcher.unwatch_sysfs(p)
+                dispatcher.remove_pin(p)
+            self._pins.pop(p, None)
+        for p in (list(self._captures) if pin is None else [pin]):
+            if p in self._captures:
+                chip, offset = self._captures.pop(p)
+                chip.cleanup(offset)
+
+    def _get_dispatcher(self):
+        # Created on first use so adapters never using edges start no thread.
+        if self._dispatcher is None:
+            import Adafruit_GPIO.EdgeEvents as EdgeEvents
+            self._dispatcher = EdgeEvents.EdgeDispatcher()
+        return self._dispatcher
 
 def get_platform_gpio(**keywords):
     """Attempt to return a GPIO instance for the platform which the code is being
     executed on. Currently supports only the Raspberry Pi using the RPi.GPIO
     library, Beaglebone Black using the Adafruit_BBIO library, and
-    Minnowboard MAX using the mraa GPIO library.  Will throw an
+    Minnowboard MAX using the mraa GPIO library.  On other Linux boards the
+    first gpiochip device is used through the GPIOChip class.  Will throw an
     exception if a GPIO instance can't be created for the current platform.  The
     returned GPIO object is an instance of BaseGPIO.
     """
@@ -390,4 +499,7 @@ def get_platform_gpio(**keywords):
         import mraa
         return AdafruitMinnowAdapter(mraa, **keywords)
     elif plat == Platform.UNKNOWN:
+        if os.path.exists('/dev/gpiochip0'):
+            import Adafruit_GPIO.GPIOChip as GPIOChip
+            return GPIOChip.GPIOChip(0, **keywords)
         raise RuntimeError('Could not determine platform.')
@@ -0,0 +1,494 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import fcntl
+import os
+import struct
+
+import Adafruit_GPIO as GPIO
+import Adafruit_GPIO.EdgeEvents as EdgeEvents
+
+
+# Limits and ioctls of the Linux GPIO character device v2 API, see
+# include/uapi/linux/gpio.h.
+LINES_MAX = 64
+NUM_ATTRS_MAX = 10
+NAME_SIZE = 32
+
+LINE_FLAG_ACTIVE_LOW        = 1 << 1
+LINE_FLAG_INPUT             = 1 << 2
+LINE_FLAG_OUTPUT            = 1 << 3
+LINE_FLAG_EDGE_RISING       = 1 << 4
+LINE_FLAG_EDGE_FALLING      = 1 << 5
+LINE_FLAG_BIAS_PULL_UP      = 1 << 8
+LINE_FLAG_BIAS_PULL_DOWN    = 1 << 9
+LINE_FLAG_BIAS_DISABLED     = 1 << 10
+
+LINE_ATTR_ID_FLAGS          = 1
+LINE_ATTR_ID_OUTPUT_VALUES  = 2
+
+LINE_EVENT_RISING_EDGE      = 1
+LINE_EVENT_FALLING_EDGE     = 2
+
+# struct gpiochip_info
+_CHIP_INFO = struct.Struct('=32s32sI')
+# struct gpio_v2_line_values
+_LINE_VALUES = struct.Struct('=QQ')
+# struct gpio_v2_line_config without its attributes, then one
+# struct gpio_v2_line_config_attribute
+_LINE_CONFIG = struct.Struct('=QI20x')
+_LINE_CONFIG_ATTR = struct.Struct('=I4xQQ')
+_LINE_CONFIG_SIZE = _LINE_CONFIG.size + NUM_ATTRS_MAX*_LINE_CONFIG_ATTR.size
+# struct gpio_v2_line_request, with the config packed separately
+_LINE_REQUEST = struct.Struct('={0}I{1}s{2}sII20xi'.format(LINES_MAX, NAME_SIZE, _LINE_CONFIG_SIZE))
+_LINE_REQUEST_FD_OFFSET = _LINE_REQUEST.size - 4
+# struct gpio_v2_line_event
+_LINE_EVENT = struct.Struct('=QIIII24x')
+
+def _IOR(nr, size):
+    return (2 << 30) | (size << 16) | (0xB4 << 8) | nr
+
+def _IOWR(nr, size):
+    return (3 << 30) | (size << 16) | (0xB4 << 8) | nr
+
+GET_CHIPINFO_IOCTL          = _IOR(0x01, _CHIP_INFO.size)
+GET_LINE_IOCTL              = _IOWR(0x07, _LINE_REQUEST.size)
+LINE_SET_CONFIG_IOCTL       = _IOWR(0x0D, _LINE_CONFIG_SIZE)
+LINE_GET_VALUES_IOCTL       = _IOWR(0x0E, _LINE_VALUES.size)
+LINE_SET_VALUES_IOCTL       = _IOWR(0x0F, _LINE_VALUES.size)
+
+_DIR_FLAGS = { GPIO.OUT:        LINE_FLAG_OUTPUT,
+               GPIO.IN:         LINE_FLAG_INPUT }
+_PUD_FLAGS = { GPIO.PUD_OFF:    0,
+               GPIO.PUD_UP:     LINE_FLAG_BIAS_PULL_UP,
+               GPIO.PUD_DOWN:   LINE_FLAG_BIAS_PULL_DOWN }
+_EDGE_FLAGS = { GPIO.RISING:    LINE_FLAG_EDGE_RISING,
+                GPIO.FALLING:   LINE_FLAG_EDGE_FALLING,
+                GPIO.BOTH:      LINE_FLAG_EDGE_RISING | LINE_FLAG_EDGE_FALLING }
+_EDGE_MASK = LINE_FLAG_EDGE_RISING | LINE_FLAG_EDGE_FALLING
+
+SYSFS_GPIO_PATH = '/sys/class/gpio'
+
+
+def chip_path(chip):
+    """Return the device path of a gpiochip given its number, or the
+    argument unchanged if it is already a path.
+    """
+    if isinstance(chip, int):
+        return '/dev/gpiochip{0}'.format(chip)
+    return chip
+
+def find_line(number):
+    """Return the gpiochip device path and line offset of the Linux GPIO
+    number used by sysfs and libraries like mraa.
+    """
+    for name in os.listdir(SYSFS_GPIO_PATH):
+        if not name.startswith('gpiochip'):
+            continue
+        path = os.path.join(SYSFS_GPIO_PATH, name)
+        with open(os.path.join(path, 'base')) as f:
+            base = int(f.read())
+        with open(os.path.join(path, 'ngpio')) as f:
+            ngpio = int(f.read())
+        if base <= number < base + ngpio:
+            # The character device is named after the chip's device, not its
+            # sysfs base.
+            for device in os.listdir(os.path.join(path, 'device')):
+                if device.startswith('gpiochip'):
+                    return '/dev/' + device, number - base
+    raise ValueError('No gpiochip has GPIO {0}.'.format(number))
+
+
+class LineRequest(object):
+    """A group of lines requested from a gpiochip with one GET_LINE ioctl.
+    The kernel addresses the lines of a request by their index in offsets,
+    so each line's value is bit index of the bitmaps passed to the value
+    ioctls.
+    """
+
+    def __init__(self, fd, offsets):
+        self.fd = fd
+        self.offsets = list(offsets)
+        self.bits = dict((offset, 1 << i) for i, offset in enumerate(offsets))
+        # Reused for every value ioctl to avoid allocating on each call.
+        self._values = bytearray(_LINE_VALUES.size)
+        # True while an EdgeDispatcher reads the request's edge events.
+        self.watched = False
+
+    def set_values(self, bits, mask):
+        """Drive the lines selected by mask to the matching bits."""
+        _LINE_VALUES.pack_into(self._values, 0, bits, mask)
+        fcntl.ioctl(self.fd, LINE_SET_VALUES_IOCTL, self._values, True)
+
+    def get_values(self, mask):
+        """Return a bitmap of the current values of the lines in mask."""
+        _LINE_VALUES.pack_into(self._values, 0, 0, mask)
+        fcntl.ioctl(self.fd, LINE_GET_VALUES_IOCTL, self._values, True)
+        return _LINE_VALUES.unpack_from(self._values)[0] & mask
+
+    def read_events(self):
+        """Read the pending edge events of lines requested with edge flags and
+        return them as EdgeEvents, with the line offset as pin.
+        """
+        data = os.read(self.fd, 16*_LINE_EVENT.size)
+        events = []
+        for i in range(0, len(data) - _LINE_EVENT.size + 1, _LINE_EVENT.size):
+            timestamp_ns, event_id, offset, seqno, line_seqno = _LINE_EVENT.unpack_from(data, i)
+            edge = GPIO.RISING if event_id == LINE_EVENT_RISING_EDGE else GPIO.FALLING
+            events.append(EdgeEvents.EdgeEvent(offset, edge, timestamp_ns/1e9))
+        return events
+
+    def set_config(self, config):
+        """Reconfigure the lines with a packed gpio_v2_line_config."""
+        fcntl.ioctl(self.fd, LINE_SET_CONFIG_IOCTL, bytearray(config), True)
+
+    def close(self):
+        """Release the lines."""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class GPIOChip(GPIO.BaseGPIO):
+    """GPIO implementation for any Linux GPIO controller using the gpiochip
+    character device (/dev/gpiochipN) and the v2 line ioctls, without any
+    board specific library.  Pins are line offsets on the chip.
+
+    Lines are requested from the kernel once, when they are set up, and kept
+    together in as few line requests as possible (up to 64 lines each), so
+    output_pins(), setup_pins() and input_pins() change or read all the
+    pins they are given with one ioctl per request rather than one per pin.
+
+    Edge events are read by one EdgeDispatcher thread blocked in epoll on
+    the line requests, and carry the kernel's timestamp of the edge.  For
+    fast pulse trains, capture() records a line's edges into a ring buffer
+    without a callback per edge.
+    """
+
+    def __init__(self, chip=0, consumer='Adafruit_GPIO', dispatcher=None):
+        """Open gpiochip number chip, or the gpiochip device at path chip.
+        Consumer is the label shown for requested lines by tools like gpioinfo.
+        Dispatcher is the EdgeDispatcher used for edge events, by default one
+        created on first use.
+        """
+        self._fd = os.open(chip_path(chip), os.O_RDWR | getattr(os, 'O_CLOEXEC', 0))
+        info = bytearray(_CHIP_INFO.size)
+        fcntl.ioctl(self._fd, GET_CHIPINFO_IOCTL, info, True)
+        name, label, self.num_lines = _CHIP_INFO.unpack(bytes(info))
+        self.name = name.split(b'\0', 1)[0].decode('ascii')
+        self.label = label.split(b'\0', 1)[0].decode('ascii')
+        self._consumer = consumer.encode('ascii')[:NAME_SIZE-1]
+        self._requests = []
+        # LineRequest holding each requested line, by offset.
+        self._lines = {}
+        # Line flags and last written output value, by offset.  Both are kept
+        # so lines can be requested again with the same state.
+        self._flags = {}
+        self._values = {}
+        self._dispatcher = dispatcher
+        self._own_dispatcher = False
+        # EdgeCapture of each captured line, by offset.
+        self._captures = {}
+
+    def _line(self, pin):
+        # Return the request holding pin.
+        try:
+            return self._lines[pin]
+        except KeyError:
+            raise ValueError('Pin {0} has not been set up.'.format(pin))
+
+    def _config(self, offsets):
+        # Pack a gpio_v2_line_config applying each line's flags and driving
+        # outputs to their last written values.
+        masks = {}
+        outputs = 0
+        values = 0
+        for i, offset in enumerate(offsets):
+            flags = self._flags[offset]
+            masks[flags] = masks.get(flags, 0) | (1 << i)
+            if flags & LINE_FLAG_OUTPUT:
+                outputs |= 1 << i
+                if self._values.get(offset):
+                    values |= 1 << i
+        attrs = [_LINE_CONFIG_ATTR.pack(LINE_ATTR_ID_FLAGS, flags, mask)
+                 for flags, mask in sorted(masks.items())]
+        if outputs:
+            attrs.append(_LINE_CONFIG_ATTR.pack(LINE_ATTR_ID_OUTPUT_VALUES, values, outputs))
+        # Direction and bias give few distinct flag sets, so this only fails
+        # for combinations this class never produces.
+        assert len(attrs) <= NUM_ATTRS_MAX
+        config = _LINE_CONFIG.pack(LINE_FLAG_INPUT, len(attrs)) + b''.join(attrs)
+        return config.ljust(_LINE_CONFIG_SIZE, b'\0')
+
+    def _request(self, offsets, config=None, event_buffer_size=0):
+        # Request offsets from the chip with their configured state, or with
+        # config if given.
+        if config is None:
+            config = self._config(offsets)
+        request = bytearray(_LINE_REQUEST.pack(*(list(offsets) +
+            [0]*(LINES_MAX-len(offsets)) +
+            [self._consumer, config, len(offsets), event_buffer_size, 0])))
+        fcntl.ioctl(self._fd, GET_LINE_IOCTL, request, True)
+        fd = struct.unpack_from('=i', request, _LINE_REQUEST_FD_OFFSET)[0]
+        return LineRequest(fd, offsets)
+
+    def _replace(self, old, offsets):
+        # Swap request old (if any) for a new request of offsets.  Lines can't
+        # be added to a request, and can't be in two requests at once, so old
+        # is released first and requested again if the new request fails.
+        if old is not None:
+            self._release(old)
+        try:
+            request = self._request(offsets) if offsets else None
+        except Exception:
+            if old is not None:
+                self._add(self._request(old.offsets))
+            raise
+        if request is not None:
+            self._add(request)
+
+    def _add(self, request):
+        self._requests.append(request)
+        for offset in request.offsets:
+            self._lines[offset] = request
+        self._watch(request)
+
+    def _watch(self, request):
+        # Have the dispatcher read the request's events if it has edge lines.
+        if not request.watched and any(self._flags[offset] & _EDGE_MASK
+                                       for offset in request.offsets):
+            self._get_dispatcher().watch(request.fd, request.read_events)
+            request.watched = True
+
+    def _release(self, request):
+        # Stop watching and close a request.
+        if request.watched:
+            self._dispatcher.unwatch(request.fd)
+            request.watched = False
+        request.close()
+        self._requests.remove(request)
+
+    def _get_dispatcher(self):
+        if self._dispatcher is None:
+            self._dispatcher = EdgeEvents.EdgeDispatcher()
+            self._own_dispatcher = True
+        return self._dispatcher
+
+    def _configure(self, flags):
+        # Apply a dict of offset to line flags.  Lines already requested are
+        # reconfigured in place, new lines are added to the last request while
+        # it has room, and further lines go into new requests.
+        for pin in flags:
+            if pin < 0 or pin >= self.num_lines:
+                raise ValueError('Invalid GPIO value, must be between 0 and {0}.'.format(self.num_lines-1))
+        old_flags = dict((pin, self._flags.get(pin)) for pin in flags)
+        self._flags.update(flags)
+        try:
+            new = sorted(pin for pin in flags if pin not in self._lines)
+            changed = set(self._lines[pin] for pin in flags if pin in self._lines)
+            while new:
+                last = self._requests[-1] if self._requests else None
+                if last is None or len(last.offsets) >= LINES_MAX:
+                    last = None
+                offsets = last.offsets if last is not None else []
+                room = LINES_MAX - len(offsets)
+                changed.discard(last)
+                self._replace(last, offsets + new[:room])
+                new = new[room:]
+            for request in changed:
+                request.set_config(self._config(request.offsets))
+                self._watch(request)
+        except Exception:
+            for pin, value in old_flags.items():
+                if value is None:
+                    self._flags.pop(pin, None)
+                else:
+                    self._flags[pin] = value
+            raise
+
+    def setup(self, pin, mode, pull_up_down=GPIO.PUD_OFF):
+        """Set the input or output mode for a specified pin.  Mode should be
+        either GPIO.OUT or GPIO.IN.  The first call for a pin requests its line
+        from the kernel.
+        """
+        self._configure({pin: _DIR_FLAGS[mode] | _PUD_FLAGS[pull_up_down]})
+
+    def setup_pins(self, pins):
+        """Setup multiple pins as inputs or outputs at once.  Pins should be a
+        dict of pin number to pin type (GPIO.IN or GPIO.OUT).  New pins are
+        requested from the kernel together.
+        """
+        self._configure(dict((pin, _DIR_FLAGS[mode]) for pin, mode in pins.items()))
+
+    def output(self, pin, value):
+        """Set the specified pin the provided high/low value.  Value should be
+        either GPIO.HIGH/GPIO.LOW or a boolean (True = high).
+        """
+        request = self._line(pin)
+        bit = request.bits[pin]
+        request.set_values(bit if value else 0, bit)
+        self._values[pin] = bool(value)
+
+    def output_pins(self, pins):
+        """Set multiple pins high or low at once.  Pins should be a dict of pin
+        number to pin value (HIGH/True for 1, LOW/False for 0).  Pins in the
+        same line request are written with a single ioctl.
+        """
+        updates = {}
+        for pin, value in pins.items():
+            request = self._line(pin)
+            bit = request.bits[pin]
+            bits, mask = updates.get(request, (0, 0))
+            updates[request] = (bits | bit if value else bits, mask | bit)
+        for request, (bits, mask) in updates.items():
+            request.set_values(bits, mask)
+        for pin, value in pins.items():
+            self._values[pin] = bool(value)
+
+    def input(self, pin):
+        """Read the specified pin and return GPIO.HIGH/True if the pin is pulled
+        high, or GPIO.LOW/False if pulled low.
+        """
+        request = self._line(pin)
+        bit = request.bits[pin]
+        return request.get_values(bit) != 0
+
+    def input_pins(self, pins):
+        """Read multiple pins at once and return a list of their values
+        (GPIO.HIGH/True or GPIO.LOW/False) in the order of the pins list.  Pins
+        in the same line request are read with a single ioctl.
+        """
+        masks = {}
+        for pin in pins:
+            request = self._line(pin)
+            masks[request] = masks.get(request, 0) | request.bits[pin]
+        values = dict((request, request.get_values(mask)) for request, mask in masks.items())
+        return [(values[self._lines[pin]] & self._lines[pin].bits[pin]) != 0 for pin in pins]
+
+    def add_event_detect(self, pin, edge, callback=None):
+        """Enable edge detection events for a particular GPIO channel.  Edge
+        must be RISING, FALLING or BOTH.  The pin is made an input, keeping
+        its pull up or down.  If given, callback is called with an EdgeEvent
+        holding the pin, edge and timestamp for each edge.
+        """
+        flags = self._flags.get(pin, LINE_FLAG_INPUT)
+        flags = (flags & ~(LINE_FLAG_OUTPUT | _EDGE_MASK)) | LINE_FLAG_INPUT | _EDGE_FLAGS[edge]
+        dispatcher = self._get_dispatcher()
+        dispatcher.add_pin(pin, edge, callback)
+        try:
+            self._configure({pin: flags})
+        except Exception:
+            dispatcher.remove_pin(pin)
+            raise
+
+    def remove_event_detect(self, pin):
+        """Remove edge detection for a particular GPIO channel."""
+        self._get_dispatcher().remove_pin(pin)
+        if pin in self._lines:
+            self._configure({pin: self._flags[pin] & ~_EDGE_MASK})
+
+    def add_event_callback(self, pin, callback):
+        """Add a callback for an event already defined using add_event_detect().
+        Callback is called with an EdgeEvent for each edge.
+        """
+        self._get_dispatcher().add_callback(pin, callback)
+
+    def event_detected(self, pin):
+        """Returns True if an edge has occured on a given GPIO since the last
+        call.  You need to enable edge detection using add_event_detect() first.
+        """
+        return self._get_dispatcher().event_detected(pin)
+
+    def wait_for_edge(self, pin, edge, timeout=None):
+        """Wait for an edge.  Edge must be RISING, FALLING or BOTH.  Returns an
+        EdgeEvent, or None if timeout seconds passed first.  If edge detection
+        is already enabled for the pin, its edge setting applies.
+        """
+        dispatcher = self._get_dispatcher()
+        if dispatcher.has_pin(pin):
+            return dispatcher.wait(pin, timeout)
+        self.add_event_detect(pin, edge)
+        try:
+            return dispatcher.wait(pin, timeout, after=0)
+        finally:
+            self.remove_event_detect(pin)
+
+    def capture(self, pin, edge=GPIO.BOTH, capacity=None, pull_up_down=GPIO.PUD_OFF):
+        """Record the edges of an input pin into an EdgeCapture ring buffer of
+        capacity events (by default EdgeCapture.DEFAULT_CAPACITY) and return
+        it.  Edge must be RISING, FALLING or BOTH.  The pin gets its own line
+        request with the largest kernel event buffer, so it must not be set
+        up otherwise, and is released by cleanup() or closing the capture.
+        Needs NumPy.
+        """
+        import Adafruit_GPIO.EdgeCapture as EdgeCapture
+        capture = self._captures.get(pin)
+        if pin in self._lines or (capture is not None and capture.fd is not None):
+            raise ValueError('GPIO {0} is already in use.'.format(pin))
+        if pin < 0 or pin >= self.num_lines:
+            raise ValueError('Invalid GPIO value, must be between 0 and {0}.'.format(self.num_lines-1))
+        flags = LINE_FLAG_INPUT | _PUD_FLAGS[pull_up_down] | _EDGE_FLAGS[edge]
+        config = _LINE_CONFIG.pack(flags, 0).ljust(_LINE_CONFIG_SIZE, b'\0')
+        request = self._request([pin], config, EdgeCapture.DEFAULT_KERNEL_BUFFER)
+        try:
+            capture = EdgeCapture.EdgeCapture(request.fd, pin, self._get_dispatcher(),
+                capacity or EdgeCapture.DEFAULT_CAPACITY)
+        except Exception:
+            request.close()
+            raise
+        self._captures[pin] = capture
+        return capture
+
+    def cleanup(self, pin=None):
+        """Release a specific pin's line, or all lines if no pin is specified.
+        Released lines keep their state unless the kernel driver resets them.
+        """
+        for p in (list(self._captures) if pin is None else [pin]):
+            capture = self._captures.pop(p, None)
+            if capture is not None:
+                capture.close()
+        if self._dispatcher is not None:
+            for p in (list(self._lines) if pin is None else [pin]):
+                self._dispatcher.remove_pin(p)
+        if pin is None:
+            for request in list(self._requests):
+                self._release(request)
+            self._lines.clear()
+            self._flags.clear()
+            self._values.clear()
+            return
+        request = self._lines.pop(pin, None)
+        if request is None:
+            return
+        self._flags.pop(pin)
+        self._values.pop(pin, None)
+        self._replace(request, [offset for offset in request.offsets if offset != pin])
+
+    def close(self):
+        """Release all lines, stop edge detection and close the gpiochip
+        device.
+        """
+        self.cleanup()
+        if self._own_dispatcher:
+            self._dispatcher.close()
+            self._dispatcher = None
+            self._own_dispatcher = False
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -18,6 +18,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import os
 import platform
 import re
 
@@ -27,9 +28,70 @@ RASPBERRY_PI     = 1
 BEAGLEBONE_BLACK = 2
 MINNOWBOARD      = 3
 
+# The platform can be pinned to skip detection, either with this environment
+# variable or with the first line of this file.  Values are platform names
+# from PLATFORM_NAMES or their numbers.
+PLATFORM_ENV = 'ADAFRUIT_GPIO_PLATFORM'
+PLATFORM_FILE = '/etc/adafruit_gpio_platform'
+
+PLATFORM_NAMES = {
+    'unknown':          UNKNOWN,
+    'raspberry_pi':     RASPBERRY_PI,
+    'beaglebone_black': BEAGLEBONE_BLACK,
+    'minnowboard':      MINNOWBOARD,
+}
+
+# Result of the first platform_detect() call in this process.
+_platform = None
+
 def platform_detect():
-    """Detect if running on the Raspberry Pi or Beaglebone Black and return the
-    platform type.  Will return RASPBERRY_PI, BEAGLEBONE_BLACK, or UNKNOWN."""
+    """Detect if running on the Raspberry Pi, Beaglebone Black or Minnowboard
+    and return the platform type.  Will return RASPBERRY_PI, BEAGLEBONE_BLACK,
+    MINNOWBOARD, or UNKNOWN.  The platform is only detected once per process,
+    and not at all when it is set in the ADAFRUIT_GPIO_PLATFORM environment
+    variable or the /etc/adafruit_gpio_platform file."""
+    global _platform
+    if _platform is None:
+        _platform = configured_platform()
+        if _platform is None:
+            _platform = probe_platform()
+    return _platform
+
+def reset_platform():
+    """Forget the detected platform so the next platform_detect() call looks
+    again."""
+    global _platform
+    _platform = None
+
+def parse_platform(value):
+    """Return the platform type for a platform name or number, raising
+    ValueError if it isn't one."""
+    value = value.strip().lower()
+    if value in PLATFORM_NAMES:
+        return PLATFORM_NAMES[value]
+    if value.isdigit() and int(value) in PLATFORM_NAMES.values():
+        return int(value)
+    raise ValueError('Unknown platform {0!r}, expected one of {1}.'.format(
+        value, ', '.join(sorted(PLATFORM_NAMES))))
+
+def configured_platform(path=PLATFORM_FILE):
+    """Return the platform pinned by the environment or configuration file,
+    or None if neither sets one."""
+    value = os.environ.get(PLATFORM_ENV)
+    if not value:
+        try:
+            with open(path) as infile:
+                value = infile.readline()
+        except (IOError, OSError):
+            return None
+        if not value.strip():
+            return None
+    return parse_platform(value)
+
+def probe_platform():
+    """Detect the platform by inspecting the system, without the cache or
+    configured value.  Will return RASPBERRY_PI, BEAGLEBONE_BLACK,
+    MINNOWBOARD, or UNKNOWN."""
     # Handle Raspberry Pi
     pi = pi_version()
     if pi is not None:
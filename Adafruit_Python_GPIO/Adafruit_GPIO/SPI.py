@@ -26,6 +26,24 @@ import Adafruit_GPIO as GPIO
 MSBFIRST = 0
 LSBFIRST = 1
 
+# The spidev kernel driver rejects transfers larger than its bufsiz module
+# parameter, which defaults to 4096 bytes and can be raised when loading it,
+# e.g. modprobe spidev bufsiz=65536.
+SPIDEV_BUFSIZ_PATH = '/sys/module/spidev/parameters/bufsiz'
+DEFAULT_MAX_TRANSFER = 4096
+
+def spidev_max_transfer(path=SPIDEV_BUFSIZ_PATH):
+    """Return the largest number of bytes the spidev driver accepts in one
+    transfer, read from its bufsiz module parameter.  Falls back to the
+    kernel default of 4096 if the parameter can't be read.
+    """
+    try:
+        with open(path) as f:
+            size = int(f.read())
+    except (IOError, OSError, ValueError):
+        return DEFAULT_MAX_TRANSFER
+    return size if size > 0 else DEFAULT_MAX_TRANSFER
+
 def SpiDev(port,device,max_speed_hz):
     plat = GPIO.Platform.platform_detect()
     if plat is 3: return SpiDevMraa(port,device,max_speed_hz) 
@@ -45,6 +63,11 @@ class SpiDevLinux(object):
         self._device.max_speed_hz=max_speed_hz
         # Default to mode 0.
         self._device.mode = 0
+        # Largest write() the kernel takes in a single transaction.  Releases
+        # of spidev without writebytes2 also refuse lists over 4096 bytes.
+        self.max_transfer = spidev_max_transfer()
+        if not hasattr(self._device, 'writebytes2'):
+            self.max_transfer = min(self.max_transfer, DEFAULT_MAX_TRANSFER)
         
     def set_clock_hz(self, hz):
         """Set the speed of the SPI clock in hertz.  Note that not all speeds
@@ -80,9 +103,19 @@ class SpiDevLinux(object):
 
     def write(self, data):
         """Half-duplex SPI write.  The specified array of bytes will be clocked
-        out the MOSI line.
+        out the MOSI line.  Data can be a list of byte values or any bytes-like
+        object (bytearray, memoryview, NumPy uint8 array), which is passed to
+        spidev without a copy when the installed spidev has writebytes2.
         """
-        self._device.writebytes(data)
+        if isinstance(data, list):
+            self._device.writebytes(data)
+        elif hasattr(self._device, 'writebytes2'):
+            self._device.writebytes2(data)
+        else:
+            # Older spidev releases only accept a list of ints.
+            if not isinstance(data, bytearray):
+                data = bytearray(data)
+            self._device.writebytes(list(data))
 
     def read(self, length):
         """Half-duplex SPI read.  The specified length of bytes will be clocked
@@ -103,6 +136,10 @@ class SpiDevMraa(object):
         import mraa
         self._device = mraa.Spi(0)
         self._device.mode(0)
+        # mraa writes through spidev, so the same transfer limit applies.
+        self.max_transfer = spidev_max_transfer()
+        # Reused for full sized chunks that aren't bytearrays already.
+        self._chunk = None
         
     def set_clock_hz(self, hz):
         """Set the speed of the SPI clock in hertz.  Note that not all speeds
@@ -146,9 +183,20 @@ class SpiDevMraa(object):
 
     def write(self, data):
         """Half-duplex SPI write.  The specified array of bytes will be clocked
-        out the MOSI line.
+        out the MOSI line.  Data can be a list of byte values or any bytes-like
+        object.  The mraa binding only accepts bytearray, so a bytearray is
+        passed through unchanged and anything else is copied into one first,
+        reusing one buffer for chunks of max_transfer bytes.
         """
-        self._device.write(bytearray(data))
+        if not isinstance(data, bytearray):
+            if isinstance(data, list) or len(data) != self.max_transfer:
+                data = bytearray(data)
+            else:
+                if self._chunk is None:
+                    self._chunk = bytearray(self.max_transfer)
+                memoryview(self._chunk)[:] = data
+                data = self._chunk
+        self._device.write(data)
 
 class BitBang(object):
     """Software-based implementation of the SPI protocol over GPIO pins."""
@@ -180,6 +228,8 @@ class BitBang(object):
         self.set_mode(0)
         # Assume most significant bit first order.
         self.set_bit_order(MSBFIRST)
+        # Writes of any size are clocked out bit by bit.
+        self.max_transfer = None
 
     def set_clock_hz(self, hz):
         """Set the speed of the SPI clock.  This is unsupported with the bit
@@ -1 +1 @@
-from GPIO import *
\ No newline at end of file
+from .GPIO import *
\ No newline at end of file
@@ -0,0 +1,365 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""asyncio interface to GPIO edges, buttons and bus transactions, so event
+driven programs can handle them in one event loop:
+
+    agpio = AsyncGPIO(GPIO.get_platform_gpio())
+    event = await agpio.wait_for_edge(26, GPIO.FALLING, timeout=5)
+    async with agpio.edges(26) as edges:
+        async for event in edges:
+            ...
+    button = Button(agpio, 26)
+    await button.pressed()
+    spi = AsyncDevice(SPI.SpiDev(0, 0), bus=('spi', 0))
+    data = await spi.transfer([0x01, 0x02])
+
+Needs Python 3.5 or later.  The module only returns futures and objects
+implementing the awaitable protocols rather than using async/await syntax,
+so the package still byte-compiles on Python 2.
+"""
+try:
+    import asyncio
+    import concurrent.futures
+except ImportError:
+    raise ImportError('Adafruit_GPIO.aio needs Python 3.5 or later.')
+import collections
+import functools
+import threading
+
+import Adafruit_GPIO as GPIO
+import Adafruit_GPIO.EdgeEvents as EdgeEvents
+
+
+# Events an EdgeStream holds before dropping the oldest.
+DEFAULT_STREAM_SIZE = 64
+# Seconds after an accepted button edge during which further edges are
+# treated as contact bounce.
+DEFAULT_BOUNCETIME = 0.02
+
+
+def _done(loop, result=None):
+    # Return a future already completed with result.
+    future = loop.create_future()
+    future.set_result(result)
+    return future
+
+
+class AsyncGPIO(object):
+    """Awaitable edge events for a GPIO object with edge detection, such as
+    AdafruitMinnowAdapter or GPIOChip.  Edges arrive on the GPIO object's own
+    thread and are handed to the event loop, so coroutines wait for them
+    without blocking or polling threads.
+
+    Edge detection (of both edges) is enabled on a pin while anything waits
+    on it and removed afterwards, so don't use the GPIO object's own edge
+    methods on those pins meanwhile.  Methods must be called from the event
+    loop's thread.
+    """
+
+    def __init__(self, gpio, loop=None):
+        self.gpio = gpio
+        self._loop = loop
+        # Callbacks run on the loop for each edge, by pin.
+        self._subscribers = {}
+
+    def _get_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def subscribe(self, pin, callback):
+        """Call callback(event) on the event loop with an EdgeEvent for each
+        edge of pin, until unsubscribe() is called with the same arguments.
+        """
+        subscribers = self._subscribers.get(pin)
+        if subscribers is None:
+            loop = self._get_loop()
+            subscribers = self._subscribers[pin] = []
+            try:
+                self.gpio.add_event_detect(pin, GPIO.BOTH)
+                self.gpio.add_event_callback(pin, lambda event: self._post(loop, pin, event))
+            except Exception:
+                del self._subscribers[pin]
+                raise
+        subscribers.append(callback)
+
+    def unsubscribe(self, pin, callback):
+        """Stop calling callback for edges of pin."""
+        subscribers = self._subscribers.get(pin)
+        if subscribers is None or callback not in subscribers:
+            return
+        subscribers.remove(callback)
+        if not subscribers:
+            del self._subscribers[pin]
+            self.gpio.remove_event_detect(pin)
+
+    def _post(self, loop, pin, event):
+        # Runs on the GPIO object's thread.
+        if not isinstance(event, EdgeEvents.EdgeEvent):
+            # Libraries like RPi.GPIO only pass the pin, so read the level to
+            # tell the edge.
+            edge = GPIO.RISING if self.gpio.input(pin) else GPIO.FALLING
+            event = EdgeEvents.EdgeEvent(pin, edge, EdgeEvents.clock())
+        try:
+            loop.call_soon_threadsafe(self._deliver, pin, event)
+        except RuntimeError:
+            # The loop was closed.
+            pass
+
+    def _deliver(self, pin, event):
+        for callback in list(self._subscribers.get(pin, ())):
+            callback(event)
+
+    def wait_for_edge(self, pin, edge=GPIO.BOTH, timeout=None):
+        """Return a future resolving to the EdgeEvent of the next edge of pin
+        matching edge (RISING, FALLING or BOTH), or to None if timeout seconds
+        pass first.
+        """
+        loop = self._get_loop()
+        future = loop.create_future()
+        def on_edge(event):
+            if event.edge & edge and not future.done():
+                future.set_result(event)
+        self.subscribe(pin, on_edge)
+        future.add_done_callback(lambda f: self.unsubscribe(pin, on_edge))
+        if timeout is not None:
+            def expire():
+                if not future.done():
+                    future.set_result(None)
+            handle = loop.call_later(timeout, expire)
+            future.add_done_callback(lambda f: handle.cancel())
+        return future
+
+    def edges(self, pin, edge=GPIO.BOTH, maxsize=DEFAULT_STREAM_SIZE):
+        """Return an EdgeStream of the edges of pin matching edge, for use
+        with async for.
+        """
+        return EdgeStream(self, pin, edge, maxsize)
+
+
+class EdgeStream(object):
+    """Asynchronous iterator over the EdgeEvents of a pin, from when it is
+    created until close() is called or an async with block using it ends.
+    If more than maxsize events are waiting to be read the oldest are
+    dropped and counted in the dropped attribute.
+    """
+
+    def __init__(self, agpio, pin, edge=GPIO.BOTH, maxsize=DEFAULT_STREAM_SIZE):
+        self.pin = pin
+        self.edge = edge
+        self.dropped = 0
+        self._agpio = agpio
+        self._events = collections.deque(maxlen=maxsize)
+        self._waiter = None
+        self._closed = False
+        agpio.subscribe(pin, self._put)
+
+    def _put(self, event):
+        if not event.edge & self.edge:
+            return
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(event)
+            self._waiter = None
+            return
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(event)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        future = self._agpio._get_loop().create_future()
+        if self._events:
+            future.set_result(self._events.popleft())
+        elif self._closed:
+            future.set_exception(StopAsyncIteration())
+        else:
+            self._waiter = future
+        return future
+
+    def __aenter__(self):
+        return _done(self._agpio._get_loop(), self)
+
+    def __aexit__(self, exc_type, exc, tb):
+        self.close()
+        return _done(self._agpio._get_loop())
+
+    def close(self):
+        """Stop receiving edges.  Iteration ends once queued events are read."""
+        if self._closed:
+            return
+        self._closed = True
+        self._agpio.unsubscribe(self.pin, self._put)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_exception(StopAsyncIteration())
+        self._waiter = None
+
+
+class Button(object):
+    """A push button on a GPIO pin.  Edges within bouncetime seconds of the
+    last accepted one are ignored as contact bounce, using the edge
+    timestamps rather than timers.  Buttons are active low by default, wired
+    between the pin and ground; pull_up_down (GPIO.PUD_UP or PUD_DOWN)
+    enables an internal pull resistor if the GPIO object supports it.
+    """
+
+    def __init__(self, agpio, pin, active_low=True, pull_up_down=None,
+                 bouncetime=DEFAULT_BOUNCETIME):
+        self.pin = pin
+        self.active_low = active_low
+        self.bouncetime = bouncetime
+        self._agpio = agpio
+        if pull_up_down is None:
+            agpio.gpio.setup(pin, GPIO.IN)
+        else:
+            agpio.gpio.setup(pin, GPIO.IN, pull_up_down)
+        self.is_pressed = bool(agpio.gpio.input(pin)) != active_low
+        self._last = None
+        # Futures waiting for a press (True) or release (False).
+        self._waiters = {True: [], False: []}
+        agpio.subscribe(pin, self._edge)
+
+    def _edge(self, event):
+        if self._last is not None and event.timestamp - self._last < self.bouncetime:
+            return
+        pressed = (event.edge == GPIO.FALLING) == self.active_low
+        if pressed == self.is_pressed:
+            return
+        self._last = event.timestamp
+        self.is_pressed = pressed
+        waiters, self._waiters[pressed] = self._waiters[pressed], []
+        for future in waiters:
+            if not future.done():
+                future.set_result(event)
+
+    def _wait(self, pressed):
+        future = self._agpio._get_loop().create_future()
+        self._waiters[pressed].append(future)
+        return future
+
+    def pressed(self):
+        """Return a future resolving to the EdgeEvent of the next press."""
+        return self._wait(True)
+
+    def released(self):
+        """Return a future resolving to the EdgeEvent of the next release."""
+        return self._wait(False)
+
+    def close(self):
+        """Stop watching the button, cancelling futures still waiting."""
+        self._agpio.unsubscribe(self.pin, self._edge)
+        for waiters in self._waiters.values():
+            for future in waiters:
+                future.cancel()
+            del waiters[:]
+
+
+_executors = {}
+# Number of open AsyncDevices using the executor of each bus.
+_executor_users = {}
+_executors_lock = threading.Lock()
+
+def bus_executor(bus):
+    """Return the executor running transactions for bus, which is any
+    hashable naming it such as ('spi', 0) or ('i2c', 1), creating it on
+    first use.  Each bus gets one thread so its transactions run in order
+    while different buses run in parallel.
+    """
+    with _executors_lock:
+        executor = _executors.get(bus)
+        if executor is None:
+            executor = _executors[bus] = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        return executor
+
+def _acquire_executor(bus):
+    with _executors_lock:
+        _executor_users[bus] = _executor_users.get(bus, 0) + 1
+    return bus_executor(bus)
+
+def _release_executor(bus):
+    # Shut the executor of bus down once no AsyncDevice uses it.  Its thread
+    # finishes any queued transactions first.
+    with _executors_lock:
+        users = _executor_users.pop(bus, 1) - 1
+        if users > 0:
+            _executor_users[bus] = users
+            return
+        executor = _executors.pop(bus, None)
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+def shutdown_executors(wait=True):
+    """Shut down the executors of every bus, waiting for their queued
+    transactions if wait is True.  Call it after the event loop finishes
+    so no bus threads are left behind.
+    """
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+        _executor_users.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+class AsyncDevice(object):
+    """Wraps an SPI device, I2C device, display driver or any other object
+    doing blocking bus transactions so its method calls return futures
+    running them on the executor of bus.  Devices sharing a bus should be
+    given the same bus name; by default each device gets its own executor.
+    Attributes which aren't methods are returned unchanged.  Call close()
+    when done so the bus thread can exit.
+    """
+
+    def __init__(self, device, bus=None, loop=None):
+        self.device = device
+        self.bus = ('device', id(device)) if bus is None else bus
+        self.executor = _acquire_executor(self.bus)
+        self._loop = loop
+        self._closed = False
+
+    def __getattr__(self, name):
+        attr = getattr(self.device, name)
+        if not callable(attr):
+            return attr
+        def call(*args, **kwargs):
+            loop = self._loop or asyncio.get_event_loop()
+            return loop.run_in_executor(self.executor, functools.partial(attr, *args, **kwargs))
+        call.__name__ = name
+        call.__doc__ = attr.__doc__
+        return call
+
+    def close(self):
+        """Run the device's own close(), if it has one, on the bus thread and
+        then release the bus executor, which is shut down once no other
+        AsyncDevice uses it.  Returns a future.
+        """
+        loop = self._loop or asyncio.get_event_loop()
+        if self._closed:
+            return _done(loop)
+        self._closed = True
+        close = getattr(self.device, 'close', None)
+        if callable(close):
+            future = loop.run_in_executor(self.executor, close)
+        else:
+            future = _done(loop)
+        # Shutting down still runs the transactions already queued.
+        _release_executor(self.bus)
+        return future
@@ -0,0 +1,171 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import math
+import os
+import time
+import unittest
+
+import Adafruit_GPIO.EdgeEvents as EdgeEvents
+import Adafruit_GPIO.GPIOChip as GPIOChip
+try:
+    import numpy as np
+    import Adafruit_GPIO.EdgeCapture as EdgeCapture
+except ImportError:
+    np = None
+
+
+RISING = GPIOChip.LINE_EVENT_RISING_EDGE
+FALLING = GPIOChip.LINE_EVENT_FALLING_EDGE
+
+
+def pulse_train(count, period_ns, high_ns, start_ns=1000):
+    # Alternating rising and falling edges of count periods.
+    events = []
+    for i in range(count):
+        events.append((start_ns + i*period_ns, RISING))
+        events.append((start_ns + i*period_ns + high_ns, FALLING))
+    return events
+
+
+def event_array(events):
+    array = np.zeros(len(events), dtype=EdgeCapture.LINE_EVENT_DTYPE)
+    for i, (timestamp_ns, event_id) in enumerate(events):
+        array[i]['timestamp_ns'] = timestamp_ns
+        array[i]['id'] = event_id
+    return array
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('Timed out waiting for the capture.')
+        time.sleep(0.01)
+
+
+@unittest.skipIf(np is None, 'needs NumPy')
+class TestPulseStats(unittest.TestCase):
+    def test_square_wave(self):
+        # 1 kHz with a 25% duty cycle.
+        stats = EdgeCapture.pulse_stats(event_array(pulse_train(10, 1000000, 250000)))
+        self.assertEqual(stats.edges, 20)
+        self.assertAlmostEqual(stats.frequency, 1000.0)
+        self.assertAlmostEqual(stats.period, 0.001)
+        self.assertAlmostEqual(stats.duty, 0.25)
+
+    def test_jitter(self):
+        events = [(0, RISING), (900, FALLING), (1000, RISING), (1100, FALLING),
+                  (3000, RISING)]
+        stats = EdgeCapture.pulse_stats(event_array(events))
+        self.assertAlmostEqual(stats.period_min, 1e-6)
+        self.assertAlmostEqual(stats.period_max, 2e-6)
+        self.assertAlmostEqual(stats.period, 1.5e-6)
+        self.assertAlmostEqual(stats.duty, 1000/3000.0)
+
+    def test_rising_only(self):
+        events = [(i*500, RISING) for i in range(5)]
+        stats = EdgeCapture.pulse_stats(event_array(events))
+        self.assertAlmostEqual(stats.frequency, 2e6)
+        self.assertTrue(math.isnan(stats.duty))
+
+    def test_too_few_edges(self):
+        stats = EdgeCapture.pulse_stats(event_array([(0, RISING), (10, FALLING)]))
+        self.assertEqual(stats.edges, 2)
+        self.assertTrue(math.isnan(stats.frequency))
+
+
+@unittest.skipIf(np is None, 'needs NumPy')
+class TestEdgeCapture(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = EdgeEvents.EdgeDispatcher()
+        self.addCleanup(self.dispatcher.close)
+        self.seqno = 0
+
+    def capture(self, capacity):
+        read_fd, self.write_fd = os.pipe()
+        self.addCleanup(os.close, self.write_fd)
+        capture = EdgeCapture.EdgeCapture(read_fd, 3, self.dispatcher, capacity)
+        self.addCleanup(capture.close)
+        return capture
+
+    def send(self, events, skip=0):
+        # Write events the way the kernel reports them on a line request,
+        # skipping skip sequence numbers first as if they were dropped.
+        self.seqno += skip
+        data = b''
+        for timestamp_ns, event_id in events:
+            self.seqno += 1
+            data += GPIOChip._LINE_EVENT.pack(timestamp_ns, event_id, 3, self.seqno, self.seqno)
+        os.write(self.write_fd, data)
+
+    def test_read(self):
+        capture = self.capture(16)
+        train = pulse_train(3, 1000, 400)
+        self.send(train)
+        wait_for(lambda: capture.count == 6)
+        events = capture.read()
+        self.assertEqual(list(zip(events['timestamp_ns'], events['id'])), train)
+        self.assertEqual(capture.pending, 0)
+        self.assertEqual(len(capture.read()), 0)
+
+    def test_wrap_around(self):
+        capture = self.capture(8)
+        train = pulse_train(6, 1000, 500)
+        self.send(train[:6])
+        wait_for(lambda: capture.count == 6)
+        capture.read()
+        self.send(train[6:])
+        wait_for(lambda: capture.count == 12)
+        events = capture.read()
+        self.assertEqual(list(events['timestamp_ns']), [t for t, e in train[6:]])
+        self.assertEqual(list(capture.snapshot()['timestamp_ns']), [t for t, e in train[4:]])
+        self.assertEqual(capture.overruns, 0)
+
+    def test_overrun(self):
+        capture = self.capture(8)
+        train = pulse_train(10, 1000, 500)
+        self.send(train)
+        wait_for(lambda: capture.count == 20)
+        self.assertEqual(capture.overruns, 12)
+        self.assertEqual(list(capture.read()['timestamp_ns']), [t for t, e in train[12:]])
+
+    def test_kernel_drops(self):
+        capture = self.capture(16)
+        self.send([(0, RISING), (10, FALLING)])
+        self.send([(30, RISING)], skip=3)
+        wait_for(lambda: capture.count == 3)
+        self.assertEqual(capture.kernel_drops, 3)
+
+    def test_stats(self):
+        capture = self.capture(64)
+        self.send(pulse_train(20, 2000000, 1000000))
+        wait_for(lambda: capture.count == 40)
+        self.assertAlmostEqual(capture.stats().frequency, 500.0)
+        self.assertAlmostEqual(capture.stats(10).duty, 0.5)
+        # Stats don't consume events.
+        self.assertEqual(capture.pending, 40)
+
+    def test_close(self):
+        capture = self.capture(16)
+        self.send([(0, RISING)])
+        wait_for(lambda: capture.count == 1)
+        capture.close()
+        self.assertIsNone(capture.fd)
+        self.assertEqual(len(capture.read()), 1)
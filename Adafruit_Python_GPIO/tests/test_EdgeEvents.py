@@ -0,0 +1,207 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from mock import Mock, patch
+
+import Adafruit_GPIO as GPIO
+import Adafruit_GPIO.EdgeEvents as EdgeEvents
+
+
+class PipeSource(object):
+    """Edge source on a pipe: each byte written is a pin number whose edge
+    alternates between rising and falling.
+    """
+
+    def __init__(self, dispatcher):
+        self.read_fd, self.write_fd = os.pipe()
+        self.level = {}
+        dispatcher.watch(self.read_fd, self.read)
+
+    def read(self):
+        events = []
+        for pin in bytearray(os.read(self.read_fd, 64)):
+            self.level[pin] = not self.level.get(pin, False)
+            edge = GPIO.RISING if self.level[pin] else GPIO.FALLING
+            events.append(EdgeEvents.EdgeEvent(pin, edge, EdgeEvents.clock()))
+        return events
+
+    def edge(self, *pins):
+        os.write(self.write_fd, bytes(bytearray(pins)))
+
+    def close(self):
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+
+class TestEdgeDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = EdgeEvents.EdgeDispatcher()
+        self.addCleanup(self.dispatcher.close)
+        self.source = PipeSource(self.dispatcher)
+        self.addCleanup(self.source.close)
+
+    def test_wait(self):
+        self.dispatcher.add_pin(1, GPIO.BOTH)
+        threading.Timer(0.05, self.source.edge, (1,)).start()
+        event = self.dispatcher.wait(1, timeout=5)
+        self.assertEqual((event.pin, event.edge), (1, GPIO.RISING))
+
+    def test_wait_timeout(self):
+        self.dispatcher.add_pin(1, GPIO.BOTH)
+        start = time.time()
+        self.assertIsNone(self.dispatcher.wait(1, timeout=0.05))
+        self.assertGreaterEqual(time.time() - start, 0.04)
+
+    def test_wait_after(self):
+        self.dispatcher.add_pin(1, GPIO.BOTH)
+        self.source.edge(1)
+        # An edge that arrived before the call is returned when after says
+        # it hasn't been seen yet.
+        self.assertIsNotNone(self.dispatcher.wait(1, timeout=5, after=0))
+
+    def test_wait_removed_pin(self):
+        self.dispatcher.add_pin(1, GPIO.BOTH)
+        threading.Timer(0.05, self.dispatcher.remove_pin, (1,)).start()
+        self.assertIsNone(self.dispatcher.wait(1, timeout=5))
+
+    def test_callbacks(self):
+        received = []
+        done = threading.Event()
+        def callback(event):
+            received.append(event)
+            if len(received) == 2:
+                done.set()
+        self.dispatcher.add_pin(1, GPIO.BOTH, callback)
+        self.source.edge(1, 1)
+        self.assertTrue(done.wait(5))
+        self.assertEqual([e.edge for e in received], [GPIO.RISING, GPIO.FALLING])
+        self.assertLessEqual(received[0].timestamp, received[1].timestamp)
+
+    def test_edge_filter(self):
+        self.dispatcher.add_pin(1, GPIO.FALLING)
+        self.source.edge(1, 1, 1, 1)
+        event = self.dispatcher.wait(1, timeout=5, after=0)
+        self.assertEqual(event.edge, GPIO.FALLING)
+        # Wait for the second falling edge before reading the queue.
+        self.dispatcher.wait(1, timeout=5, after=1)
+        self.assertEqual([e.edge for e in self.dispatcher.events(1)], [GPIO.FALLING]*2)
+
+    def test_many_pins(self):
+        for pin in range(32):
+            self.dispatcher.add_pin(pin, GPIO.BOTH)
+        self.source.edge(*range(32))
+        for pin in range(32):
+            self.assertEqual(self.dispatcher.wait(pin, timeout=5, after=0).pin, pin)
+        # One thread serves every pin.
+        self.assertEqual(len([t for t in threading.enumerate() if t.name == 'EdgeDispatcher']), 1)
+
+    def test_unregistered_pins_ignored(self):
+        self.dispatcher.add_pin(2, GPIO.BOTH)
+        self.source.edge(1, 2)
+        self.dispatcher.wait(2, timeout=5, after=0)
+        self.assertFalse(self.dispatcher.has_pin(1))
+
+    def test_event_detected(self):
+        self.dispatcher.add_pin(1, GPIO.BOTH)
+        self.assertFalse(self.dispatcher.event_detected(1))
+        self.source.edge(1)
+        self.dispatcher.wait(1, timeout=5, after=0)
+        self.assertTrue(self.dispatcher.event_detected(1))
+        self.assertFalse(self.dispatcher.event_detected(1))
+
+    def test_queue_size(self):
+        self.dispatcher.queue_size = 4
+        self.dispatcher.add_pin(1, GPIO.BOTH)
+        self.source.edge(*([1]*10))
+        self.dispatcher.wait(1, timeout=5, after=9)
+        self.assertEqual(len(self.dispatcher.events(1)), 4)
+        self.assertEqual(self.dispatcher.events(1), [])
+
+    def test_add_pin_twice(self):
+        self.dispatcher.add_pin(1, GPIO.BOTH)
+        self.assertRaises(RuntimeError, self.dispatcher.add_pin, 1, GPIO.RISING)
+
+    def test_pin_not_added(self):
+        self.assertRaises(RuntimeError, self.dispatcher.wait, 1)
+        self.assertRaises(RuntimeError, self.dispatcher.event_detected, 1)
+
+    def test_callback_error_keeps_dispatching(self):
+        self.dispatcher.add_pin(1, GPIO.BOTH, Mock(side_effect=ValueError))
+        self.source.edge(1, 1)
+        self.assertIsNotNone(self.dispatcher.wait(1, timeout=5, after=1))
+
+    def test_unwatch(self):
+        self.dispatcher.add_pin(1, GPIO.BOTH)
+        self.dispatcher.unwatch(self.source.read_fd)
+        self.source.edge(1)
+        self.assertIsNone(self.dispatcher.wait(1, timeout=0.05, after=0))
+
+
+class TestSysfsSource(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.value = os.path.join(self.directory, 'value')
+        with open(self.value, 'w') as f:
+            f.write('0\n')
+
+    def test_read(self):
+        dispatcher = EdgeEvents.EdgeDispatcher()
+        self.addCleanup(dispatcher.close)
+        # Regular files can't be added to epoll, so capture the reader.
+        dispatcher.watch = Mock()
+        with patch('Adafruit_GPIO.EdgeEvents.SYSFS_VALUE_PATH', self.value):
+            dispatcher.watch_sysfs(1, 340)
+        fd, read, eventmask = dispatcher.watch.call_args[0]
+        self.assertEqual(eventmask & EdgeEvents.select.EPOLLIN, 0)
+        with open(self.value, 'w') as f:
+            f.write('1\n')
+        self.assertEqual([e[:2] for e in read()], [(1, GPIO.RISING)])
+        with open(self.value, 'w') as f:
+            f.write('0\n')
+        self.assertEqual([e[:2] for e in read()], [(1, GPIO.FALLING)])
+        dispatcher.unwatch = Mock()
+        dispatcher.unwatch_sysfs(1)
+        dispatcher.unwatch.assert_called_with(fd)
+        self.assertRaises(OSError, os.fstat, fd)
+
+    def test_read_single_edge(self):
+        dispatcher = EdgeEvents.EdgeDispatcher()
+        self.addCleanup(dispatcher.close)
+        dispatcher.watch = Mock()
+        dispatcher.unwatch = Mock()
+        dispatcher.add_pin(1, GPIO.RISING)
+        with patch('Adafruit_GPIO.EdgeEvents.SYSFS_VALUE_PATH', self.value):
+            dispatcher.watch_sysfs(1, 340)
+        self.addCleanup(dispatcher.unwatch_sysfs, 1)
+        read = dispatcher.watch.call_args[0][1]
+        # A pulse that is over by the time the value is read still counts as
+        # the rising edge the pin was registered for.
+        events = read()
+        self.assertEqual([e[:2] for e in events], [(1, GPIO.RISING)])
+        dispatcher._deliver(events[0])
+        self.assertEqual(dispatcher.events(1), events)
@@ -50,6 +50,11 @@ class TestBaseGPIO(unittest.TestCase):
         gpio.output_pins({0: True, 1: False, 7: True})
         self.assertDictEqual(gpio.pin_written, {0: [1], 1: [0], 7: [1]})
 
+    def test_input_pins(self):
+        gpio = MockGPIO()
+        gpio.pin_read = {0: [1], 1: [0], 7: [1]}
+        self.assertListEqual(gpio.input_pins([7, 1, 0]), [True, False, True])
+
 
 class TestRPiGPIOAdapter(unittest.TestCase):
     def test_setup(self):
@@ -210,6 +215,158 @@ class TestAdafruitBBIOAdapter(unittest.TestCase):
         bbio_gpio.cleanup.assert_called_with(1)
 
 
+class TestAdafruitMinnowAdapter(unittest.TestCase):
+    def test_pin_opened_once(self):
+        mraa = Mock()
+        adapter = GPIO.AdafruitMinnowAdapter(mraa)
+        adapter.setup(1, GPIO.OUT)
+        adapter.output(1, True)
+        adapter.output(1, False)
+        adapter.input(1)
+        mraa.Gpio.assert_called_once_with(1)
+        pin = mraa.Gpio.return_value
+        pin.dir.assert_called_with(mraa.DIR_OUT)
+        self.assertEqual(pin.write.call_count, 2)
+        pin.write.assert_called_with(False)
+        pin.read.assert_called_once_with()
+
+    def test_pins_opened_separately(self):
+        mraa = Mock()
+        mraa.Gpio.side_effect = lambda pin: Mock(name='pin{0}'.format(pin))
+        adapter = GPIO.AdafruitMinnowAdapter(mraa)
+        adapter.output(1, True)
+        adapter.output(2, True)
+        adapter.output(1, False)
+        self.assertEqual(mraa.Gpio.call_count, 2)
+        self.assertIsNot(adapter._pin(1), adapter._pin(2))
+
+    def test_use_mmap(self):
+        mraa = Mock()
+        adapter = GPIO.AdafruitMinnowAdapter(mraa)
+        adapter.output(1, True)
+        mraa.Gpio.return_value.useMmap.assert_called_once_with(True)
+
+    def test_use_mmap_disabled(self):
+        mraa = Mock()
+        adapter = GPIO.AdafruitMinnowAdapter(mraa, use_mmap=False)
+        adapter.output(1, True)
+        self.assertFalse(mraa.Gpio.return_value.useMmap.called)
+
+    def test_add_event_detect(self):
+        mraa = Mock()
+        dispatcher = Mock()
+        adapter = GPIO.AdafruitMinnowAdapter(mraa, dispatcher=dispatcher)
+        pyfunc = Mock()
+        mraa.Gpio.return_value.getPin.return_value = 340
+        adapter.add_event_detect(1, GPIO.RISING, pyfunc, 'args')
+        pin = mraa.Gpio.return_value
+        pin.dir.assert_called_with(mraa.DIR_IN)
+        pin.edge.assert_called_with(mraa.EDGE_RISING)
+        pin.getPin.assert_called_with(True)
+        dispatcher.watch_sysfs.assert_called_with(1, 340)
+        self.assertFalse(pin.isr.called)
+        # The dispatcher callback calls pyfunc the way mraa's isr() did.
+        pin_number, edge, callback = dispatcher.add_pin.call_args[0]
+        self.assertEqual((pin_number, edge), (1, GPIO.RISING))
+        callback(Mock())
+        pyfunc.assert_called_with('args')
+
+    def test_add_event_detect_failure(self):
+        mraa = Mock()
+        dispatcher = Mock()
+        dispatcher.watch_sysfs.side_effect = OSError(2, 'No such file or directory')
+        adapter = GPIO.AdafruitMinnowAdapter(mraa, dispatcher=dispatcher)
+        self.assertRaises(OSError, adapter.add_event_detect, 1, GPIO.BOTH)
+        dispatcher.remove_pin.assert_called_with(1)
+
+    def test_remove_event_detect(self):
+        mraa = Mock()
+        dispatcher = Mock()
+        adapter = GPIO.AdafruitMinnowAdapter(mraa, dispatcher=dispatcher)
+        adapter.add_event_detect(1, GPIO.RISING)
+        adapter.remove_event_detect(1)
+        dispatcher.unwatch_sysfs.assert_called_with(1)
+        dispatcher.remove_pin.assert_called_with(1)
+        mraa.Gpio.return_value.edge.assert_called_with(mraa.EDGE_NONE)
+        mraa.Gpio.assert_called_once_with(1)
+
+    def test_event_detected(self):
+        dispatcher = Mock()
+        adapter = GPIO.AdafruitMinnowAdapter(Mock(), dispatcher=dispatcher)
+        self.assertIs(adapter.event_detected(1), dispatcher.event_detected.return_value)
+        dispatcher.event_detected.assert_called_with(1)
+
+    def test_wait_for_edge(self):
+        mraa = Mock()
+        dispatcher = Mock()
+        dispatcher.has_pin.return_value = False
+        adapter = GPIO.AdafruitMinnowAdapter(mraa, dispatcher=dispatcher)
+        event = adapter.wait_for_edge(1, GPIO.FALLING, timeout=2)
+        self.assertIs(event, dispatcher.wait.return_value)
+        dispatcher.add_pin.assert_called_with(1, GPIO.FALLING, None)
+        dispatcher.wait.assert_called_with(1, 2, after=0)
+        dispatcher.remove_pin.assert_called_with(1)
+        mraa.Gpio.return_value.edge.assert_called_with(mraa.EDGE_NONE)
+
+    def test_wait_for_edge_detect_enabled(self):
+        dispatcher = Mock()
+        dispatcher.has_pin.return_value = True
+        adapter = GPIO.AdafruitMinnowAdapter(Mock(), dispatcher=dispatcher)
+        adapter.wait_for_edge(1, GPIO.FALLING)
+        dispatcher.wait.assert_called_with(1, None)
+        self.assertFalse(dispatcher.add_pin.called)
+        self.assertFalse(dispatcher.remove_pin.called)
+
+    @patch('Adafruit_GPIO.GPIOChip.GPIOChip')
+    @patch('Adafruit_GPIO.GPIOChip.find_line', return_value=('/dev/gpiochip1', 2))
+    def test_capture(self, find_line, GPIOChip):
+        mraa = Mock()
+        mraa.Gpio.return_value.getPin.return_value = 340
+        dispatcher = Mock()
+        adapter = GPIO.AdafruitMinnowAdapter(mraa, dispatcher=dispatcher)
+        capture = adapter.capture(1, GPIO.RISING)
+        find_line.assert_called_with(340)
+        GPIOChip.assert_called_once_with('/dev/gpiochip1', dispatcher=dispatcher)
+        chip = GPIOChip.return_value
+        chip.capture.assert_called_with(2, GPIO.RISING, None, GPIO.PUD_OFF)
+        self.assertIs(capture, chip.capture.return_value)
+        # The mraa context was released so the line could be requested.
+        self.assertEqual(adapter._pins, {})
+        self.assertRaises(ValueError, adapter.capture, 1)
+        adapter.cleanup(1)
+        chip.cleanup.assert_called_with(2)
+
+    def test_cleanup_stops_edge_detection(self):
+        dispatcher = Mock()
+        dispatcher.has_pin.side_effect = lambda pin: pin == 2
+        adapter = GPIO.AdafruitMinnowAdapter(Mock(), dispatcher=dispatcher)
+        adapter.output(1, True)
+        adapter.add_event_detect(2, GPIO.BOTH)
+        adapter.cleanup()
+        dispatcher.unwatch_sysfs.assert_called_once_with(2)
+        dispatcher.remove_pin.assert_called_once_with(2)
+
+    def test_cleanup(self):
+        mraa = Mock()
+        adapter = GPIO.AdafruitMinnowAdapter(mraa)
+        adapter.output(1, True)
+        adapter.output(2, True)
+        adapter.cleanup()
+        adapter.output(1, True)
+        self.assertEqual(mraa.Gpio.call_count, 3)
+
+    def test_cleanup_pin(self):
+        mraa = Mock()
+        mraa.Gpio.side_effect = lambda pin: Mock(name='pin{0}'.format(pin))
+        adapter = GPIO.AdafruitMinnowAdapter(mraa)
+        adapter.output(1, True)
+        adapter.output(2, True)
+        adapter.cleanup(1)
+        adapter.output(1, True)
+        adapter.output(2, True)
+        self.assertEqual([c[0][0] for c in mraa.Gpio.call_args_list], [1, 2, 1])
+
+
 class TestGetPlatformGPIO(unittest.TestCase):
     @patch.dict('sys.modules', {'RPi': Mock(), 'RPi.GPIO': Mock()})
     @patch('Adafruit_GPIO.Platform.platform_detect', Mock(return_value=Platform.RASPBERRY_PI))
@@ -223,6 +380,21 @@ class TestGetPlatformGPIO(unittest.TestCase):
         gpio = GPIO.get_platform_gpio()
         self.assertIsInstance(gpio, GPIO.AdafruitBBIOAdapter)
 
+    @patch.dict('sys.modules', {'mraa': Mock()})
+    @patch('Adafruit_GPIO.Platform.platform_detect', Mock(return_value=Platform.MINNOWBOARD))
+    def test_minnowboard(self):
+        gpio = GPIO.get_platform_gpio()
+        self.assertIsInstance(gpio, GPIO.AdafruitMinnowAdapter)
+
+    @patch('os.path.exists', Mock(return_value=True))
+    @patch('Adafruit_GPIO.GPIOChip.GPIOChip')
+    @patch('Adafruit_GPIO.Platform.platform_detect', Mock(return_value=Platform.UNKNOWN))
+    def test_unknown_with_gpiochip(self, gpiochip):
+        gpio = GPIO.get_platform_gpio()
+        gpiochip.assert_called_with(0)
+        self.assertIs(gpio, gpiochip.return_value)
+
+    @patch('os.path.exists', Mock(return_value=False))
     @patch('Adafruit_GPIO.Platform.platform_detect', Mock(return_value=Platform.UNKNOWN))
     def test_unknown(self):
         self.assertRaises(RuntimeError, GPIO.get_platform_gpio)
@@ -0,0 +1,464 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import errno
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import unittest
+
+from mock import patch
+
+import Adafruit_GPIO as GPIO
+import Adafruit_GPIO.EdgeEvents as EdgeEvents
+import Adafruit_GPIO.GPIOChip as GPIOChip
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# The tests patch os.close, so keep the real one for the fake's pipes.
+_close = os.close
+
+
+class FakeKernel(object):
+    """Emulates the gpiochip v2 ioctls of a single chip by decoding the
+    structures GPIOChip packs, so tests check the bytes sent to the kernel.
+    """
+    CHIP_FD = 3
+
+    def __init__(self, num_lines=32):
+        self.num_lines = num_lines
+        self.lines = {}         # offset -> dict(fd, flags, value)
+        self.requests = {}      # fd -> offsets
+        self.levels = {}        # offset -> level driven from outside
+        self.value_ioctls = 0
+        self.event_pipes = {}   # request fd -> write end of its event pipe
+        self.event_buffer_sizes = {}    # request fd -> requested event buffer
+
+    def open(self, path, flags):
+        return self.CHIP_FD
+
+    def close(self, fd):
+        if fd in self.requests:
+            for offset in self.requests.pop(fd):
+                del self.lines[offset]
+            _close(fd)
+            _close(self.event_pipes.pop(fd))
+        elif fd != self.CHIP_FD:
+            _close(fd)
+
+    def edge(self, offset, rising, timestamp_ns=0):
+        """Report an edge of offset on its request's event file descriptor."""
+        line = self.lines[offset]
+        flag = GPIOChip.LINE_FLAG_EDGE_RISING if rising else GPIOChip.LINE_FLAG_EDGE_FALLING
+        if line['flags'] & flag:
+            event_id = GPIOChip.LINE_EVENT_RISING_EDGE if rising else GPIOChip.LINE_EVENT_FALLING_EDGE
+            os.write(self.event_pipes[line['fd']],
+                GPIOChip._LINE_EVENT.pack(timestamp_ns, event_id, offset, 1, 1))
+
+    def _apply_config(self, offsets, config):
+        flags, num_attrs = GPIOChip._LINE_CONFIG.unpack_from(config)
+        line_flags = [flags]*len(offsets)
+        values = {}
+        for n in range(num_attrs):
+            attr_id, value, mask = GPIOChip._LINE_CONFIG_ATTR.unpack_from(config,
+                GPIOChip._LINE_CONFIG.size + n*GPIOChip._LINE_CONFIG_ATTR.size)
+            for i in range(len(offsets)):
+                if mask & (1 << i):
+                    if attr_id == GPIOChip.LINE_ATTR_ID_FLAGS:
+                        line_flags[i] = value
+                    elif attr_id == GPIOChip.LINE_ATTR_ID_OUTPUT_VALUES:
+                        values[i] = (value >> i) & 1
+        for i, offset in enumerate(offsets):
+            line = self.lines[offset]
+            line['flags'] = line_flags[i]
+            if line_flags[i] & GPIOChip.LINE_FLAG_OUTPUT:
+                line['value'] = values.get(i, 0)
+
+    def _level(self, offset):
+        line = self.lines[offset]
+        if line['flags'] & GPIOChip.LINE_FLAG_OUTPUT:
+            return line['value']
+        if offset in self.levels:
+            return self.levels[offset]
+        return 1 if line['flags'] & GPIOChip.LINE_FLAG_BIAS_PULL_UP else 0
+
+    def ioctl(self, fd, request, buf, mutate=False):
+        if request == GPIOChip.GET_CHIPINFO_IOCTL:
+            buf[:] = GPIOChip._CHIP_INFO.pack(b'gpiochip0', b'fake', self.num_lines)
+        elif request == GPIOChip.GET_LINE_IOCTL:
+            fields = GPIOChip._LINE_REQUEST.unpack(bytes(buf))
+            num_lines = fields[GPIOChip.LINES_MAX+2]
+            offsets = fields[:num_lines]
+            for offset in offsets:
+                if offset in self.lines:
+                    raise IOError(errno.EBUSY, 'Device or resource busy')
+            # Requests are pipes so edge events can be written to them.
+            fd, self.event_pipes[fd] = os.pipe()
+            self.requests[fd] = offsets
+            self.event_buffer_sizes[fd] = fields[GPIOChip.LINES_MAX+3]
+            for offset in offsets:
+                self.lines[offset] = {'fd': fd}
+            self._apply_config(offsets, fields[GPIOChip.LINES_MAX+1])
+            struct.pack_into('=i', buf, GPIOChip._LINE_REQUEST_FD_OFFSET, fd)
+        elif request == GPIOChip.LINE_SET_CONFIG_IOCTL:
+            self._apply_config(self.requests[fd], bytes(buf))
+        elif request == GPIOChip.LINE_SET_VALUES_IOCTL:
+            self.value_ioctls += 1
+            bits, mask = GPIOChip._LINE_VALUES.unpack(bytes(buf))
+            for i, offset in enumerate(self.requests[fd]):
+                if mask & (1 << i):
+                    self.lines[offset]['value'] = (bits >> i) & 1
+        elif request == GPIOChip.LINE_GET_VALUES_IOCTL:
+            self.value_ioctls += 1
+            bits, mask = GPIOChip._LINE_VALUES.unpack(bytes(buf))
+            bits = 0
+            for i, offset in enumerate(self.requests[fd]):
+                if mask & (1 << i) and self._level(offset):
+                    bits |= 1 << i
+            GPIOChip._LINE_VALUES.pack_into(buf, 0, bits, mask)
+        else:
+            raise IOError(errno.EINVAL, 'Invalid argument')
+        return 0
+
+
+class TestGPIOChip(unittest.TestCase):
+    def setUp(self):
+        self.kernel = FakeKernel()
+        patches = [patch('Adafruit_GPIO.GPIOChip.fcntl.ioctl', self.kernel.ioctl),
+                   patch('Adafruit_GPIO.GPIOChip.os.open', self.kernel.open),
+                   patch('Adafruit_GPIO.GPIOChip.os.close', self.kernel.close)]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.gpio = GPIOChip.GPIOChip(0)
+
+    def test_chip_info(self):
+        self.assertEqual(self.gpio.name, 'gpiochip0')
+        self.assertEqual(self.gpio.label, 'fake')
+        self.assertEqual(self.gpio.num_lines, 32)
+
+    def test_chip_path(self):
+        self.assertEqual(GPIOChip.chip_path(2), '/dev/gpiochip2')
+        self.assertEqual(GPIOChip.chip_path('/dev/gpiochip5'), '/dev/gpiochip5')
+
+    def test_setup_requests_lines_together(self):
+        self.gpio.setup_pins({1: GPIO.OUT, 4: GPIO.OUT, 7: GPIO.IN})
+        self.assertEqual(len(self.kernel.requests), 1)
+        self.assertEqual(self.kernel.lines[4]['flags'], GPIOChip.LINE_FLAG_OUTPUT)
+        self.assertEqual(self.kernel.lines[7]['flags'], GPIOChip.LINE_FLAG_INPUT)
+
+    def test_setup_grows_request_keeping_outputs(self):
+        self.gpio.setup(1, GPIO.OUT)
+        self.gpio.set_high(1)
+        self.gpio.setup(2, GPIO.IN, GPIO.PUD_UP)
+        self.assertEqual(len(self.kernel.requests), 1)
+        self.assertEqual(self.kernel.lines[1]['value'], 1)
+        self.assertEqual(self.kernel.lines[2]['flags'],
+            GPIOChip.LINE_FLAG_INPUT | GPIOChip.LINE_FLAG_BIAS_PULL_UP)
+        self.assertTrue(self.gpio.is_high(2))
+
+    def test_setup_reconfigures_in_place(self):
+        self.gpio.setup_pins({1: GPIO.OUT, 2: GPIO.OUT})
+        fd = self.kernel.lines[1]['fd']
+        self.gpio.setup(2, GPIO.IN)
+        self.assertEqual(self.kernel.lines[2]['fd'], fd)
+        self.assertEqual(self.kernel.lines[2]['flags'], GPIOChip.LINE_FLAG_INPUT)
+
+    def test_setup_invalid_pin(self):
+        self.assertRaises(ValueError, self.gpio.setup, 32, GPIO.OUT)
+
+    def test_output(self):
+        self.gpio.setup_pins({1: GPIO.OUT, 2: GPIO.OUT})
+        self.gpio.output(2, GPIO.HIGH)
+        self.assertEqual(self.kernel.lines[1]['value'], 0)
+        self.assertEqual(self.kernel.lines[2]['value'], 1)
+        self.gpio.output(2, GPIO.LOW)
+        self.assertEqual(self.kernel.lines[2]['value'], 0)
+
+    def test_output_pins_single_ioctl(self):
+        self.gpio.setup_pins(dict((pin, GPIO.OUT) for pin in range(8)))
+        self.gpio.output_pins({0: True, 3: True, 5: False, 7: True})
+        self.assertEqual(self.kernel.value_ioctls, 1)
+        self.assertEqual([self.kernel.lines[pin]['value'] for pin in range(8)],
+            [1, 0, 0, 1, 0, 0, 0, 1])
+
+    def test_input(self):
+        self.gpio.setup(5, GPIO.IN)
+        self.kernel.levels[5] = 1
+        self.assertTrue(self.gpio.input(5))
+        self.kernel.levels[5] = 0
+        self.assertFalse(self.gpio.input(5))
+
+    def test_input_pins_single_ioctl(self):
+        self.gpio.setup_pins({3: GPIO.IN, 4: GPIO.IN, 9: GPIO.IN})
+        self.kernel.levels.update({3: 1, 4: 0, 9: 1})
+        self.assertEqual(self.gpio.input_pins([9, 4, 3]), [True, False, True])
+        self.assertEqual(self.kernel.value_ioctls, 1)
+
+    def test_more_lines_than_one_request(self):
+        self.kernel.num_lines = 100
+        gpio = GPIOChip.GPIOChip(0)
+        gpio.setup_pins(dict((pin, GPIO.OUT) for pin in range(70)))
+        self.assertEqual(sorted(len(o) for o in self.kernel.requests.values()), [6, 64])
+        gpio.output_pins(dict((pin, True) for pin in range(70)))
+        self.assertEqual(self.kernel.value_ioctls, 2)
+        self.assertTrue(all(self.kernel.lines[pin]['value'] for pin in range(70)))
+
+    def test_pin_not_set_up(self):
+        self.assertRaises(ValueError, self.gpio.output, 1, True)
+        self.assertRaises(ValueError, self.gpio.input, 1)
+
+    def test_cleanup(self):
+        self.gpio.setup_pins({1: GPIO.OUT, 2: GPIO.OUT})
+        self.gpio.cleanup()
+        self.assertEqual(self.kernel.lines, {})
+        self.assertRaises(ValueError, self.gpio.output, 1, True)
+
+    def test_cleanup_pin(self):
+        self.gpio.setup_pins({1: GPIO.OUT, 2: GPIO.OUT})
+        self.gpio.set_high(2)
+        self.gpio.cleanup(1)
+        self.assertEqual(sorted(self.kernel.lines), [2])
+        self.assertEqual(self.kernel.lines[2]['value'], 1)
+        self.assertRaises(ValueError, self.gpio.output, 1, True)
+
+    def test_failed_request_restores_lines(self):
+        self.gpio.setup(1, GPIO.OUT)
+        # Line 2 is held by another process.
+        self.kernel.lines[2] = {'fd': 99, 'flags': GPIOChip.LINE_FLAG_INPUT}
+        self.assertRaises(IOError, self.gpio.setup, 2, GPIO.OUT)
+        self.assertIn(1, self.kernel.lines)
+        self.gpio.set_high(1)
+        self.assertEqual(self.kernel.lines[1]['value'], 1)
+
+
+class TestGPIOChipEdges(unittest.TestCase):
+    def setUp(self):
+        self.kernel = FakeKernel()
+        patches = [patch('Adafruit_GPIO.GPIOChip.fcntl.ioctl', self.kernel.ioctl),
+                   patch('Adafruit_GPIO.GPIOChip.os.open', self.kernel.open),
+                   patch('Adafruit_GPIO.GPIOChip.os.close', self.kernel.close)]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.gpio = GPIOChip.GPIOChip(0)
+        self.addCleanup(self.gpio.close)
+
+    def test_add_event_detect_flags(self):
+        self.gpio.setup(3, GPIO.IN, GPIO.PUD_UP)
+        self.gpio.add_event_detect(3, GPIO.FALLING)
+        self.assertEqual(self.kernel.lines[3]['flags'], GPIOChip.LINE_FLAG_INPUT |
+            GPIOChip.LINE_FLAG_BIAS_PULL_UP | GPIOChip.LINE_FLAG_EDGE_FALLING)
+        self.gpio.remove_event_detect(3)
+        self.assertEqual(self.kernel.lines[3]['flags'],
+            GPIOChip.LINE_FLAG_INPUT | GPIOChip.LINE_FLAG_BIAS_PULL_UP)
+
+    def test_callback(self):
+        received = []
+        done = threading.Event()
+        def callback(event):
+            received.append(event)
+            done.set()
+        self.gpio.add_event_detect(3, GPIO.BOTH, callback)
+        self.kernel.edge(3, True, 1500000000)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(received, [EdgeEvents.EdgeEvent(3, GPIO.RISING, 1.5)])
+
+    def test_wait_for_edge(self):
+        self.gpio.setup(3, GPIO.IN)
+        threading.Timer(0.05, self.kernel.edge, (3, False)).start()
+        event = self.gpio.wait_for_edge(3, GPIO.FALLING, timeout=5)
+        self.assertEqual((event.pin, event.edge), (3, GPIO.FALLING))
+        # Edge detection was only enabled for the wait.
+        self.assertEqual(self.kernel.lines[3]['flags'], GPIOChip.LINE_FLAG_INPUT)
+
+    def test_wait_for_edge_timeout(self):
+        self.gpio.setup(3, GPIO.IN)
+        self.assertIsNone(self.gpio.wait_for_edge(3, GPIO.RISING, timeout=0.05))
+
+    def test_events_after_adding_lines(self):
+        self.gpio.add_event_detect(3, GPIO.BOTH)
+        # Adding a line replaces the request and its event descriptor.
+        self.gpio.setup(4, GPIO.OUT)
+        self.gpio.add_event_detect(5, GPIO.BOTH)
+        self.kernel.edge(3, True)
+        self.kernel.edge(5, False)
+        self.assertIsNotNone(self.gpio._dispatcher.wait(3, timeout=5, after=0))
+        self.assertIsNotNone(self.gpio._dispatcher.wait(5, timeout=5, after=0))
+        self.assertEqual(len(self.kernel.requests), 1)
+
+    def test_event_detected(self):
+        self.gpio.add_event_detect(3, GPIO.RISING)
+        self.assertFalse(self.gpio.event_detected(3))
+        self.kernel.edge(3, True)
+        self.gpio._dispatcher.wait(3, timeout=5, after=0)
+        self.assertTrue(self.gpio.event_detected(3))
+
+    def test_cleanup_stops_events(self):
+        self.gpio.add_event_detect(3, GPIO.BOTH)
+        self.gpio.cleanup()
+        self.assertFalse(self.gpio._dispatcher.has_pin(3))
+        self.assertEqual(self.kernel.requests, {})
+
+
+@unittest.skipIf(numpy is None, 'needs NumPy')
+class TestGPIOChipCapture(unittest.TestCase):
+    def setUp(self):
+        self.kernel = FakeKernel()
+        patches = [patch('Adafruit_GPIO.GPIOChip.fcntl.ioctl', self.kernel.ioctl),
+                   patch('Adafruit_GPIO.GPIOChip.os.open', self.kernel.open),
+                   patch('Adafruit_GPIO.GPIOChip.os.close', self.kernel.close)]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.gpio = GPIOChip.GPIOChip(0)
+        self.addCleanup(self.gpio.close)
+
+    def test_request(self):
+        capture = self.gpio.capture(3, GPIO.RISING, capacity=128, pull_up_down=GPIO.PUD_UP)
+        self.assertEqual(capture.capacity, 128)
+        self.assertEqual(self.kernel.lines[3]['flags'], GPIOChip.LINE_FLAG_INPUT |
+            GPIOChip.LINE_FLAG_BIAS_PULL_UP | GPIOChip.LINE_FLAG_EDGE_RISING)
+        self.assertEqual(self.kernel.event_buffer_sizes[capture.fd], 1024)
+        # Captured lines get their own request.
+        self.gpio.setup(4, GPIO.OUT)
+        self.assertNotEqual(self.kernel.lines[4]['fd'], capture.fd)
+
+    def test_events(self):
+        capture = self.gpio.capture(3)
+        self.kernel.edge(3, True, 1000)
+        self.kernel.edge(3, False, 1500)
+        deadline = time.time() + 5
+        while capture.count < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        events = capture.read()
+        self.assertEqual(list(events['timestamp_ns']), [1000, 1500])
+        self.assertEqual(list(events['id']), [GPIOChip.LINE_EVENT_RISING_EDGE,
+                                              GPIOChip.LINE_EVENT_FALLING_EDGE])
+
+    def test_pin_in_use(self):
+        self.gpio.setup(3, GPIO.IN)
+        self.assertRaises(ValueError, self.gpio.capture, 3)
+        self.gpio.capture(4)
+        self.assertRaises(ValueError, self.gpio.capture, 4)
+
+    def test_cleanup(self):
+        capture = self.gpio.capture(3)
+        self.gpio.cleanup(3)
+        self.assertIsNone(capture.fd)
+        self.assertEqual(self.kernel.lines, {})
+        # The line can be captured again.
+        self.gpio.capture(3).close()
+        self.gpio.capture(3)
+
+
+class TestFindLine(unittest.TestCase):
+    def setUp(self):
+        self.sysfs = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sysfs)
+        self._chip('gpiochip0', 0, 32, 'gpiochip0')
+        self._chip('gpiochip338', 338, 64, 'gpiochip1')
+        p = patch('Adafruit_GPIO.GPIOChip.SYSFS_GPIO_PATH', self.sysfs)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _chip(self, name, base, ngpio, device):
+        path = os.path.join(self.sysfs, name)
+        os.makedirs(os.path.join(path, 'device', device))
+        for attr, value in (('base', base), ('ngpio', ngpio)):
+            with open(os.path.join(path, attr), 'w') as f:
+                f.write('{0}\n'.format(value))
+
+    def test_find_line(self):
+        self.assertEqual(GPIOChip.find_line(5), ('/dev/gpiochip0', 5))
+        self.assertEqual(GPIOChip.find_line(340), ('/dev/gpiochip1', 2))
+
+    def test_no_chip(self):
+        self.assertRaises(ValueError, GPIOChip.find_line, 100)
+
+
+GPIO_SIM = '/sys/kernel/config/gpio-sim'
+
+@unittest.skipUnless(os.path.isdir(GPIO_SIM) and os.access(GPIO_SIM, os.W_OK),
+                     'needs the gpio-sim kernel module and write access to configfs')
+class TestGPIOChipSim(unittest.TestCase):
+    """Runs against a simulated chip from the kernel's gpio-sim module."""
+
+    def setUp(self):
+        self.device = os.path.join(GPIO_SIM, 'adafruit-gpio-test-{0}'.format(os.getpid()))
+        bank = os.path.join(self.device, 'bank0')
+        os.mkdir(self.device)
+        os.mkdir(bank)
+        self._write(os.path.join(bank, 'num_lines'), '16')
+        self._write(os.path.join(self.device, 'live'), '1')
+        self.addCleanup(self._remove)
+        chip = self._read(os.path.join(bank, 'chip_name'))
+        dev_name = self._read(os.path.join(self.device, 'dev_name'))
+        self.sysfs = os.path.join('/sys/devices/platform', dev_name, chip)
+        self.gpio = GPIOChip.GPIOChip('/dev/' + chip)
+        self.addCleanup(self.gpio.close)
+
+    def _remove(self):
+        self._write(os.path.join(self.device, 'live'), '0')
+        os.rmdir(os.path.join(self.device, 'bank0'))
+        os.rmdir(self.device)
+
+    def _read(self, path):
+        with open(path) as f:
+            return f.read().strip()
+
+    def _write(self, path, value):
+        with open(path, 'w') as f:
+            f.write(value)
+
+    def _line(self, pin, name):
+        return os.path.join(self.sysfs, 'sim_gpio{0}'.format(pin), name)
+
+    def test_output_pins(self):
+        self.gpio.setup_pins(dict((pin, GPIO.OUT) for pin in range(8)))
+        self.gpio.output_pins({0: True, 3: True, 5: False, 7: True})
+        self.assertEqual([self._read(self._line(pin, 'value')) for pin in range(8)],
+            ['1', '0', '0', '1', '0', '0', '0', '1'])
+
+    def test_input_pins(self):
+        self.gpio.setup_pins({2: GPIO.IN, 4: GPIO.IN, 6: GPIO.IN})
+        self._write(self._line(2, 'pull'), 'pull-up')
+        self._write(self._line(4, 'pull'), 'pull-down')
+        self._write(self._line(6, 'pull'), 'pull-up')
+        self.assertEqual(self.gpio.input_pins([2, 4, 6]), [True, False, True])
+
+    def test_outputs_survive_new_lines(self):
+        self.gpio.setup(1, GPIO.OUT)
+        self.gpio.set_high(1)
+        self.gpio.setup(2, GPIO.OUT)
+        self.assertEqual(self._read(self._line(1, 'value')), '1')
+
+    def test_wait_for_edge(self):
+        self.gpio.setup(3, GPIO.IN)
+        self._write(self._line(3, 'pull'), 'pull-down')
+        threading.Timer(0.05, self._write, (self._line(3, 'pull'), 'pull-up')).start()
+        event = self.gpio.wait_for_edge(3, GPIO.RISING, timeout=5)
+        self.assertEqual((event.pin, event.edge), (3, GPIO.RISING))
@@ -18,6 +18,9 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+import os
+import shutil
+import tempfile
 import unittest
 
 from mock import Mock, patch
@@ -26,6 +29,12 @@ import Adafruit_GPIO.Platform as Platform
 
 
 class TestPlatformDetect(unittest.TestCase):
+    def setUp(self):
+        Platform.reset_platform()
+
+    def tearDown(self):
+        Platform.reset_platform()
+
     @patch('platform.platform', Mock(return_value='Linux-3.8.13-bone47-armv7l-with-debian-7.4'))
     def test_beaglebone_black(self):
         result = Platform.platform_detect()
@@ -37,6 +46,53 @@ class TestPlatformDetect(unittest.TestCase):
         self.assertEquals(result, Platform.UNKNOWN)
 
 
+    @patch('Adafruit_GPIO.Platform.probe_platform', Mock(return_value=Platform.UNKNOWN))
+    @patch('Adafruit_GPIO.Platform.configured_platform', Mock(return_value=None))
+    def test_detected_once(self):
+        Platform.platform_detect()
+        Platform.platform_detect()
+        self.assertEqual(Platform.probe_platform.call_count, 1)
+
+    @patch.dict('os.environ', {'ADAFRUIT_GPIO_PLATFORM': 'minnowboard'})
+    @patch('Adafruit_GPIO.Platform.probe_platform')
+    def test_environment_override(self, probe):
+        self.assertEquals(Platform.platform_detect(), Platform.MINNOWBOARD)
+        self.assertFalse(probe.called)
+
+    @patch.dict('os.environ', {'ADAFRUIT_GPIO_PLATFORM': '1'})
+    def test_environment_override_number(self):
+        self.assertEquals(Platform.platform_detect(), Platform.RASPBERRY_PI)
+
+    @patch.dict('os.environ', {'ADAFRUIT_GPIO_PLATFORM': 'toaster'})
+    def test_invalid_override(self):
+        self.assertRaises(ValueError, Platform.platform_detect)
+
+
+class TestConfiguredPlatform(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'platform')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    @patch.dict('os.environ', clear=True)
+    def test_file(self):
+        with open(self.path, 'w') as f:
+            f.write('beaglebone_black\n')
+        self.assertEquals(Platform.configured_platform(self.path), Platform.BEAGLEBONE_BLACK)
+
+    @patch.dict('os.environ', clear=True)
+    def test_missing_file(self):
+        self.assertIsNone(Platform.configured_platform(self.path))
+
+    @patch.dict('os.environ', {'ADAFRUIT_GPIO_PLATFORM': 'raspberry_pi'})
+    def test_environment_before_file(self):
+        with open(self.path, 'w') as f:
+            f.write('beaglebone_black\n')
+        self.assertEquals(Platform.configured_platform(self.path), Platform.RASPBERRY_PI)
+
+
 class TestPiRevision(unittest.TestCase):
     def test_revision_1(self):
         with patch('__builtin__.open') as mock_open:
@@ -19,8 +19,13 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import os
+import shutil
+import tempfile
 import unittest
 
+from mock import Mock, patch
+
 import Adafruit_GPIO as GPIO
 import Adafruit_GPIO.SPI as SPI
 
@@ -190,3 +195,97 @@ class TestBitBangSPI(unittest.TestCase):
     #TODO: Test mode 1, 2, 3
 
     #TODO: Test null MOSI, MISO, SS
+
+    def test_max_transfer_unlimited(self):
+        gpio = MockGPIO()
+        device = SPI.BitBang(gpio, 1, 2, 3, 4)
+        self.assertIsNone(device.max_transfer)
+
+
+class TestSpidevMaxTransfer(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'bufsiz')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_reads_bufsiz(self):
+        with open(self.path, 'w') as f:
+            f.write('65536\n')
+        self.assertEqual(SPI.spidev_max_transfer(self.path), 65536)
+
+    def test_missing_bufsiz_uses_default(self):
+        self.assertEqual(SPI.spidev_max_transfer(self.path), 4096)
+
+    def test_invalid_bufsiz_uses_default(self):
+        with open(self.path, 'w') as f:
+            f.write('junk\n')
+        self.assertEqual(SPI.spidev_max_transfer(self.path), 4096)
+
+
+class TestSpiDevLinux(unittest.TestCase):
+    @patch.dict('sys.modules', {'spidev': Mock()})
+    def test_write_list(self):
+        device = SPI.SpiDevLinux(0, 0)
+        device.write([0x01, 0x02])
+        device._device.writebytes.assert_called_with([0x01, 0x02])
+
+    @patch.dict('sys.modules', {'spidev': Mock()})
+    def test_write_buffer_not_copied(self):
+        device = SPI.SpiDevLinux(0, 0)
+        data = memoryview(bytearray([0x01, 0x02, 0x03]))[1:]
+        device.write(data)
+        device._device.writebytes2.assert_called_once()
+        self.assertIs(device._device.writebytes2.call_args[0][0], data)
+
+    @patch.dict('sys.modules', {'spidev': Mock()})
+    def test_write_buffer_without_writebytes2(self):
+        device = SPI.SpiDevLinux(0, 0)
+        device._device = Mock(spec=['writebytes'])
+        device.write(bytearray([0x01, 0x02]))
+        device._device.writebytes.assert_called_with([0x01, 0x02])
+
+    @patch.dict('sys.modules', {'spidev': Mock()})
+    @patch('Adafruit_GPIO.SPI.spidev_max_transfer', Mock(return_value=65536))
+    def test_max_transfer_from_bufsiz(self):
+        device = SPI.SpiDevLinux(0, 0)
+        self.assertEqual(device.max_transfer, 65536)
+
+    @patch.dict('sys.modules', {'spidev': Mock()})
+    @patch('Adafruit_GPIO.SPI.spidev_max_transfer', Mock(return_value=65536))
+    def test_max_transfer_capped_without_writebytes2(self):
+        import spidev
+        spidev.SpiDev.return_value = Mock(spec=['open', 'writebytes'])
+        device = SPI.SpiDevLinux(0, 0)
+        self.assertEqual(device.max_transfer, 4096)
+
+
+class TestSpiDevMraa(unittest.TestCase):
+    @patch.dict('sys.modules', {'mraa': Mock()})
+    def test_write_bytearray_not_copied(self):
+        device = SPI.SpiDevMraa(0, 0)
+        data = bytearray([0x01, 0x02])
+        device.write(data)
+        self.assertIs(device._device.write.call_args[0][0], data)
+
+    @patch.dict('sys.modules', {'mraa': Mock()})
+    @patch('Adafruit_GPIO.SPI.spidev_max_transfer', Mock(return_value=4))
+    def test_write_full_chunks_reuse_buffer(self):
+        device = SPI.SpiDevMraa(0, 0)
+        data = memoryview(bytearray([1, 2, 3, 4, 5, 6, 7, 8]))
+        device.write(data[:4])
+        first = device._device.write.call_args[0][0]
+        device.write(data[4:])
+        self.assertIs(device._device.write.call_args[0][0], first)
+        self.assertEqual(first, bytearray([5, 6, 7, 8]))
+        # Shorter chunks get their own copy.
+        device.write(data[:2])
+        self.assertEqual(device._device.write.call_args[0][0], bytearray([1, 2]))
+        self.assertEqual(first, bytearray([5, 6, 7, 8]))
+
+    @patch.dict('sys.modules', {'mraa': Mock()})
+    def test_write_list(self):
+        device = SPI.SpiDevMraa(0, 0)
+        device.write([0x01, 0x02])
+        device._device.write.assert_called_with(bytearray([0x01, 0x02]))
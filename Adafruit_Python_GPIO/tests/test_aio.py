@@ -0,0 +1,288 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import threading
+import time
+import unittest
+
+import Adafruit_GPIO as GPIO
+import Adafruit_GPIO.EdgeEvents as EdgeEvents
+try:
+    import asyncio
+    import Adafruit_GPIO.aio as aio
+except ImportError:
+    asyncio = None
+
+
+def loop_kwargs(loop):
+    # wait_for() and gather() stopped taking a loop argument in Python 3.10,
+    # and find the running loop themselves since 3.7.
+    return {} if hasattr(asyncio, 'run') else {'loop': loop}
+
+
+class FakeEdgeGPIO(GPIO.BaseGPIO):
+    """GPIO with edge detection whose edges are injected with edge(), from
+    a foreign thread like a real dispatcher's.
+    """
+
+    def __init__(self):
+        self.levels = {}
+        self.callbacks = {}
+        self.removed = []
+
+    def setup(self, pin, mode, pull_up_down=GPIO.PUD_OFF):
+        self.levels.setdefault(pin, pull_up_down == GPIO.PUD_UP)
+
+    def input(self, pin):
+        return self.levels[pin]
+
+    def add_event_detect(self, pin, edge, callback=None):
+        if pin in self.callbacks:
+            raise RuntimeError('Edge detection is already enabled.')
+        self.callbacks[pin] = []
+
+    def add_event_callback(self, pin, callback):
+        self.callbacks[pin].append(callback)
+
+    def remove_event_detect(self, pin):
+        del self.callbacks[pin]
+        self.removed.append(pin)
+
+    def edge(self, pin, level, timestamp=None, delay=0.01):
+        """Change the level of pin from another thread after delay seconds."""
+        def change():
+            self.levels[pin] = level
+            event = EdgeEvents.EdgeEvent(pin, GPIO.RISING if level else GPIO.FALLING,
+                EdgeEvents.clock() if timestamp is None else timestamp)
+            for callback in list(self.callbacks.get(pin, ())):
+                callback(event)
+        timer = threading.Timer(delay, change)
+        timer.start()
+        return timer
+
+
+@unittest.skipIf(asyncio is None, 'needs Python 3.5 or later')
+class TestAsyncGPIO(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.gpio = FakeEdgeGPIO()
+        self.agpio = aio.AsyncGPIO(self.gpio, loop=self.loop)
+
+    def run_loop(self, awaitable, timeout=5):
+        return self.loop.run_until_complete(asyncio.wait_for(awaitable, timeout, **loop_kwargs(self.loop)))
+
+    def test_wait_for_edge(self):
+        self.gpio.edge(3, True)
+        event = self.run_loop(self.agpio.wait_for_edge(3))
+        self.assertEqual((event.pin, event.edge), (3, GPIO.RISING))
+        # Edge detection is only enabled while waiting.
+        self.assertEqual(self.gpio.callbacks, {})
+        self.assertEqual(self.gpio.removed, [3])
+
+    def test_wait_for_edge_filter(self):
+        self.gpio.edge(3, True)
+        self.gpio.edge(3, False, delay=0.05)
+        event = self.run_loop(self.agpio.wait_for_edge(3, GPIO.FALLING))
+        self.assertEqual(event.edge, GPIO.FALLING)
+
+    def test_wait_for_edge_timeout(self):
+        start = time.time()
+        self.assertIsNone(self.run_loop(self.agpio.wait_for_edge(3, timeout=0.05)))
+        self.assertGreaterEqual(time.time() - start, 0.04)
+        self.assertEqual(self.gpio.callbacks, {})
+
+    def test_wait_for_edge_cancelled(self):
+        future = self.agpio.wait_for_edge(3)
+        future.cancel()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertEqual(self.gpio.callbacks, {})
+
+    def test_shared_pin_detection(self):
+        first = self.agpio.wait_for_edge(3, GPIO.RISING)
+        second = self.agpio.wait_for_edge(3, GPIO.FALLING)
+        self.gpio.edge(3, True).join()
+        self.run_loop(first)
+        self.assertIn(3, self.gpio.callbacks)
+        self.gpio.edge(3, False)
+        self.run_loop(second)
+        self.assertEqual(self.gpio.removed, [3])
+
+    def test_edge_stream(self):
+        stream = self.agpio.edges(3)
+        for i in range(4):
+            self.gpio.edge(3, i % 2 == 0, delay=0.01*(i+1))
+        events = [self.run_loop(stream.__anext__()) for i in range(4)]
+        self.assertEqual([e.edge for e in events], [GPIO.RISING, GPIO.FALLING]*2)
+        stream.close()
+        self.assertRaises(StopAsyncIteration, self.run_loop, stream.__anext__())
+        self.assertEqual(self.gpio.removed, [3])
+
+    def test_edge_stream_close_wakes_reader(self):
+        stream = self.agpio.edges(3)
+        self.loop.call_later(0.01, stream.close)
+        self.assertRaises(StopAsyncIteration, self.run_loop, stream.__anext__())
+
+    def test_edge_stream_drops_oldest(self):
+        stream = self.agpio.edges(3, maxsize=2)
+        for i in range(5):
+            stream._put(EdgeEvents.EdgeEvent(3, GPIO.RISING, i))
+        self.assertEqual(stream.dropped, 3)
+        self.assertEqual(self.run_loop(stream.__anext__()).timestamp, 3)
+
+    def test_async_syntax(self):
+        # Written with async syntax only here, so the file parses on Python 2.
+        namespace = {}
+        exec('''
+async def collect(agpio, gpio):
+    values = []
+    async with agpio.edges(3) as edges:
+        gpio.edge(3, True)
+        gpio.edge(3, False, delay=0.02)
+        async for event in edges:
+            values.append(event.edge)
+            if len(values) == 2:
+                break
+    event = await agpio.wait_for_edge(4, timeout=0.01)
+    return values, event
+''', namespace)
+        values, event = self.run_loop(namespace['collect'](self.agpio, self.gpio))
+        self.assertEqual(values, [GPIO.RISING, GPIO.FALLING])
+        self.assertIsNone(event)
+        self.assertEqual(self.gpio.callbacks, {})
+
+    def test_foreign_callback_argument(self):
+        # Libraries like RPi.GPIO call back with the pin only.
+        self.gpio.levels[3] = False
+        future = self.agpio.wait_for_edge(3)
+        self.gpio.levels[3] = True
+        threading.Timer(0.01, self.gpio.callbacks[3][0], (3,)).start()
+        self.assertEqual(self.run_loop(future).edge, GPIO.RISING)
+
+
+@unittest.skipIf(asyncio is None, 'needs Python 3.5 or later')
+class TestButton(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.gpio = FakeEdgeGPIO()
+        self.agpio = aio.AsyncGPIO(self.gpio, loop=self.loop)
+
+    def run_loop(self, future):
+        return self.loop.run_until_complete(future)
+
+    def test_pressed_and_released(self):
+        button = aio.Button(self.agpio, 5, pull_up_down=GPIO.PUD_UP)
+        self.assertFalse(button.is_pressed)
+        self.gpio.edge(5, False, timestamp=1.0)
+        self.assertEqual(self.run_loop(button.pressed()).timestamp, 1.0)
+        self.assertTrue(button.is_pressed)
+        self.gpio.edge(5, True, timestamp=2.0)
+        self.run_loop(button.released())
+        self.assertFalse(button.is_pressed)
+
+    def test_debounce(self):
+        button = aio.Button(self.agpio, 5, pull_up_down=GPIO.PUD_UP, bouncetime=0.02)
+        pressed = button.pressed()
+        released = button.released()
+        # A press bouncing for 5 ms, then a release 100 ms later.
+        for i, (level, timestamp) in enumerate([(False, 1.0), (True, 1.002), (False, 1.005),
+                                                (True, 1.1)]):
+            self.gpio.edge(5, level, timestamp, delay=0.01*(i+1))
+        self.assertEqual(self.run_loop(pressed).timestamp, 1.0)
+        self.assertEqual(self.run_loop(released).timestamp, 1.1)
+
+    def test_active_high(self):
+        button = aio.Button(self.agpio, 5, active_low=False)
+        self.gpio.edge(5, True)
+        self.assertEqual(self.run_loop(button.pressed()).edge, GPIO.RISING)
+
+    def test_close(self):
+        button = aio.Button(self.agpio, 5)
+        pressed = button.pressed()
+        button.close()
+        self.assertTrue(pressed.cancelled())
+        self.assertEqual(self.gpio.callbacks, {})
+
+
+class SlowBus(object):
+    """Device recording which thread ran each transaction."""
+    max_transfer = 4096
+
+    def __init__(self):
+        self.threads = []
+
+    def transfer(self, data, delay=0.01):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(delay)
+        return list(reversed(data))
+
+
+@unittest.skipIf(asyncio is None, 'needs Python 3.5 or later')
+class TestAsyncDevice(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_call(self):
+        device = aio.AsyncDevice(SlowBus(), loop=self.loop)
+        self.assertEqual(self.loop.run_until_complete(device.transfer([1, 2, 3])), [3, 2, 1])
+        self.assertEqual(device.max_transfer, 4096)
+        self.assertNotEqual(device.device.threads, [threading.current_thread().name])
+
+    def test_bus_executor(self):
+        self.assertIs(aio.bus_executor(('spi', 0)), aio.bus_executor(('spi', 0)))
+        self.assertIsNot(aio.bus_executor(('spi', 0)), aio.bus_executor(('i2c', 1)))
+
+    def test_close(self):
+        closed = []
+        class ClosingBus(SlowBus):
+            def close(self):
+                closed.append(threading.current_thread().name)
+        first = aio.AsyncDevice(ClosingBus(), bus=('spi', 9), loop=self.loop)
+        second = aio.AsyncDevice(SlowBus(), bus=('spi', 9), loop=self.loop)
+        executor = first.executor
+        pending = first.transfer([1], 0.05)
+        self.loop.run_until_complete(first.close())
+        self.assertEqual(self.loop.run_until_complete(pending), [1])
+        self.assertEqual(closed, first.device.threads)
+        # The executor stays up while another device uses the bus.
+        self.assertEqual(self.loop.run_until_complete(second.transfer([2])), [2])
+        self.loop.run_until_complete(second.close())
+        self.assertRaises(RuntimeError, executor.submit, time.sleep, 0)
+        self.assertIsNot(aio.bus_executor(('spi', 9)), executor)
+
+    def test_shutdown_executors(self):
+        device = aio.AsyncDevice(SlowBus(), loop=self.loop)
+        aio.shutdown_executors()
+        self.assertRaises(RuntimeError, device.executor.submit, time.sleep, 0)
+
+    def test_shared_bus_serialised(self):
+        first = aio.AsyncDevice(SlowBus(), bus=('spi', 7), loop=self.loop)
+        second = aio.AsyncDevice(SlowBus(), bus=('spi', 7), loop=self.loop)
+        other = aio.AsyncDevice(SlowBus(), bus=('spi', 8), loop=self.loop)
+        futures = [first.transfer([1], 0.05), second.transfer([2], 0.05), other.transfer([3], 0.05)]
+        start = time.time()
+        self.loop.run_until_complete(asyncio.gather(*futures, **loop_kwargs(self.loop)))
+        # The two spi 7 transactions ran one after the other on one thread,
+        # alongside the spi 8 one.
+        self.assertEqual(first.device.threads, second.device.threads)
+        self.assertNotEqual(first.device.threads, other.device.threads)
+        self.assertGreaterEqual(time.time() - start, 0.1)
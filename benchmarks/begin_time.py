@@ -0,0 +1,99 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Measure ILI9341/HX8357 begin() with per-byte init calls versus the batched
+command tables, using stand-in SPI and GPIO objects with a modelled cost per
+call.  Sleeps required by the panels are reported separately.  Run with:
+
+    python benchmarks/begin_time.py [gpio cost in us] [spi cost in us]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from fakes import FakeGPIO, FakeSpi
+import pyDrivers.ILI9341 as ILI9341
+import pyDrivers.HX8357 as HX8357
+
+
+def legacy(cls, table):
+    """Subclass reproducing the old one call per byte behaviour."""
+    class Legacy(cls):
+        def send(self, data, is_data=True, chunk_size=4096):
+            # Old send() wrote D/C on every call.
+            self._dc_level = None
+            cls.send(self, data, is_data, chunk_size)
+
+        def _init(self):
+            for opcode, params, delay in table:
+                self.command(opcode)
+                for param in params or []:
+                    self.data(param)
+                if delay:
+                    time.sleep(delay)
+
+        def set_window(self, x0=0, y0=0, x1=None, y1=None):
+            if x1 is None:
+                x1 = self.width-1
+            if y1 is None:
+                y1 = self.height-1
+            self.command(0x2A)
+            for value in (x0 >> 8, x0, x1 >> 8, x1):
+                self.data(value)
+            self.command(0x2B)
+            for value in (y0 >> 8, y0, y1 >> 8, y1):
+                self.data(value)
+            self.command(0x2C)
+    return Legacy
+
+
+def measure(name, cls, gpio_cost, spi_cost):
+    gpio = FakeGPIO(cost=gpio_cost)
+    spi = FakeSpi(cost=spi_cost)
+    disp = cls(0, spi, gpio=gpio)
+    slept = [0]
+    real_sleep = time.sleep
+    def sleep(seconds):
+        slept[0] += seconds
+    time.sleep = sleep
+    try:
+        gpio.writes = 0
+        start = time.time()
+        disp.begin()
+        elapsed = time.time() - start
+    finally:
+        time.sleep = real_sleep
+    print('{0:<18} {1:>7.2f} ms + {2:>4.0f} ms sleeps  {3:>4} SPI writes  {4:>4} GPIO writes'.format(
+        name, elapsed*1000.0, slept[0]*1000.0, spi.transactions, gpio.writes))
+
+
+def main():
+    gpio_cost = float(sys.argv[1])/1e6 if len(sys.argv) > 1 else 50e-6
+    spi_cost = float(sys.argv[2])/1e6 if len(sys.argv) > 2 else 20e-6
+    print('Modelled cost: {0:.0f} us per GPIO write, {1:.0f} us per SPI write'.format(
+        gpio_cost*1e6, spi_cost*1e6))
+    for name, cls, table in (('ILI9341', ILI9341.ILI9341, ILI9341.ILI9341_INIT),
+                             ('HX8357', HX8357.HX8357, HX8357.HX8357_INIT)):
+        measure(name + ' before', legacy(cls, table), gpio_cost, spi_cost)
+        measure(name + ' after', cls, gpio_cost, spi_cost)
+
+
+if __name__ == '__main__':
+    main()
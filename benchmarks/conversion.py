@@ -0,0 +1,65 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Time the 565 RGB conversion methods in pyDrivers/rgb565.py on ILI9341
+(240x320) and HX8357 (320x480) sized frames, converting into a reused
+output buffer, against the original dstack based conversion.  Run with:
+
+    python benchmarks/conversion.py
+"""
+from __future__ import print_function
+
+import timeit
+
+import numpy as np
+from PIL import Image
+
+import fakes
+import pyDrivers.rgb565 as rgb565
+
+
+REPEAT = 50
+
+
+def legacy(image):
+    """The original conversion, allocating several full frame temporaries."""
+    pb = np.array(image.convert('RGB')).astype('uint16')
+    color = ((pb[:,:,0] & 0xF8) << 8) | ((pb[:,:,1] & 0xFC) << 3) | (pb[:,:,2] >> 3)
+    return np.dstack(((color >> 8) & 0xFF, color & 0xFF)).flatten().tolist()
+
+
+def measure(name, func):
+    best = min(timeit.repeat(func, number=REPEAT, repeat=3)) / REPEAT
+    print('  {0:<16} {1:>7.2f} ms/frame'.format(name, best*1000.0))
+
+
+def main():
+    for width, height in ((240, 320), (320, 480)):
+        print('{0}x{1}'.format(width, height))
+        rgb = np.random.randint(0, 256, (height, width, 3)).astype(np.uint8)
+        image = Image.fromarray(rgb, 'RGB')
+        out = np.empty(width*height*2, dtype=np.uint8)
+        measure('legacy', lambda: legacy(image))
+        for method in sorted(rgb565.METHODS):
+            measure(method, lambda: rgb565.image_to_data(image, out, method))
+            measure(method + ' (array)', lambda: rgb565.image_to_data(rgb, out, method))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Compare the rate at which edge events can be taken from a line request by
+the EdgeDispatcher: per event, as EdgeEvents passed to a callback, against
+an EdgeCapture reading batches of events into its ring buffer.  A pipe
+filled with events stands in for the kernel's line request.  Run with:
+
+    python benchmarks/edge_capture.py [rounds]
+"""
+from __future__ import print_function
+
+import fcntl
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+import fakes  # Puts the repository packages on the path.
+import Adafruit_GPIO as GPIO
+import Adafruit_GPIO.EdgeCapture as EdgeCapture
+import Adafruit_GPIO.EdgeEvents as EdgeEvents
+import Adafruit_GPIO.GPIOChip as GPIOChip
+
+
+F_SETPIPE_SZ = 1031
+PIPE_SIZE = 1 << 20
+# Events in a full pipe.  The pipe is filled before it is watched so reads
+# never see half written events, which the kernel never returns either.
+EVENTS = 16384
+
+
+def event_data():
+    # Alternating edges of a 10 kHz square wave on line 3.
+    data = []
+    for i in range(EVENTS):
+        event_id = GPIOChip.LINE_EVENT_RISING_EDGE if i % 2 == 0 else GPIOChip.LINE_EVENT_FALLING_EDGE
+        data.append(GPIOChip._LINE_EVENT.pack(i*50000, event_id, 3, i+1, i+1))
+    return b''.join(data)
+
+
+def run(data, rounds, start, done):
+    # Time a dispatcher set up by start() taking the events of rounds full
+    # pipes, until done() sees them all.
+    elapsed = 0.0
+    for i in range(rounds):
+        dispatcher = EdgeEvents.EdgeDispatcher()
+        read_fd, write_fd = os.pipe()
+        fcntl.fcntl(write_fd, F_SETPIPE_SZ, PIPE_SIZE)
+        os.write(write_fd, data)
+        began = EdgeEvents.clock()
+        done(start(dispatcher, read_fd))
+        elapsed += EdgeEvents.clock() - began
+        dispatcher.close()
+        os.close(read_fd)
+        os.close(write_fd)
+    return elapsed
+
+
+def callbacks(dispatcher, read_fd):
+    finished = threading.Event()
+    received = [0]
+    def callback(event):
+        received[0] += 1
+        if received[0] == EVENTS:
+            finished.set()
+    dispatcher.add_pin(3, GPIO.BOTH, callback)
+    dispatcher.watch(read_fd, GPIOChip.LineRequest(read_fd, [3]).read_events)
+    return finished
+
+
+def callbacks_done(finished):
+    finished.wait()
+
+
+def capture(dispatcher, read_fd):
+    # The capture closes its descriptor, so give it a copy.
+    return EdgeCapture.EdgeCapture(os.dup(read_fd), 3, dispatcher)
+
+
+def capture_done(capture):
+    while capture.count < EVENTS:
+        time.sleep(0.0001)
+    capture.read()
+    capture.close()
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    data = event_data()
+    for name, start, done in (('per event callback', callbacks, callbacks_done),
+                              ('ring buffer capture', capture, capture_done)):
+        elapsed = run(data, rounds, start, done)
+        print('{0:<20} {1:>10.0f} events/s'.format(name, rounds*EVENTS/elapsed))
+    start = EdgeEvents.clock()
+    stats = EdgeCapture.pulse_stats(np.frombuffer(data, EdgeCapture.LINE_EVENT_DTYPE))
+    print('pulse_stats of {0} events in {1:.2f} ms: {2:.0f} Hz, {3:.0%} duty'.format(
+        EVENTS, (EdgeEvents.clock() - start)*1e3, stats.frequency, stats.duty))
+
+
+if __name__ == '__main__':
+    main()
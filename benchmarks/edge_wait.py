@@ -0,0 +1,107 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Compare waiting for GPIO edges with the old busy loop in
+AdafruitMinnowAdapter.wait_for_edge against the epoll based EdgeDispatcher:
+CPU time used while no edge arrives, and the delay from an edge to the
+waiting thread for different numbers of watched pins.  Edges come from a
+pipe standing in for the kernel.  Run with:
+
+    python benchmarks/edge_wait.py [idle seconds]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import threading
+
+import fakes  # Puts the repository packages on the path.
+import Adafruit_GPIO as GPIO
+import Adafruit_GPIO.EdgeEvents as EdgeEvents
+
+
+def cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def busy_wait_idle(seconds):
+    # The old wait_for_edge: spin on a flag set by the edge callback.
+    class Status:
+        status = "run"
+    status = Status()
+    threading.Timer(seconds, setattr, (status, 'status', 'die')).start()
+    while True:
+        if (status.status == "die"):
+            break
+        continue
+
+
+def pipe_dispatcher():
+    # A dispatcher watching a pipe where each byte written is an edge on the
+    # pin with that number.
+    dispatcher = EdgeEvents.EdgeDispatcher()
+    read_fd, write_fd = os.pipe()
+    dispatcher.watch(read_fd, lambda: [EdgeEvents.EdgeEvent(ord(os.read(read_fd, 1)), GPIO.RISING, EdgeEvents.clock())])
+    return dispatcher, read_fd, write_fd
+
+
+def dispatcher_idle(seconds):
+    dispatcher, read_fd, write_fd = pipe_dispatcher()
+    dispatcher.add_pin(1, GPIO.BOTH)
+    threading.Timer(seconds, os.write, (write_fd, b'\x01')).start()
+    dispatcher.wait(1)
+    dispatcher.close()
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+def latency(pins, edges=200):
+    dispatcher, read_fd, write_fd = pipe_dispatcher()
+    for pin in range(pins):
+        dispatcher.add_pin(pin, GPIO.BOTH)
+    delays = []
+    for i in range(edges):
+        pin = i % pins
+        sent = EdgeEvents.clock()
+        os.write(write_fd, bytes(bytearray([pin])))
+        dispatcher.wait(pin, after=i // pins)
+        delays.append(EdgeEvents.clock() - sent)
+    dispatcher.close()
+    os.close(read_fd)
+    os.close(write_fd)
+    delays.sort()
+    return delays[len(delays)//2], delays[int(len(delays)*0.99)]
+
+
+def main():
+    idle = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    for name, wait in (('busy loop', busy_wait_idle), ('epoll dispatcher', dispatcher_idle)):
+        start = cpu_time()
+        wait(idle)
+        print('{0:<17} {1:>6.1f}% CPU while waiting {2:.1f} s for an edge'.format(
+            name, (cpu_time() - start)/idle*100.0, idle))
+    for pins in (1, 8, 64, 250):
+        median, p99 = latency(pins)
+        print('{0:>3} pins watched   {1:>7.1f} us median  {2:>7.1f} us p99 edge to waiter'.format(
+            pins, median*1e6, p99*1e6))
+
+
+if __name__ == '__main__':
+    main()
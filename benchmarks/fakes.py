@@ -0,0 +1,150 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Stand-in SPI and GPIO objects so the benchmarks run without hardware."""
+import os
+import sys
+import time
+
+# Make the repository packages importable when run from a checkout.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[0:0] = [ROOT, os.path.join(ROOT, 'Adafruit_Python_GPIO')]
+
+import Adafruit_GPIO as GPIO
+
+
+def busy_wait(seconds):
+    """Spin for the given time to model the cost of a hardware call."""
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+class FakeGPIO(GPIO.BaseGPIO):
+    """GPIO that only counts how many times pins are written.  Each write can
+    be given a cost in seconds to model a slow GPIO library.
+    """
+
+    def __init__(self, cost=0):
+        self.cost = cost
+        self.writes = 0
+
+    def setup(self, pin, mode, pull_up_down=GPIO.PUD_OFF):
+        pass
+
+    def output(self, pin, value):
+        self.writes += 1
+        if self.cost:
+            busy_wait(self.cost)
+
+    def input(self, pin):
+        return GPIO.LOW
+
+
+class FakeSpi(object):
+    """SPI device recording transactions.  With copy=True every write is
+    turned into a bytearray first, like the mraa binding requires.  Each
+    transaction can be given a cost in seconds to model ioctl overhead.
+    """
+
+    def __init__(self, copy=False, cost=0):
+        self.copy = copy
+        self.cost = cost
+        self.transactions = 0
+        self.bytes = 0
+        self.copied_bytes = 0
+
+    def set_mode(self, mode):
+        pass
+
+    def set_bit_order(self, order):
+        pass
+
+    def set_clock_hz(self, hz):
+        pass
+
+    def write(self, data):
+        self.transactions += 1
+        self.bytes += len(data)
+        if isinstance(data, list) or (self.copy and not isinstance(data, bytearray)):
+            # A list has to be packed into a C buffer by the binding, and
+            # mraa needs a bytearray, so either way the chunk is copied.
+            bytearray(data)
+            self.copied_bytes += len(data)
+        if self.cost:
+            busy_wait(self.cost)
+
+    def reset(self):
+        self.transactions = 0
+        self.bytes = 0
+        self.copied_bytes = 0
+
+
+class FakeMraa(object):
+    """Stand-in for the mraa module's GPIO API.  Opening a pin costs open_cost
+    seconds, modelling the sysfs export, and each read or write costs
+    sysfs_cost, or mmap_cost once useMmap(True) was called on the pin.
+    """
+    DIR_OUT = 0
+    DIR_IN = 1
+    EDGE_NONE = 0
+    EDGE_BOTH = 1
+    EDGE_RISING = 2
+    EDGE_FALLING = 3
+    MODE_STRONG = 0
+    MODE_PULLUP = 1
+    MODE_PULLDOWN = 2
+    MODE_HIZ = 3
+    SUCCESS = 0
+
+    def __init__(self, open_cost=0, sysfs_cost=0, mmap_cost=0):
+        self.open_cost = open_cost
+        self.sysfs_cost = sysfs_cost
+        self.mmap_cost = mmap_cost
+        self.opened = 0
+        mraa = self
+
+        class Gpio(object):
+            def __init__(self, pin):
+                mraa.opened += 1
+                self.pin = pin
+                self.value = 0
+                self.cost = mraa.sysfs_cost
+                if mraa.open_cost:
+                    busy_wait(mraa.open_cost)
+
+            def useMmap(self, enable):
+                self.cost = mraa.mmap_cost if enable else mraa.sysfs_cost
+                return mraa.SUCCESS
+
+            def dir(self, direction):
+                return mraa.SUCCESS
+
+            def write(self, value):
+                self.value = value
+                if self.cost:
+                    busy_wait(self.cost)
+                return mraa.SUCCESS
+
+            def read(self):
+                if self.cost:
+                    busy_wait(self.cost)
+                return self.value
+
+        self.Gpio = Gpio
@@ -0,0 +1,84 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Compare the old list based ILI9341 frame path with the buffer path.
+
+Reports how many full-frame Python-level copies each path makes between the
+converted image and the SPI driver, and how long a frame takes.  Run with:
+
+    python benchmarks/frame_copies.py
+"""
+from __future__ import print_function
+
+import time
+
+import numpy as np
+from PIL import Image
+
+from fakes import FakeGPIO, FakeSpi
+import pyDrivers.ILI9341 as TFT
+
+
+FRAMES = 20
+CHUNK = 4096
+
+
+def legacy_display(spi, image):
+    """The frame path before buffers: returns the number of frame copies."""
+    pb = np.array(image.convert('RGB')).astype('uint16')
+    color = ((pb[:,:,0] & 0xF8) << 8) | ((pb[:,:,1] & 0xFC) << 3) | (pb[:,:,2] >> 3)
+    data = np.dstack(((color >> 8) & 0xFF, color & 0xFF)).flatten().tolist()
+    copies = 1                  # tolist()
+    data = list(data)
+    copies += 1                 # list() in display()
+    for start in range(0, len(data), CHUNK):
+        spi.write(data[start:start+CHUNK])
+    copies += 1                 # list slices in send()
+    return copies
+
+
+def run(name, spi, show):
+    spi.reset()
+    start = time.time()
+    copies = 0
+    for i in range(FRAMES):
+        copies = show()
+    elapsed = (time.time() - start) / FRAMES
+    frame_bytes = TFT.ILI9341_TFTWIDTH*TFT.ILI9341_TFTHEIGHT*2
+    # Chunks copied inside the SPI layer count as one more full frame.
+    copies += spi.copied_bytes // FRAMES // frame_bytes
+    print('{0:<24} {1:>2} frame copies  {2:>8.2f} ms/frame  {3:>4} writes/frame'.format(
+        name, copies, elapsed*1000.0, spi.transactions // FRAMES))
+
+
+def main():
+    image = Image.new('RGB', (TFT.ILI9341_TFTWIDTH, TFT.ILI9341_TFTHEIGHT))
+    image.putdata([(x*7 & 0xFF, x*3 & 0xFF, x & 0xFF) for x in range(image.size[0]*image.size[1])])
+    for label, copy in (('spidev', False), ('mraa', True)):
+        spi = FakeSpi(copy=copy)
+        run('legacy ({0})'.format(label), spi, lambda: legacy_display(spi, image))
+        disp = TFT.ILI9341(0, spi, gpio=FakeGPIO(), partial_update=False)
+        def show():
+            disp.display(image)
+            return 0
+        run('buffer ({0})'.format(label), spi, show)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Measure pin toggles per second through AdafruitMinnowAdapter when every
+call opens a new mraa.Gpio context, as the adapter used to, against cached
+contexts using sysfs or memory mapped access.  Uses a stand-in mraa module
+with modelled costs per open and per access.  Run with:
+
+    python benchmarks/gpio_toggles.py [open cost in us] [sysfs cost in us] [mmap cost in us]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from fakes import FakeMraa
+import Adafruit_GPIO as GPIO
+
+
+DURATION = 1.0
+PIN = 25
+
+
+class PerCallAdapter(GPIO.AdafruitMinnowAdapter):
+    """The adapter's old behaviour: a new context for every call."""
+
+    def _pin(self, pin):
+        return self.mraa_gpio.Gpio(pin)
+
+
+def measure(name, adapter, mraa):
+    adapter.setup(PIN, GPIO.OUT)
+    mraa.opened = 0
+    toggles = 0
+    start = time.time()
+    end = start + DURATION
+    while time.time() < end:
+        for i in range(100):
+            adapter.output(PIN, i & 1)
+        toggles += 100
+    elapsed = time.time() - start
+    print('{0:<16} {1:>9.0f} toggles/s  {2:>6} pins opened'.format(
+        name, toggles/elapsed, mraa.opened))
+
+
+def main():
+    costs = [float(arg)/1e6 for arg in sys.argv[1:4]]
+    open_cost, sysfs_cost, mmap_cost = costs + [200e-6, 10e-6, 0.5e-6][len(costs):]
+    print('Modelled cost: {0:.1f} us per open, {1:.1f} us per sysfs access, {2:.1f} us per mmap access'.format(
+        open_cost*1e6, sysfs_cost*1e6, mmap_cost*1e6))
+    mraa = FakeMraa(open_cost, sysfs_cost, mmap_cost)
+    measure('per call', PerCallAdapter(mraa, use_mmap=False), mraa)
+    measure('cached sysfs', GPIO.AdafruitMinnowAdapter(mraa, use_mmap=False), mraa)
+    measure('cached mmap', GPIO.AdafruitMinnowAdapter(mraa), mraa)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Count platform probes and time start-up from import to a ready display
+object, going through each place that asks for the platform: SPI.SpiDev(),
+get_platform_gpio(), I2C.get_default_bus() and the TFT constructor.  Each
+mode runs in a fresh interpreter so import time is included.  Run with:
+
+    python benchmarks/platform_startup.py
+"""
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+import time
+
+
+def startup(mode):
+    start = time.time()
+    from fakes import FakeGPIO, FakeSpi
+    import Adafruit_GPIO as GPIO
+    import Adafruit_GPIO.Platform as Platform
+    import Adafruit_GPIO.SPI as SPI
+
+    probes = [0, 0.0]
+    probe = Platform.probe_platform
+    def counting_probe():
+        probe_start = time.time()
+        probes[0] += 1
+        try:
+            return probe()
+        finally:
+            probes[1] += time.time() - probe_start
+    Platform.probe_platform = counting_probe
+    if mode == 'uncached':
+        # Reproduce the old behaviour of probing on every call.
+        detect = Platform.platform_detect
+        def uncached():
+            Platform.reset_platform()
+            return detect()
+        Platform.platform_detect = uncached
+
+    # The start-up sequence of a typical display app.  Hardware libraries
+    # aren't installed here, so the calls needing them are allowed to fail
+    # after asking for the platform.
+    try:
+        import Adafruit_GPIO.I2C as I2C
+        default_bus = I2C.get_default_bus
+    except ImportError:
+        # Without smbus, ask for the platform the way get_default_bus() does.
+        default_bus = lambda: Platform.platform_detect()
+    for call in (lambda: SPI.SpiDev(0, 0, 16000000),
+                 GPIO.get_platform_gpio,
+                 default_bus):
+        try:
+            call()
+        except (ImportError, RuntimeError):
+            pass
+    import pyDrivers.ILI9341 as ILI9341
+    ILI9341.ILI9341(0, FakeSpi(), gpio=FakeGPIO())
+    elapsed = time.time() - start
+    print('{0:<10} {1:>2} probes  {2:>6.2f} ms probing  {3:>7.1f} ms import to ready'.format(
+        mode, probes[0], probes[1]*1000.0, elapsed*1000.0))
+
+
+def main():
+    if len(sys.argv) > 1:
+        startup(sys.argv[1])
+        return
+    for mode, env in (('uncached', {}), ('cached', {}),
+                      ('pinned', {'ADAFRUIT_GPIO_PLATFORM': 'minnowboard'})):
+        environ = dict(os.environ)
+        environ.update(env)
+        subprocess.check_call([sys.executable, os.path.abspath(__file__), mode], env=environ)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Compare full frame writes on ILI9341/HX8357 with the old fixed 4096 byte
+chunks against chunks sized to the SPI device's max_transfer, as read from
+the spidev bufsiz parameter.  Uses a stand-in SPI device with a modelled
+cost per transaction.  Run with:
+
+    python benchmarks/transfer_size.py [spi cost per transaction in us]
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from fakes import FakeGPIO, FakeSpi
+import pyDrivers.ILI9341 as ILI9341
+import pyDrivers.HX8357 as HX8357
+
+
+FRAMES = 20
+
+
+def measure(name, cls, max_transfer, spi_cost):
+    spi = FakeSpi(cost=spi_cost)
+    if max_transfer is not None:
+        spi.max_transfer = max_transfer
+    disp = cls(0, spi, gpio=FakeGPIO())
+    spi.reset()
+    start = time.time()
+    for i in range(FRAMES):
+        disp.display(full=True)
+    elapsed = (time.time() - start) / FRAMES
+    print('{0:<24} {1:>4} SPI writes/frame  {2:>7.2f} ms/frame'.format(
+        name, spi.transactions // FRAMES, elapsed*1000.0))
+
+
+def main():
+    spi_cost = float(sys.argv[1])/1e6 if len(sys.argv) > 1 else 60e-6
+    print('Modelled cost: {0:.0f} us per SPI transaction'.format(spi_cost*1e6))
+    for name, cls in (('ILI9341', ILI9341.ILI9341), ('HX8357', HX8357.HX8357)):
+        measure(name + ' 4096 fixed', cls, None, spi_cost)
+        for size in (16384, 65536):
+            measure('{0} bufsiz={1}'.format(name, size), cls, size, spi_cost)
+
+
+if __name__ == '__main__':
+    main()
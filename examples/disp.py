@@ -23,6 +23,7 @@ import ImageDraw
 import ImageFont
 
 import pyDrivers.ILI9341 as TFT
+from pyDrivers.glyphs import TextRenderer
 import Adafruit_GPIO.GPIO as GPIO
 import Adafruit_GPIO.SPI as SPI
 
@@ -70,28 +71,13 @@ font = ImageFont.load_default()
 # Some other nice fonts to try: http://www.dafont.com/bitmap.php
 #font = ImageFont.truetype('Minecraftia.ttf', 16)
 
-# Define a function to create rotated text.  Unfortunately PIL doesn't have good
-# native support for rotated fonts, but this function can be used to make a 
-# text image and rotate it so it's easy to paste in the buffer.
-def draw_rotated_text(image, text, position, angle, font, fill=(255,255,255)):
-	# Get rendered font width and height.
-	draw = ImageDraw.Draw(image)
-	width, height = draw.textsize(text, font=font)
-	# Create a new image with transparent background to store the text.
-	textimage = Image.new('RGBA', (width, height), (0,0,0,0))
-	# Render the text.
-	textdraw = ImageDraw.Draw(textimage)
-	textdraw.text((0,0), text, font=font, fill=fill)
-	# Rotate the text image.
-	rotated = textimage.rotate(angle, expand=1)
-	# Paste the text into the image, using it as a mask for transparency.
-	image.paste(rotated, position, rotated)
-
-# Write two lines of white text on the buffer, rotated 90 degrees counter clockwise.
-draw_rotated_text(disp.buffer, 'Hello World!', (150, 120), 90, font, fill=(255,255,255))
-draw_rotated_text(disp.buffer, 'This is a line of text.', (170, 90), 90, font, fill=(255,255,255))
-
 # Write buffer to display hardware, must be called to make things visible on the
 # display!
 disp.display()
 
+# Text is drawn from a cache of prerendered glyphs, straight to the panel.  Each
+# character is only rendered by PIL once, so redrawing changing text is cheap.
+# Text is rotated 90 degrees counter clockwise and drawn on the red background.
+text = TextRenderer(font, fg=(255,255,255), bg=(255,0,0), rotation=90)
+text.draw(disp, 'Hello World!', 150, 120)
+text.draw(disp, 'This is a line of text.', 170, 90)
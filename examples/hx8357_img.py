@@ -42,12 +42,15 @@ disp = TFT.HX8357(DC, rst=RST, spi=SPI.SpiDev(SPI_PORT, SPI_DEVICE, max_speed_hz
 # Initialize display.
 disp.begin()
 
+# Use the display in landscape orientation.
+disp.set_rotation(270)
+
 # Load an image.
 print 'Loading image...'
 image = Image.open('logo.png')
 
-# Resize the image and rotate it so it's 240x320 pixels.
-image = image.rotate(90).resize((320, 480))
+# Resize the image so it's 480x320 pixels.
+image = image.resize((disp.width, disp.height))
 
 # Draw the image on the display hardware.
 print 'Drawing image'
@@ -27,6 +27,8 @@ import os
 from PIL import Image
 from pyDrivers.ada_lcd import *
 import pyDrivers.ILI9341 as TFT
+from pyDrivers.imagecache import ImageCache
+from pyDrivers.prefetch import Prefetcher
 import Adafruit_GPIO as GPIO
 import Adafruit_GPIO.SPI as SPI
 
@@ -62,6 +64,14 @@ count = 0
 
 disp = TFT.ILI9341(DC, rst=RST, spi=SPI.SpiDev(SPI_PORT,SPI_DEVICE,SPEED))
 disp.begin()
+# Landscape images are rotated by the panel instead of with PIL.
+disp.set_rotation(270)
+
+# Images are decoded and converted once, then shown straight from the cache.
+# The images either side of the current one are loaded in the background so
+# a button press finds them ready.
+cache = ImageCache()
+prefetch = Prefetcher(imageList, disp.width, disp.height, cache=cache)
 
 while True:
     
@@ -70,21 +80,19 @@ while True:
     message = " Image " + str(count+1) + " of " + str(len(imageList)) + "\n" + imageList[count][len(sys.argv[1]):]
     lcd.message(message)
     lcd.scroll()
+    prefetch.focus(count)
     try:
-        image = Image.open(imageList[count])
-    except(IOError):
+        prefetch.show(disp, count)
+    except (IOError, OSError):
         lcd.clear()
         time.sleep(0.25)
         message = " ERR: " + str(count+1) + " of " + str(len(imageList)) + "\n" + imageList[count][len(sys.argv[1]):]
         lcd.scroll()
         lcd.message(message)
         if(count == len(imageList)-1):
-            image = Image.open(imageList[0])
+            prefetch.show(disp, 0)
         else:
-            image = Image.open(imageList[count+1])
-
-    image = image.rotate(90).resize((240, 320))
-    disp.display(image)
+            prefetch.show(disp, count+1)
     
     try:
         while True:
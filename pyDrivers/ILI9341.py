@@ -18,16 +18,10 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-import numbers
-import time
-import numpy as np
+from spipanel import SpiPanel
 
-from PIL import Image
-from PIL import ImageDraw
-
-import Adafruit_GPIO.Platform as Platform
-import Adafruit_GPIO as GPIO
-import Adafruit_GPIO.SPI as SPI
+# Kept importable from here for existing code.
+from rgb565 import color565, image_to_data
 
 
 # Constants for interacting with display registers.
@@ -62,7 +56,9 @@ ILI9341_RAMWR       = 0x2C
 ILI9341_RAMRD       = 0x2E
 
 ILI9341_PTLAR       = 0x30
+ILI9341_VSCRDEF     = 0x33
 ILI9341_MADCTL      = 0x36
+ILI9341_VSCRSADD    = 0x37
 ILI9341_PIXFMT      = 0x3A
 
 ILI9341_FRMCTR1     = 0xB1
@@ -95,240 +91,92 @@ ILI9341_RED         = 0xF800
 ILI9341_GREEN       = 0x07E0
 ILI9341_CYAN        = 0x07FF
 ILI9341_MAGENTA     = 0xF81F
-ILI9341_YELLOW      = 0xFFE0  
+ILI9341_YELLOW      = 0xFFE0
 ILI9341_WHITE       = 0xFFFF
 
-
-def color565(r, g, b):
-	"""Convert red, green, blue components to a 16-bit 565 RGB value. Components
-	should be values 0 to 255.
-	"""
-	return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
-
-def image_to_data(image):
-	"""Generator function to convert a PIL image to 16-bit 565 RGB bytes."""
-	#NumPy is much faster at doing this. NumPy code provided by:
-	#Keith (https://www.blogger.com/profile/02555547344016007163)
-	pb = np.array(image.convert('RGB')).astype('uint16')
-	color = ((pb[:,:,0] & 0xF8) << 8) | ((pb[:,:,1] & 0xFC) << 3) | (pb[:,:,2] >> 3)
-	return np.dstack(((color >> 8) & 0xFF, color & 0xFF)).flatten().tolist()
-
-class ILI9341(object):
+# Memory access control values for each rotation set by set_rotation().
+ILI9341_ROTATIONS = {
+	0:   0x48,		# MX | BGR, portrait
+	90:  0x28,		# MV | BGR, landscape
+	180: 0x88,		# MY | BGR, portrait upside down
+	270: 0xE8,		# MY | MX | MV | BGR, landscape upside down
+}
+
+# Power up sequence run by begin(): opcode, parameter bytes, delay in seconds.
+ILI9341_INIT = (
+	(0xEF,              [0x03, 0x80, 0x02], 0),
+	(0xCF,              [0x00, 0xC1, 0x30], 0),
+	(0xED,              [0x64, 0x03, 0x12, 0x81], 0),
+	(0xE8,              [0x85, 0x00, 0x78], 0),
+	(0xCB,              [0x39, 0x2C, 0x00, 0x34, 0x02], 0),
+	(0xF7,              [0x20], 0),
+	(0xEA,              [0x00, 0x00], 0),
+	(ILI9341_PWCTR1,    [0x23], 0),			# Power control, VRH[5:0]
+	(ILI9341_PWCTR2,    [0x10], 0),			# Power control, SAP[2:0];BT[3:0]
+	(ILI9341_VMCTR1,    [0x3E, 0x28], 0),	# VCM control
+	(ILI9341_VMCTR2,    [0x86], 0),			# VCM control2
+	(ILI9341_MADCTL,    [ILI9341_ROTATIONS[0]], 0),	# Memory Access Control
+	(ILI9341_PIXFMT,    [0x55], 0),
+	(ILI9341_FRMCTR1,   [0x00, 0x18], 0),
+	(ILI9341_DFUNCTR,   [0x08, 0x82, 0x27], 0),	# Display Function Control
+	(0xF2,              [0x00], 0),			# 3Gamma Function Disable
+	(ILI9341_GAMMASET,  [0x01], 0),			# Gamma curve selected
+	(ILI9341_GMCTRP1,   [0x0F, 0x31, 0x2B, 0x0C, 0x0E, 0x08, 0x4E, 0xF1,
+	                     0x37, 0x07, 0x10, 0x03, 0x0E, 0x09, 0x00], 0),	# Set Gamma
+	(ILI9341_GMCTRN1,   [0x00, 0x0E, 0x14, 0x03, 0x11, 0x07, 0x31, 0xC1,
+	                     0x48, 0x08, 0x0F, 0x0C, 0x31, 0x36, 0x0F], 0),	# Set Gamma
+	(ILI9341_SLPOUT,    None, 0.120),		# Exit Sleep
+	(ILI9341_DISPON,    None, 0),			# Display on
+)
+
+
+class ILI9341(SpiPanel):
 	"""Representation of an ILI9341 TFT LCD."""
 
+	INIT = ILI9341_INIT
+	ROTATIONS = ILI9341_ROTATIONS
+
 	def __init__(self, dc, spi, rst=None, gpio=None, width=ILI9341_TFTWIDTH,
-		height=ILI9341_TFTHEIGHT):
+		height=ILI9341_TFTHEIGHT, partial_update=True, framebuffer=False):
 		"""Create an instance of the display using SPI communication.  Must
 		provide the GPIO pin number for the D/C pin and the SPI driver.  Can
 		optionally provide the GPIO pin number for the reset pin as the rst
-		parameter.
-		"""
-		self._dc = dc
-		self._rst = rst
-		self._spi = spi
-		self._gpio = gpio
-		self.width = width
-		self.height = height
-		if self._gpio is None:
-			self._gpio = GPIO.get_platform_gpio()
-		# Set DC as output.
-		self._gpio.setup(dc, GPIO.OUT)
-		# Setup reset as output (if provided).
-		if rst is not None:
-			self._gpio.setup(rst, GPIO.OUT)
-		# Set SPI to mode 0, MSB first.
-		spi.set_mode(0)
-		spi.set_bit_order(SPI.MSBFIRST)
-                
-                #need to nerf the clock for Minnow
-                if(Platform.platform_detect() == 3): 
-		    spi.set_clock_hz(16000000)
-                    #print 'Rate: MAX'
-                else:
-                    spi.set_clock_hz(64000000)
-                    #print 'Rate: 64hz'
-
-		# Create an image buffer.
-		self.buffer = Image.new('RGB', (width, height))
-
-	def send(self, data, is_data=True, chunk_size=4096):
-		"""Write a byte or array of bytes to the display. Is_data parameter
-		controls if byte should be interpreted as display data (True) or command
-		data (False).  Chunk_size is an optional size of bytes to write in a
-		single SPI transaction, with a default of 4096.
+		parameter.  See SpiPanel for partial_update and framebuffer.
 		"""
-		# Set DC low for command, high for data.
-		self._gpio.output(self._dc, is_data)
-		# Convert scalar argument to list so either can be passed as parameter.
-		if isinstance(data, numbers.Number):
-			data = [data & 0xFF]
-		# Write data a chunk at a time.
-		for start in range(0, len(data), chunk_size):
-			end = min(start+chunk_size, len(data))
-			self._spi.write(data[start:end])
-
-	def command(self, data):
-		"""Write a byte or array of bytes to the display as command data."""
-		self.send(data, False)
-
-	def data(self, data):
-		"""Write a byte or array of bytes to the display as display data."""
-		self.send(data, True)
-
-	def reset(self):
-		"""Reset the display, if reset pin is connected."""
-		if self._rst is not None:
-			self._gpio.set_high(self._rst)
-			time.sleep(0.005)
-			self._gpio.set_low(self._rst)
-			time.sleep(0.02)
-			self._gpio.set_high(self._rst)
-			time.sleep(0.150)
-
-	def _init(self):
-		# Initialize the display.  Broken out as a separate function so it can
-		# be overridden by other displays in the future.
-		self.command(0xEF)
-		self.data(0x03)
-		self.data(0x80)
-		self.data(0x02)
-		self.command(0xCF)
-		self.data(0x00)
-		self.data(0XC1)
-		self.data(0X30)
-		self.command(0xED)
-		self.data(0x64)
-		self.data(0x03)
-		self.data(0X12)
-		self.data(0X81)
-		self.command(0xE8)
-		self.data(0x85)
-		self.data(0x00)
-		self.data(0x78)
-		self.command(0xCB)
-		self.data(0x39)
-		self.data(0x2C)
-		self.data(0x00)
-		self.data(0x34)
-		self.data(0x02)
-		self.command(0xF7)
-		self.data(0x20)
-		self.command(0xEA)
-		self.data(0x00)
-		self.data(0x00)
-		self.command(ILI9341_PWCTR1)	# Power control 
-		self.data(0x23)					# VRH[5:0] 
-		self.command(ILI9341_PWCTR2)	# Power control 
-		self.data(0x10)					# SAP[2:0];BT[3:0] 
-		self.command(ILI9341_VMCTR1)	# VCM control 
-		self.data(0x3e)
-		self.data(0x28)
-		self.command(ILI9341_VMCTR2)	# VCM control2 
-		self.data(0x86)					# --
-		self.command(ILI9341_MADCTL)	#  Memory Access Control 
-		self.data(0x48)
-		self.command(ILI9341_PIXFMT)
-		self.data(0x55)
-		self.command(ILI9341_FRMCTR1)
-		self.data(0x00)
-		self.data(0x18)
-		self.command(ILI9341_DFUNCTR)	#  Display Function Control 
-		self.data(0x08)
-		self.data(0x82)
-		self.data(0x27)
-		self.command(0xF2)				#  3Gamma Function Disable 
-		self.data(0x00)
-		self.command(ILI9341_GAMMASET)	# Gamma curve selected 
-		self.data(0x01)
-		self.command(ILI9341_GMCTRP1)	# Set Gamma 
-		self.data(0x0F)
-		self.data(0x31)
-		self.data(0x2B)
-		self.data(0x0C)
-		self.data(0x0E)
-		self.data(0x08)
-		self.data(0x4E)
-		self.data(0xF1)
-		self.data(0x37)
-		self.data(0x07)
-		self.data(0x10)
-		self.data(0x03)
-		self.data(0x0E)
-		self.data(0x09)
-		self.data(0x00)
-		self.command(ILI9341_GMCTRN1)	# Set Gamma 
-		self.data(0x00)
-		self.data(0x0E)
-		self.data(0x14)
-		self.data(0x03)
-		self.data(0x11)
-		self.data(0x07)
-		self.data(0x31)
-		self.data(0xC1)
-		self.data(0x48)
-		self.data(0x08)
-		self.data(0x0F)
-		self.data(0x0C)
-		self.data(0x31)
-		self.data(0x36)
-		self.data(0x0F)
-		self.command(ILI9341_SLPOUT)	# Exit Sleep 
-		time.sleep(0.120)
-		self.command(ILI9341_DISPON)	# Display on 
-	def begin(self):
-		"""Initialize the display.  Should be called once before other calls that
-		interact with the display are called.
+		super(ILI9341, self).__init__(dc, spi, width, height, rst=rst, gpio=gpio,
+			partial_update=partial_update, framebuffer=framebuffer)
+		# Vertical scrolling state, see define_scroll_area().
+		self.scroll_area = (0, height)
+		self.scroll = 0
+
+	def define_scroll_area(self, top=0, bottom=0):
+		"""Define the vertical scrolling area as every row except top fixed rows
+		at the top and bottom fixed rows at the bottom of the panel.  Rows are
+		counted along the panel's native 320 pixel axis, so scrolling moves
+		the picture vertically at rotation 0 and 180.  The scroll position is
+		reset to the top of the area.
 		"""
-		self.reset()
-		self._init()	
-	
-	def set_window(self, x0=0, y0=0, x1=None, y1=None):
-		"""Set the pixel address window for proceeding drawing commands. x0 and
-		x1 should define the minimum and maximum x pixel bounds.  y0 and y1 
-		should define the minimum and maximum y pixel bound.  If no parameters 
-		are specified the default will be to update the entire display from 0,0
-		to 239,319.
+		with self._lock:
+			native_height = self._native_size[1]
+			if top < 0 or bottom < 0 or top+bottom >= native_height:
+				raise ValueError('Fixed areas must leave at least one row to scroll.')
+			height = native_height - top - bottom
+			self.command(ILI9341_VSCRDEF)
+			self.data([top >> 8, top & 0xFF, height >> 8, height & 0xFF,
+				bottom >> 8, bottom & 0xFF])
+			self.scroll_area = (top, height)
+			self.scroll_to(top)
+
+	def scroll_to(self, line):
+		"""Show panel memory row line at the top of the scrolling area.  Rows
+		from line to the end of the area are shown first, followed by the
+		rows from the start of the area, so drawing still uses memory
+		coordinates and nothing needs to be rewritten to scroll.
 		"""
-		if x1 is None:
-			x1 = self.width-1
-		if y1 is None:
-			y1 = self.height-1
-		self.command(ILI9341_CASET)		# Column addr set
-		self.data(x0 >> 8)
-		self.data(x0)					# XSTART 
-		self.data(x1 >> 8)
-		self.data(x1)					# XEND
-		self.command(ILI9341_PASET)		# Row addr set
-		self.data(y0 >> 8)
-		self.data(y0)					# YSTART
-		self.data(y1 >> 8)
-		self.data(y1)					# YEND
-		self.command(ILI9341_RAMWR)		# write to RAM
-
-	def display(self, image=None):
-		"""Write the display buffer or provided image to the hardware.  If no
-		image parameter is provided the display buffer will be written to the
-		hardware.  If an image is provided, it should be RGB format and the
-		same dimensions as the display hardware.
-		"""
-		# By default write the internal buffer to the display.
-		if image is None:
-			image = self.buffer
-		# Set address bounds to entire display.
-		self.set_window()
-		# Convert image to array of 16bit 565 RGB data bytes.
-		# Unfortunate that this copy has to occur, but the SPI byte writing
-		# function needs to take an array of bytes and PIL doesn't natively
-		# store images in 16-bit 565 RGB format.
-		pixelbytes = list(image_to_data(image))
-		# Write data to hardware.
-		self.data(pixelbytes)
-
-	def clear(self, color=(0,0,0)):
-		"""Clear the image buffer to the specified RGB color (default black)."""
-		width, height = self.buffer.size
-		self.buffer.putdata([color]*(width*height))
-
-	def draw(self):
-		"""Return a PIL ImageDraw instance for 2D drawing on the image buffer."""
-		return ImageDraw.Draw(self.buffer)
+		with self._lock:
+			top, height = self.scroll_area
+			if not top <= line < top+height:
+				raise ValueError('Line must be inside the scrolling area.')
+			self.command(ILI9341_VSCRSADD)
+			self.data([line >> 8, line & 0xFF])
+			self.scroll = line
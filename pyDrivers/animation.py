@@ -0,0 +1,130 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+
+import numpy as np
+from PIL import Image
+from PIL import ImageSequence
+
+import dirty
+from framebuffer import Framebuffer
+from rgb565 import image_to_array
+
+
+# Playback is paced with a monotonic clock where Python has one, so changes
+# to the wall clock don't stall or rush an animation.
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class PlaybackStats(object):
+	"""Results of a play() call: frames written and dropped, seconds elapsed,
+	seconds spent writing to the panel and pixel bytes sent.
+	"""
+
+	def __init__(self):
+		self.frames = 0
+		self.dropped = 0
+		self.elapsed = 0.0
+		self.busy = 0.0
+		self.bytes = 0
+
+	@property
+	def fps(self):
+		"""Frames written per second."""
+		return self.frames / self.elapsed if self.elapsed else 0.0
+
+	@property
+	def utilisation(self):
+		"""Fraction of the playback time spent writing to the panel."""
+		return self.busy / self.elapsed if self.elapsed else 0.0
+
+	@property
+	def bytes_per_second(self):
+		"""Pixel bytes sent per second of playback."""
+		return self.bytes / self.elapsed if self.elapsed else 0.0
+
+	def __repr__(self):
+		return 'PlaybackStats(frames={0}, dropped={1}, fps={2:.1f}, utilisation={3:.2f}, bytes={4})'.format(
+			self.frames, self.dropped, self.fps, self.utilisation, self.bytes)
+
+
+def gif_frames(path, size=None):
+	"""Yield each frame of an animated GIF (or other multi frame image file)
+	as an RGB image, resized to size=(width, height) if given.
+	"""
+	image = Image.open(path)
+	for frame in ImageSequence.Iterator(image):
+		frame = frame.convert('RGB')
+		if size is not None and frame.size != tuple(size):
+			frame = frame.resize(size)
+		yield frame
+
+def to_frame(frame):
+	"""Return a PIL image, Framebuffer or array as a (height, width) array of
+	565 RGB values.  Framebuffers are copied since they are usually redrawn
+	for the next frame.
+	"""
+	if isinstance(frame, Framebuffer):
+		return np.array(frame.pixels())
+	if isinstance(frame, np.ndarray):
+		return np.asarray(frame, dtype='>u2')
+	return image_to_array(frame)
+
+def prepack(frames):
+	"""Convert a sequence of frames to a list of 565 RGB arrays once, so a
+	loop played over and over skips conversion.
+	"""
+	return [to_frame(frame) for frame in frames]
+
+def play(display, frames, fps):
+	"""Write frames to an ILI9341 or HX8357 display at fps frames per second
+	and return a PlaybackStats.  Frames is any iterable of PIL images,
+	Framebuffers or prepacked 565 RGB arrays, such as a generator from
+	gif_frames().  Each frame is converted and compared with the previous
+	one before its slot starts, so only the changed windows are written when
+	it's due.  Frames whose slot has passed entirely are dropped to keep the
+	animation in time.
+	"""
+	period = 1.0 / fps
+	stats = PlaybackStats()
+	previous = None
+	start = _clock()
+	deadline = start
+	for frame in frames:
+		if _clock() - deadline >= period:
+			stats.dropped += 1
+			deadline += period
+			continue
+		pixels = to_frame(frame)
+		rects = None
+		if previous is not None:
+			rects = dirty.find_dirty_rects(previous, pixels)
+		delay = deadline - _clock()
+		if delay > 0:
+			time.sleep(delay)
+		sent = _clock()
+		display.display_frame(pixels, rects=rects)
+		stats.busy += _clock() - sent
+		stats.bytes += display.update_stats.bytes
+		stats.frames += 1
+		previous = pixels
+		deadline += period
+	stats.elapsed = _clock() - start
+	return stats
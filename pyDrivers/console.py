@@ -0,0 +1,79 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFont
+
+from rgb565 import image_to_array
+
+
+class ScrollingConsole(object):
+	"""Log style text display using an ILI9341's hardware vertical scrolling.
+	Each appended line is drawn into a single strip of panel memory and the
+	scroll pointer is moved so it appears at the bottom, so adding a line
+	writes a few KB instead of the whole frame.  Use the display at rotation
+	0 or 180, since the panel scrolls along its native vertical axis.
+	"""
+
+	def __init__(self, display, font=None, line_height=None, fg=(255,255,255),
+		bg=(0,0,0), top=0, bottom=0):
+		"""Create a console on display using rows between top and bottom fixed
+		areas of that many pixels, which are left for other drawing.  Font is
+		a PIL ImageFont, PIL's default font if not given, and lines are
+		line_height pixels apart.  Rows left over when the area isn't a
+		whole number of lines scroll past as a blank gap.
+		"""
+		self._display = display
+		self._font = font if font is not None else ImageFont.load_default()
+		if line_height is None:
+			line_height = self._font.getsize('Ag')[1] + 2
+		self.line_height = line_height
+		self.fg = fg
+		self.bg = bg
+		display.define_scroll_area(top, bottom)
+		self._top, self._height = display.scroll_area
+		self.lines = self._height // line_height
+		if self.lines < 1:
+			raise ValueError('Scrolling area is smaller than one line.')
+		self.clear()
+
+	def clear(self):
+		"""Blank the scrolling area and start again from its top line."""
+		display = self._display
+		display.fill_rect(0, self._top, display.width-1,
+			self._top + self._height - 1, self.bg)
+		display.scroll_to(self._top)
+		self._slot = 0
+		self._count = 0
+
+	def append(self, text):
+		"""Add a line of text below the others, scrolling the oldest line off
+		the top once the area is full.
+		"""
+		display = self._display
+		strip = Image.new('RGB', (display.width, self.line_height), self.bg)
+		ImageDraw.Draw(strip).text((2, 1), text, font=self._font, fill=self.fg)
+		display.display_rect(image_to_array(strip), 0, self._top + self._slot*self.line_height)
+		self._slot = (self._slot + 1) % self.lines
+		self._count += 1
+		if self._count >= self.lines:
+			# The next slot to be overwritten holds the oldest line, so show it
+			# at the top of the area.
+			display.scroll_to(self._top + self._slot*self.line_height)
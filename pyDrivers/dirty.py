@@ -0,0 +1,103 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import numpy as np
+
+
+# Changed pixels closer together than this many rows or columns are sent as
+# one rectangle, since every extra window costs a CASET/PASET/RAMWR sequence.
+DEFAULT_MERGE_GAP = 8
+DEFAULT_MAX_RECTS = 8
+
+
+class UpdateStats(object):
+	"""Counters describing what the last and all previous display() calls
+	sent to the panel.  Bytes count pixel data only, not window commands.
+	"""
+
+	def __init__(self):
+		self.updates = 0
+		self.rects = 0
+		self.bytes = 0
+		self.total_rects = 0
+		self.total_bytes = 0
+
+	def record(self, rects):
+		"""Record an update which sent the provided (x0, y0, x1, y1) rects."""
+		nbytes = 0
+		for x0, y0, x1, y1 in rects:
+			nbytes += (x1-x0+1)*(y1-y0+1)*2
+		self.updates += 1
+		self.rects = len(rects)
+		self.bytes = nbytes
+		self.total_rects += self.rects
+		self.total_bytes += nbytes
+
+	def __repr__(self):
+		return 'UpdateStats(updates={0}, rects={1}, bytes={2}, total_rects={3}, total_bytes={4})'.format(
+			self.updates, self.rects, self.bytes, self.total_rects, self.total_bytes)
+
+
+def _runs(indices, gap):
+	"""Split sorted indices into (first, last) runs, joining runs separated by
+	no more than gap missing indices.
+	"""
+	breaks = np.flatnonzero(np.diff(indices) > gap+1)
+	starts = np.concatenate(([0], breaks+1))
+	ends = np.concatenate((breaks, [len(indices)-1]))
+	return [(int(indices[s]), int(indices[e])) for s, e in zip(starts, ends)]
+
+def _union(a, b):
+	return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def _area(r):
+	return (r[2]-r[0]+1)*(r[3]-r[1]+1)
+
+def find_dirty_rects(previous, current, max_rects=DEFAULT_MAX_RECTS,
+	merge_gap=DEFAULT_MERGE_GAP):
+	"""Compare two equally sized 2D pixel arrays and return a list of inclusive
+	(x0, y0, x1, y1) rectangles covering every pixel that differs.  Nearby
+	changes are merged so at most max_rects rectangles are returned.
+	"""
+	changed = previous != current
+	rows = np.flatnonzero(changed.any(axis=1))
+	if rows.size == 0:
+		return []
+	rects = []
+	# Find bands of changed rows, then the changed column runs inside each band
+	# and finally trim each rectangle to the rows that changed in its columns.
+	for y0, y1 in _runs(rows, merge_gap):
+		band = changed[y0:y1+1]
+		for x0, x1 in _runs(np.flatnonzero(band.any(axis=0)), merge_gap):
+			used = np.flatnonzero(band[:, x0:x1+1].any(axis=1))
+			rects.append((x0, y0+int(used[0]), x1, y0+int(used[-1])))
+	# Merge the pair of rectangles that wastes the fewest pixels until few
+	# enough are left.  Rect counts are small so a simple search is fine.
+	while len(rects) > max(1, max_rects):
+		best = None
+		for i in range(len(rects)):
+			for j in range(i+1, len(rects)):
+				merged = _union(rects[i], rects[j])
+				waste = _area(merged) - _area(rects[i]) - _area(rects[j])
+				if best is None or waste < best[0]:
+					best = (waste, i, j, merged)
+		waste, i, j, merged = best
+		rects[i] = merged
+		del rects[j]
+	return rects
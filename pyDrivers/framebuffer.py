@@ -0,0 +1,204 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+from PIL import ImageDraw
+
+import rgb565
+
+
+class Framebuffer(object):
+	"""Display sized image stored as 16-bit 565 RGB in the byte order the
+	panels expect, so it can be sent without any color conversion.  The
+	pixels are in the array attribute, a (height, width) big-endian uint16
+	NumPy array.  Colors can be 565 values or (red, green, blue) tuples.
+	"""
+
+	def __init__(self, width, height):
+		self.width = width
+		self.height = height
+		self.array = np.zeros((height, width), dtype='>u2')
+
+	@property
+	def size(self):
+		"""Width and height of the framebuffer, like PIL's Image.size."""
+		return (self.width, self.height)
+
+	def _clip(self, x, y, width, height):
+		# Return destination and source slices of a width x height block placed
+		# at x, y after clipping it to the framebuffer, or None if off screen.
+		x0, y0 = max(x, 0), max(y, 0)
+		x1, y1 = min(x+width, self.width), min(y+height, self.height)
+		if x0 >= x1 or y0 >= y1:
+			return None
+		return ((slice(y0, y1), slice(x0, x1)),
+			(slice(y0-y, y1-y), slice(x0-x, x1-x)))
+
+	def _color(self, color):
+		# Value stored in the array for color.
+		return rgb565.to_color565(color)
+
+	def pixels(self):
+		"""Return the framebuffer as a (height, width) array of 565 RGB values
+		ready to send.  This is the array attribute itself, not a copy.
+		"""
+		return self.array
+
+	def fill(self, color):
+		"""Fill the whole framebuffer with color."""
+		self.array.fill(self._color(color))
+
+	def fill_rect(self, x0, y0, x1, y1, color):
+		"""Fill the rectangle with inclusive corners x0, y0 and x1, y1."""
+		clip = self._clip(x0, y0, x1-x0+1, y1-y0+1)
+		if clip is not None:
+			self.array[clip[0]] = self._color(color)
+
+	def pixel(self, x, y, color):
+		"""Set the pixel at x, y to color."""
+		self.fill_rect(x, y, x, y, color)
+
+	def hline(self, x, y, width, color):
+		"""Draw a horizontal line width pixels long starting at x, y."""
+		self.fill_rect(x, y, x+width-1, y, color)
+
+	def vline(self, x, y, height, color):
+		"""Draw a vertical line height pixels long starting at x, y."""
+		self.fill_rect(x, y, x, y+height-1, color)
+
+	def blit(self, sprite, x=0, y=0):
+		"""Copy a prepacked sprite, a 2D array of 565 RGB values such as one
+		returned by rgb565.image_to_array, with its top left corner at x, y.
+		"""
+		height, width = sprite.shape
+		clip = self._clip(x, y, width, height)
+		if clip is not None:
+			self.array[clip[0]] = sprite[clip[1]]
+
+	def blit_image(self, image, x=0, y=0):
+		"""Convert a PIL image and copy it with its top left corner at x, y."""
+		self.blit(rgb565.image_to_array(image), x, y)
+
+	def image(self, box=None):
+		"""Return a PIL RGB image copy of the framebuffer, or of the region
+		box=(x0, y0, x1, y1) with inclusive corners.
+		"""
+		if box is None:
+			return rgb565.array_to_image(self.array)
+		x0, y0, x1, y1 = box
+		return rgb565.array_to_image(self.array[y0:y1+1, x0:x1+1])
+
+	@contextmanager
+	def draw(self, box=None):
+		"""Context manager yielding a PIL ImageDraw for drawing that the
+		primitives here can't do.  Drawing happens on an RGB copy of the
+		framebuffer (or of region box) which is written back on exit, so keep
+		the box small when drawing often.
+		"""
+		if box is None:
+			box = (0, 0, self.width-1, self.height-1)
+		image = self.image(box)
+		yield ImageDraw.Draw(image)
+		self.blit_image(image, box[0], box[1])
+
+
+class PaletteFramebuffer(Framebuffer):
+	"""Display sized indexed color image.  The array attribute is a (height,
+	width) uint8 NumPy array of indexes into palette, a 256 entry array of
+	565 RGB values, so a buffer takes a third of the memory of an RGB image
+	and converting it to send is a single lookup.  Colors passed to the
+	drawing methods are palette indexes, or (red, green, blue) tuples which
+	must exactly match a palette entry.  Changing the palette recolors every
+	pixel using an entry, which allows color cycling without redrawing.
+	"""
+
+	def __init__(self, width, height, palette=None):
+		"""Create a framebuffer with the provided palette, a sequence of up to
+		256 colors (see rgb565.image_palette() to use a PIL image's palette).
+		The default palette is black.
+		"""
+		self.width = width
+		self.height = height
+		self.array = np.zeros((height, width), dtype=np.uint8)
+		self.palette = np.zeros(256, dtype='>u2')
+		if palette is not None:
+			self.set_palette(palette)
+
+	def set_palette(self, palette):
+		"""Replace the palette, see the constructor."""
+		self.palette[:] = rgb565.palette_lut(palette)
+
+	def set_color(self, index, color):
+		"""Set palette entry index to color."""
+		self.palette[index] = rgb565.to_color565(color)
+
+	def rotate_palette(self, start, stop, steps=1):
+		"""Cycle palette entries start to stop (exclusive) by steps places, for
+		color cycling animations.
+		"""
+		self.palette[start:stop] = np.roll(self.palette[start:stop], steps)
+
+	def _color(self, color):
+		if not isinstance(color, tuple):
+			return color
+		matches = np.flatnonzero(self.palette == rgb565.to_color565(color))
+		if matches.size == 0:
+			raise ValueError('Color {0} is not in the palette.'.format(color))
+		return matches[0]
+
+	def pixels(self, out=None):
+		"""Look up every pixel in the palette and return a (height, width)
+		array of 565 RGB values, written into out if provided.
+		"""
+		if out is None:
+			out = np.empty((self.height, self.width), dtype='>u2')
+		np.take(self.palette, self.array, out=out)
+		return out
+
+	def blit(self, sprite, x=0, y=0):
+		"""Copy a 2D uint8 array of palette indexes with its top left corner at
+		x, y.
+		"""
+		if sprite.dtype != np.uint8:
+			raise ValueError('Palette framebuffers take sprites of uint8 indexes.')
+		Framebuffer.blit(self, sprite, x, y)
+
+	def blit_image(self, image, x=0, y=0):
+		"""Copy a PIL 'P' mode image's indexes with its top left corner at x,
+		y.  The image's own palette is ignored.
+		"""
+		if image.mode != 'P':
+			raise ValueError('Palette framebuffers take P mode images.')
+		self.blit(np.asarray(image), x, y)
+
+	def image(self, box=None):
+		"""Return a PIL 'P' mode image copy of the framebuffer, or of the
+		region box=(x0, y0, x1, y1) with inclusive corners, with the palette.
+		"""
+		array = self.array
+		if box is not None:
+			x0, y0, x1, y1 = box
+			array = array[y0:y1+1, x0:x1+1]
+		image = Image.fromarray(np.ascontiguousarray(array), 'P')
+		rgb = np.asarray(rgb565.array_to_image(self.palette.reshape(1, 256)))
+		image.putpalette(rgb.reshape(-1).tolist())
+		return image
@@ -0,0 +1,288 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import errno
+import logging
+import os
+import select
+import socket
+import struct
+import threading
+
+import numpy as np
+
+import frametiming
+from framebuffer import Framebuffer
+from rgb565 import image_to_array
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = '/tmp/pyDrivers-display.sock'
+DEFAULT_FPS = 30
+
+# Every message is this header followed by length bytes of payload.  Fields
+# are type, layer, x, y, width, height and payload length, in network order.
+HEADER = struct.Struct('!BBhhHHI')
+
+# Message types.  Pixel payloads are width*height big-endian 565 RGB values.
+MSG_FRAME = 1		# Replace the layer with a full frame, x and y are ignored.
+MSG_RECT  = 2		# Draw a width x height rectangle on the layer at x, y.
+MSG_CLEAR = 3		# Remove the layer, no payload.
+
+# Upper bound on a single payload, so a bad client can't exhaust memory.
+MAX_PAYLOAD = 4*1024*1024
+
+
+class Layer(object):
+	"""Pixels a client drew on one priority level, with a mask of which pixels
+	are set.  Unset pixels show the layers below.
+	"""
+
+	def __init__(self, width, height):
+		self.pixels = np.zeros((height, width), dtype='>u2')
+		self.mask = np.zeros((height, width), dtype=bool)
+
+	def draw(self, pixels, x, y):
+		height, width = pixels.shape
+		x0, y0 = max(x, 0), max(y, 0)
+		x1 = min(x+width, self.pixels.shape[1])
+		y1 = min(y+height, self.pixels.shape[0])
+		if x0 >= x1 or y0 >= y1:
+			return
+		self.pixels[y0:y1, x0:x1] = pixels[y0-y:y1-y, x0-x:x1-x]
+		self.mask[y0:y1, x0:x1] = True
+
+
+class FrameServer(object):
+	"""Own an ILI9341 or HX8357 and draw what clients send over a Unix domain
+	socket, so several services share the panel without each reinitialising
+	it.  Clients draw full frames or rectangles on numbered layers, which
+	are composited with higher layers on top.  Updates arriving within one
+	frame period are coalesced into a single partial update of the panel.
+	"""
+
+	def __init__(self, display, path=DEFAULT_SOCKET, fps=DEFAULT_FPS):
+		"""Serve display on the socket at path, writing at most fps frames a
+		second.  The display should already have had begin() called.
+		"""
+		self._display = display
+		self.path = path
+		self.fps = fps
+		self.width = display.width
+		self.height = display.height
+		self._layers = {}
+		self._lock = threading.Lock()
+		self._dirty = threading.Event()
+		self._stop = threading.Event()
+		self._frame = np.zeros((self.height, self.width), dtype='>u2')
+		self._listener = None
+		self._threads = []
+		# Connected sockets handed to add_client(), picked up by the reader.
+		self._new_clients = []
+		self.messages = 0
+		self.frames = 0
+		self.errors = 0
+
+	def start(self):
+		"""Listen on the socket and start the reader and compositor threads."""
+		try:
+			os.remove(self.path)
+		except OSError as e:
+			if e.errno != errno.ENOENT:
+				raise
+		self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self._listener.bind(self.path)
+		self._listener.listen(8)
+		self._stop.clear()
+		self._threads = [threading.Thread(target=self._serve),
+			threading.Thread(target=self._composite_loop)]
+		for thread in self._threads:
+			thread.daemon = True
+			thread.start()
+
+	def stop(self):
+		"""Stop serving, close the socket and remove its file."""
+		self._stop.set()
+		self._dirty.set()
+		for thread in self._threads:
+			thread.join()
+		self._threads = []
+		self._listener.close()
+		try:
+			os.remove(self.path)
+		except OSError:
+			pass
+
+	def add_client(self, sock):
+		"""Serve an already connected socket, such as one end of a
+		socketpair() whose other end is given to a FrameClient.
+		"""
+		with self._lock:
+			self._new_clients.append(sock)
+
+	def serve_forever(self):
+		"""Start serving and block until interrupted."""
+		self.start()
+		try:
+			while not self._stop.wait(1.0):
+				pass
+		finally:
+			self.stop()
+
+	def handle(self, kind, layer, x, y, width, height, payload):
+		"""Apply one decoded message to the layers."""
+		with self._lock:
+			if kind == MSG_CLEAR:
+				self._layers.pop(layer, None)
+			elif kind in (MSG_FRAME, MSG_RECT):
+				if len(payload) != width*height*2:
+					raise ValueError('Payload does not match the rectangle size.')
+				pixels = np.frombuffer(payload, dtype='>u2').reshape(height, width)
+				target = self._layers.get(layer)
+				if target is None:
+					target = self._layers[layer] = Layer(self.width, self.height)
+				if kind == MSG_FRAME:
+					target.mask[...] = False
+					x = y = 0
+				target.draw(pixels, x, y)
+			else:
+				raise ValueError('Unknown message type {0}.'.format(kind))
+			self.messages += 1
+		self._dirty.set()
+
+	def composite(self):
+		"""Return the current composited frame."""
+		with self._lock:
+			self._frame.fill(0)
+			for priority in sorted(self._layers):
+				layer = self._layers[priority]
+				np.copyto(self._frame, layer.pixels, where=layer.mask)
+			return self._frame.copy()
+
+	def _composite_loop(self):
+		period = 1.0/self.fps
+		while not self._stop.is_set():
+			self._dirty.wait()
+			if self._stop.is_set():
+				return
+			self._dirty.clear()
+			start = frametiming.clock()
+			try:
+				self._display.display_frame(self.composite())
+				self.frames += 1
+			except Exception:
+				# Keep serving, the next update may well get through.
+				self.errors += 1
+				logger.exception('Writing a frame to the display failed.')
+			# Messages arriving while waiting out the period are coalesced
+			# into the next frame.
+			self._stop.wait(max(period - (frametiming.clock() - start), 0))
+
+	def _serve(self):
+		buffers = {}
+		while not self._stop.is_set():
+			with self._lock:
+				new, self._new_clients = self._new_clients, []
+			for sock in new:
+				buffers[sock] = bytearray()
+			readable = select.select([self._listener] + list(buffers), [], [], 0.2)[0]
+			for sock in readable:
+				if sock is self._listener:
+					client = self._listener.accept()[0]
+					buffers[client] = bytearray()
+					continue
+				try:
+					data = sock.recv(65536)
+				except socket.error:
+					data = b''
+				if not data:
+					sock.close()
+					del buffers[sock]
+					continue
+				buffers[sock].extend(data)
+				try:
+					self._drain(buffers[sock])
+				except ValueError:
+					# Drop clients that send malformed messages.
+					sock.close()
+					del buffers[sock]
+		with self._lock:
+			new, self._new_clients = self._new_clients, []
+		for sock in list(buffers) + new:
+			sock.close()
+
+	def _drain(self, buf):
+		# Handle every complete message at the start of buf and remove them.
+		offset = 0
+		while len(buf) - offset >= HEADER.size:
+			kind, layer, x, y, width, height, length = HEADER.unpack_from(buf, offset)
+			if length > MAX_PAYLOAD:
+				raise ValueError('Payload too large.')
+			end = offset + HEADER.size + length
+			if len(buf) < end:
+				break
+			self.handle(kind, layer, x, y, width, height, bytes(buf[offset+HEADER.size:end]))
+			offset = end
+		del buf[:offset]
+
+
+class FrameClient(object):
+	"""Connection to a FrameServer.  Sends return as soon as the message is in
+	the socket buffer; the server never replies.
+	"""
+
+	def __init__(self, path=DEFAULT_SOCKET, sock=None):
+		"""Connect to the server listening at path, or use sock, a socket
+		already connected to one.
+		"""
+		if sock is None:
+			sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+			sock.connect(path)
+		self._sock = sock
+
+	def _send(self, kind, layer, x, y, pixels):
+		if pixels is None:
+			self._sock.sendall(HEADER.pack(kind, layer, x, y, 0, 0, 0))
+			return
+		if isinstance(pixels, Framebuffer):
+			pixels = pixels.pixels()
+		elif not isinstance(pixels, np.ndarray) or pixels.ndim == 3:
+			pixels = image_to_array(pixels)
+		pixels = np.ascontiguousarray(pixels, dtype='>u2')
+		height, width = pixels.shape
+		self._sock.sendall(HEADER.pack(kind, layer, x, y, width, height, pixels.nbytes))
+		self._sock.sendall(memoryview(pixels.reshape(-1).view(np.uint8)))
+
+	def frame(self, image, layer=0):
+		"""Replace layer with a full frame, a PIL image, Framebuffer or array
+		of 565 RGB values.
+		"""
+		self._send(MSG_FRAME, layer, 0, 0, image)
+
+	def rect(self, image, x, y, layer=0):
+		"""Draw image on layer with its top left corner at x, y."""
+		self._send(MSG_RECT, layer, x, y, image)
+
+	def clear(self, layer=0):
+		"""Remove layer, showing the layers below it."""
+		self._send(MSG_CLEAR, layer, 0, 0, None)
+
+	def close(self):
+		self._sock.close()
@@ -0,0 +1,127 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+
+
+# Monotonic where Python has it, so wall clock changes don't skew timings.
+clock = getattr(time, 'monotonic', time.time)
+
+# Upper bounds in milliseconds of the histogram buckets.  A final bucket
+# holds everything slower.
+DEFAULT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+STAGES = ('convert', 'window', 'transfer')
+
+
+class Histogram(object):
+	"""Histogram of durations with fixed millisecond buckets, plus count,
+	total, minimum and maximum.
+	"""
+
+	def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+		self.bounds = tuple(buckets_ms)
+		self.reset()
+
+	def reset(self):
+		"""Forget every recorded duration."""
+		self.counts = [0]*(len(self.bounds)+1)
+		self.count = 0
+		self.total = 0.0
+		self.min = None
+		self.max = None
+
+	def record(self, seconds):
+		"""Add a duration in seconds."""
+		ms = seconds*1000.0
+		for i, bound in enumerate(self.bounds):
+			if ms <= bound:
+				break
+		else:
+			i = len(self.bounds)
+		self.counts[i] += 1
+		self.count += 1
+		self.total += seconds
+		if self.min is None or seconds < self.min:
+			self.min = seconds
+		if self.max is None or seconds > self.max:
+			self.max = seconds
+
+	def as_dict(self):
+		"""Return the histogram as plain values suitable for JSON.  Buckets is
+		a list of [upper bound in ms, count] with None for the last bound.
+		"""
+		bounds = list(self.bounds) + [None]
+		return {
+			'count': self.count,
+			'mean_ms': self.total*1000.0/self.count if self.count else 0.0,
+			'min_ms': self.min*1000.0 if self.min is not None else None,
+			'max_ms': self.max*1000.0 if self.max is not None else None,
+			'buckets': [[bound, count] for bound, count in zip(bounds, self.counts)],
+		}
+
+
+class FrameTimer(object):
+	"""Per frame timings of each display stage: converting to 565 RGB,
+	setting address windows and transferring pixels.
+	"""
+
+	def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+		self.stages = dict((stage, Histogram(buckets_ms)) for stage in STAGES)
+
+	def record(self, stage, seconds):
+		"""Add the time one frame spent in stage."""
+		self.stages[stage].record(seconds)
+
+	def reset(self):
+		"""Forget every recorded timing."""
+		for histogram in self.stages.values():
+			histogram.reset()
+
+	def as_dict(self):
+		"""Return every stage's histogram, see Histogram.as_dict()."""
+		return dict((stage, histogram.as_dict())
+			for stage, histogram in self.stages.items())
+
+
+class Governor(object):
+	"""Limit frames to a target rate.  A frame may go out once a period has
+	passed since the previous one started.  Frames arriving sooner are
+	coalesced by the caller, which keeps only the newest.
+	"""
+
+	def __init__(self, fps):
+		if fps <= 0:
+			raise ValueError('Target frame rate must be positive.')
+		self.fps = fps
+		self.period = 1.0/fps
+		self._due = 0.0
+
+	def delay(self):
+		"""Return the seconds until the next frame may be sent, 0 if now."""
+		return max(self._due - clock(), 0.0)
+
+	def start_frame(self):
+		"""Note that a frame is being sent now."""
+		now = clock()
+		# Keep the cadence through small delays, but pace from the actual start
+		# when a whole slot was missed so missed slots don't pile up.
+		if now - self._due >= self.period:
+			self._due = now
+		self._due += self.period
@@ -0,0 +1,164 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFont
+
+from framebuffer import Framebuffer
+from rgb565 import image_to_array, to_color565
+
+
+DEFAULT_MAX_GLYPHS = 512
+
+# Transposes turning a glyph by each counter clockwise rotation, exact where
+# Image.rotate() would resample.
+_TRANSPOSES = {
+	90:  Image.ROTATE_90,
+	180: Image.ROTATE_180,
+	270: Image.ROTATE_270,
+}
+
+
+class GlyphCache(object):
+	"""Least recently used cache of glyphs rendered to 565 RGB tiles, keyed by
+	font, character, colors and rotation.  Each glyph is rasterised by PIL
+	once and later strings only copy its tile.
+	"""
+
+	def __init__(self, max_glyphs=DEFAULT_MAX_GLYPHS):
+		self.max_glyphs = max_glyphs
+		self.hits = 0
+		self.misses = 0
+		self._tiles = OrderedDict()
+
+	def glyph(self, font, char, fg, bg, rotation=0, height=None):
+		"""Return the (height, width) tile of char drawn in font with fg on bg,
+		rotated counter clockwise by 0, 90, 180 or 270 degrees.  Before
+		rotation the tile is as wide as the character's advance and height
+		pixels high, the font's line height if not given.
+		"""
+		if rotation not in (0, 90, 180, 270):
+			raise ValueError('Rotation must be 0, 90, 180 or 270.')
+		fg, bg = to_color565(fg), to_color565(bg)
+		key = (font, char, fg, bg, rotation, height)
+		tile = self._tiles.pop(key, None)
+		if tile is not None:
+			self.hits += 1
+		else:
+			self.misses += 1
+			tile = self._render(font, char, fg, bg, rotation, height)
+			if len(self._tiles) >= self.max_glyphs:
+				self._tiles.popitem(last=False)
+		# Reinsert so the most recently used glyphs are last.
+		self._tiles[key] = tile
+		return tile
+
+	def _render(self, font, char, fg, bg, rotation, height):
+		width = font.getsize(char)[0]
+		if height is None:
+			height = line_height(font)
+		image = Image.new('RGB', (max(width, 1), height), _rgb(bg))
+		ImageDraw.Draw(image).text((0, 0), char, font=font, fill=_rgb(fg))
+		if rotation:
+			image = image.transpose(_TRANSPOSES[rotation])
+		tile = image_to_array(image)
+		tile.flags.writeable = False
+		return tile
+
+	def clear(self):
+		"""Forget every cached glyph."""
+		self._tiles.clear()
+
+	def __len__(self):
+		return len(self._tiles)
+
+
+def line_height(font):
+	"""Return the height of a line of text in font."""
+	return font.getsize('Ag')[1]
+
+def _rgb(color):
+	# Glyphs are drawn on RGB images, so turn 565 values back into tuples.
+	if isinstance(color, tuple):
+		return color
+	return ((color >> 8) & 0xF8, (color >> 3) & 0xFC, (color << 3) & 0xF8)
+
+
+# Shared by renderers that aren't given their own cache.
+_default_cache = GlyphCache()
+
+
+class TextRenderer(object):
+	"""Draw strings by copying cached glyph tiles, into a Framebuffer or
+	straight to an ILI9341 or HX8357 panel, instead of rendering them with
+	PIL each time.  Suited to readouts that change several times a second.
+	Glyphs are placed by their advance widths, so kerning is ignored.
+	"""
+
+	def __init__(self, font=None, fg=(255,255,255), bg=(0,0,0), rotation=0,
+		cache=None):
+		"""Create a renderer drawing fg text on a bg background in font, PIL's
+		default font if not given.  Rotation turns text counter clockwise by
+		0, 90, 180 or 270 degrees like Image.rotate().
+		"""
+		self.font = font if font is not None else ImageFont.load_default()
+		self.fg = fg
+		self.bg = bg
+		self.rotation = rotation
+		self.cache = cache if cache is not None else _default_cache
+		self._height = line_height(self.font)
+
+	def render(self, text):
+		"""Return text as a (height, width) array of 565 RGB values."""
+		tiles = [self.cache.glyph(self.font, char, self.fg, self.bg,
+			self.rotation, self._height) for char in text]
+		if not tiles:
+			size = (self._height, 0) if self.rotation in (0, 180) else (0, self._height)
+			return np.zeros(size, dtype='>u2')
+		# Rotated text runs down or up the screen and upside down text runs
+		# right to left, so the tiles are joined in that order.
+		if self.rotation in (90, 180):
+			tiles.reverse()
+		if self.rotation in (0, 180):
+			return np.hstack(tiles)
+		return np.vstack(tiles)
+
+	def size(self, text):
+		"""Return the (width, height) in pixels of text as it is drawn."""
+		height, width = self.render(text).shape
+		return (width, height)
+
+	def draw(self, target, text, x=0, y=0):
+		"""Draw text with its top left corner at x, y on target, either a
+		Framebuffer or a display whose panel is written directly through
+		display_rect().  Text is clipped to a Framebuffer but must fit on a
+		panel.  Returns the (width, height) drawn.
+		"""
+		pixels = self.render(text)
+		if pixels.size:
+			if isinstance(target, Framebuffer):
+				target.blit(pixels, x, y)
+			else:
+				target.display_rect(pixels, x, y)
+		height, width = pixels.shape
+		return (width, height)
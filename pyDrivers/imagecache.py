@@ -0,0 +1,153 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import errno
+import hashlib
+import mmap
+import os
+
+import numpy as np
+from PIL import Image
+
+from rgb565 import image_to_data
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pyDrivers', 'images')
+DEFAULT_MAX_BYTES = 64*1024*1024
+
+CACHE_SUFFIX = '.rgb565'
+
+
+def load_image(path, width, height):
+	"""Default loader for ImageCache: open an image file and stretch it to
+	width x height pixels.
+	"""
+	return Image.open(path).convert('RGB').resize((width, height))
+
+
+class ImageCache(object):
+	"""On-disk cache of images converted to panel ready 565 RGB pixels.  Each
+	image is decoded and converted once per file version and target size, and
+	later lookups memory map the cached pixels so showing them costs only the
+	SPI transfer.  Least recently used entries are removed once the cache
+	grows beyond max_bytes.
+	"""
+
+	def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+		loader=load_image):
+		"""Create a cache storing its files in directory.  Loader is called as
+		loader(path, width, height) on a miss and must return a PIL image of
+		exactly that size.
+		"""
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self._loader = loader
+		self.hits = 0
+		self.misses = 0
+		try:
+			os.makedirs(directory)
+		except OSError as e:
+			if e.errno != errno.EEXIST:
+				raise
+
+	def _entry_path(self, path, width, height):
+		# Key on the file's identity and version plus the target geometry, so
+		# edited files and other display sizes get their own entries.
+		st = os.stat(path)
+		key = '{0}\0{1}\0{2}\0{3}x{4}'.format(os.path.abspath(path),
+			st.st_mtime, st.st_size, width, height)
+		return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + CACHE_SUFFIX)
+
+	def get(self, path, width, height):
+		"""Return the image at path as a (height, width) array of big-endian
+		565 RGB values, converting and storing it on the first request.  The
+		array is a read-only memory map of the cache file.
+		"""
+		entry = self._entry_path(path, width, height)
+		size = width*height*2
+		pixels = self._map(entry, size)
+		if pixels is None:
+			self.misses += 1
+			data = image_to_data(self._loader(path, width, height))
+			self._store(entry, data)
+			pixels = self._map(entry, size)
+			if pixels is None:
+				# Too big to keep under max_bytes, so serve it from memory.
+				pixels = data.view('>u2')
+		else:
+			self.hits += 1
+			# Touch the entry so eviction sees it as recently used.
+			os.utime(entry, None)
+		return pixels.reshape(height, width)
+
+	def show(self, display, path):
+		"""Write the image at path to an ILI9341 or HX8357 display, sized to
+		its current width and height.
+		"""
+		display.display_frame(self.get(path, display.width, display.height))
+
+	def _map(self, entry, size):
+		try:
+			with open(entry, 'rb') as f:
+				if os.fstat(f.fileno()).st_size != size:
+					return None
+				data = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+		except (IOError, OSError):
+			return None
+		return np.frombuffer(data, dtype='>u2')
+
+	def _store(self, entry, data):
+		# Write to a temporary file and rename it into place so readers in
+		# other processes never map a partly written entry.
+		temp = '{0}.{1}.tmp'.format(entry, os.getpid())
+		with open(temp, 'wb') as f:
+			data.tofile(f)
+		os.rename(temp, entry)
+		self.evict()
+
+	def evict(self):
+		"""Remove least recently used entries until the cache fits in
+		max_bytes.
+		"""
+		entries = []
+		total = 0
+		for name in os.listdir(self.directory):
+			if not name.endswith(CACHE_SUFFIX):
+				continue
+			try:
+				st = os.stat(os.path.join(self.directory, name))
+			except OSError:
+				continue
+			entries.append((st.st_mtime, st.st_size, name))
+			total += st.st_size
+		entries.sort()
+		for mtime, size, name in entries:
+			if total <= self.max_bytes:
+				break
+			try:
+				os.remove(os.path.join(self.directory, name))
+			except OSError:
+				pass
+			total -= size
+
+	def clear(self):
+		"""Remove every entry from the cache."""
+		for name in os.listdir(self.directory):
+			if name.endswith(CACHE_SUFFIX):
+				os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,215 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import threading
+import time
+
+import numpy as np
+
+import frametiming
+from framebuffer import Framebuffer
+from rgb565 import image_to_data
+
+
+class FrameFuture(object):
+	"""Result of a frame submitted to a DisplayPipeline.  It completes when
+	the frame has been written to the panel or was dropped because a newer
+	frame replaced it before it could be sent.
+	"""
+
+	def __init__(self):
+		self._event = threading.Event()
+		self._lock = threading.Lock()
+		self._callbacks = []
+		self._error = None
+		self.dropped = False
+
+	def done(self):
+		"""Return True once the frame was written, dropped or failed."""
+		return self._event.is_set()
+
+	def wait(self, timeout=None):
+		"""Wait for the frame to complete, returning False on timeout."""
+		self._event.wait(timeout)
+		return self._event.is_set()
+
+	def result(self, timeout=None):
+		"""Wait for the frame and return True if it was written to the panel or
+		False if it was dropped.  Reraises any error from writing the frame.
+		"""
+		if not self.wait(timeout):
+			raise RuntimeError('Timed out waiting for frame.')
+		if self._error is not None:
+			raise self._error
+		return not self.dropped
+
+	def add_done_callback(self, callback):
+		"""Call callback with this future when it completes, immediately if it
+		already has.  Callbacks run on the pipeline's worker thread.
+		"""
+		with self._lock:
+			if not self._event.is_set():
+				self._callbacks.append(callback)
+				return
+		callback(self)
+
+	def _finish(self, dropped=False, error=None):
+		with self._lock:
+			self.dropped = dropped
+			self._error = error
+			self._event.set()
+			callbacks, self._callbacks = self._callbacks, []
+		for callback in callbacks:
+			callback(self)
+
+
+class DisplayPipeline(object):
+	"""Write frames to an ILI9341 or HX8357 from background threads.  One
+	thread converts the newest submitted frame to 565 RGB while another
+	writes the previous one over SPI, using two frame buffers.  If frames are
+	submitted faster than the bus can take them, frames that were never
+	started are dropped in favour of the newest one.
+
+	While a pipeline is running it owns the display, so don't call the
+	display's own display() or drawing commands from other threads.
+	"""
+
+	def __init__(self, display):
+		self._display = display
+		self._cond = threading.Condition()
+		shape = (display.height, display.width)
+		self._free = [np.zeros(shape, dtype='>u2'), np.zeros(shape, dtype='>u2')]
+		self._submitted = None
+		self._converted = None
+		self._closed = False
+		self.frames_shown = 0
+		self.frames_dropped = 0
+		self._threads = [threading.Thread(target=self._convert_loop),
+			threading.Thread(target=self._send_loop)]
+		for thread in self._threads:
+			thread.daemon = True
+			thread.start()
+
+	def submit(self, image, full=False, callback=None):
+		"""Queue a frame and return a FrameFuture without waiting for it.
+		Image can be a PIL image, a Framebuffer or a (height, width) array of
+		565 RGB values.  It is converted on a worker thread, so don't modify it
+		afterwards; submit a copy if you want to keep drawing on it.  If given,
+		callback is called with the future when the frame completes.
+		"""
+		future = FrameFuture()
+		if callback is not None:
+			future.add_done_callback(callback)
+		with self._cond:
+			if self._closed:
+				raise RuntimeError('Display pipeline is closed.')
+			stale, self._submitted = self._submitted, (image, full, future)
+			if stale is not None:
+				self.frames_dropped += 1
+			self._cond.notify_all()
+		if stale is not None:
+			stale[2]._finish(dropped=True)
+		return future
+
+	def flush(self, timeout=None):
+		"""Wait until every submitted frame is written or dropped.  Returns
+		False if timeout seconds passed first.
+		"""
+		deadline = None if timeout is None else time.time() + timeout
+		with self._cond:
+			while self._submitted is not None or self._converted is not None \
+				or len(self._free) < 2:
+				if deadline is None:
+					self._cond.wait()
+				else:
+					remaining = deadline - time.time()
+					if remaining <= 0:
+						return False
+					self._cond.wait(remaining)
+		return True
+
+	def close(self):
+		"""Write any outstanding frame and stop the worker threads."""
+		self.flush()
+		with self._cond:
+			self._closed = True
+			self._cond.notify_all()
+		for thread in self._threads:
+			thread.join()
+
+	def _convert_loop(self):
+		while True:
+			with self._cond:
+				while not self._closed and (self._submitted is None or not self._free):
+					self._cond.wait()
+				if self._closed:
+					return
+				image, full, future = self._submitted
+				self._submitted = None
+				pixels = self._free.pop()
+			try:
+				if isinstance(image, Framebuffer):
+					np.copyto(pixels, image.pixels())
+				elif isinstance(image, np.ndarray) and image.ndim == 2:
+					np.copyto(pixels, image)
+				else:
+					start = frametiming.clock()
+					image_to_data(image, pixels, self._display.conversion)
+					timing = self._display.timing
+					if timing is not None:
+						timing.record('convert', frametiming.clock() - start)
+			except Exception as e:
+				with self._cond:
+					self._free.append(pixels)
+					self._cond.notify_all()
+				future._finish(error=e)
+				continue
+			with self._cond:
+				# Wait for the sender to take the previous converted frame.
+				while not self._closed and self._converted is not None:
+					self._cond.wait()
+				self._converted = (pixels, full, future)
+				self._cond.notify_all()
+
+	def _send_loop(self):
+		while True:
+			with self._cond:
+				while not self._closed and self._converted is None:
+					self._cond.wait()
+				if self._converted is None:
+					return
+				pixels, full, future = self._converted
+				self._converted = None
+				self._cond.notify_all()
+			# Honour the display's target frame rate.  Newer submissions replace
+			# the frame waiting to be converted meanwhile.
+			delay = self._display._governor_delay()
+			if delay > 0:
+				time.sleep(delay)
+			error = None
+			try:
+				self._display.display_frame(pixels, full)
+			except Exception as e:
+				error = e
+			with self._cond:
+				self._free.append(pixels)
+				if error is None:
+					self.frames_shown += 1
+				self._cond.notify_all()
+			future._finish(error=error)
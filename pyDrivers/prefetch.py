@@ -0,0 +1,162 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import threading
+
+from imagecache import load_image
+from rgb565 import image_to_data
+
+
+# Number of images on each side of the current one to keep ready.
+DEFAULT_RADIUS = 2
+
+
+class Prefetcher(object):
+	"""Load the images around the one currently shown on background threads,
+	so moving to a neighbouring image finds its 565 RGB frame already
+	converted.  Only frames within radius of the current image are kept in
+	memory.  Images that fail to load are remembered with their error, so
+	bad files are found before they are shown.
+	"""
+
+	def __init__(self, paths, width, height, radius=DEFAULT_RADIUS, workers=1,
+		cache=None, loader=load_image):
+		"""Prefetch frames of width x height pixels for the image files in
+		paths.  If cache is an ImageCache, frames are loaded through it,
+		otherwise loader is called as loader(path, width, height) and must
+		return a PIL image of that size.
+		"""
+		self.paths = list(paths)
+		self.width = width
+		self.height = height
+		self.radius = radius
+		self.hits = 0
+		self.misses = 0
+		self._cache = cache
+		self._loader = loader
+		self._cond = threading.Condition()
+		self._frames = {}
+		self._wanted = set()
+		self._pending = []
+		self._loading = set()
+		self._closed = False
+		self._threads = []
+		for i in range(max(1, workers)):
+			thread = threading.Thread(target=self._worker)
+			thread.daemon = True
+			thread.start()
+			self._threads.append(thread)
+
+	def _window(self, index):
+		# The current image first, then its neighbours nearest first,
+		# alternating forwards and backwards.
+		indices = [index]
+		for offset in range(1, self.radius+1):
+			for i in (index+offset, index-offset):
+				if 0 <= i < len(self.paths):
+					indices.append(i)
+		return indices
+
+	def focus(self, index):
+		"""Make index the current image.  It and its neighbours are queued
+		for loading and frames outside the window are released.
+		"""
+		window = self._window(index)
+		with self._cond:
+			self._wanted = set(window)
+			for i in list(self._frames):
+				if i not in self._wanted:
+					del self._frames[i]
+			self._pending = [i for i in window
+				if i not in self._frames and i not in self._loading]
+			self._cond.notify_all()
+
+	def error(self, index):
+		"""Return the error raised loading image index, or None if it loaded
+		or hasn't been loaded yet.
+		"""
+		with self._cond:
+			entry = self._frames.get(index)
+		return entry[1] if entry is not None else None
+
+	def get(self, index):
+		"""Return the (height, width) array of 565 RGB values for image index,
+		waiting if it is still being loaded.  Raises the error that loading
+		it raised, such as an IOError for a damaged file.
+		"""
+		with self._cond:
+			if index in self._frames:
+				self.hits += 1
+			else:
+				self.misses += 1
+				self._wanted.add(index)
+				if index not in self._loading:
+					if index in self._pending:
+						self._pending.remove(index)
+					self._pending.insert(0, index)
+					self._cond.notify_all()
+				while index not in self._frames:
+					if self._closed:
+						raise RuntimeError('Prefetcher is closed.')
+					self._cond.wait()
+			pixels, error = self._frames[index]
+		if error is not None:
+			raise error
+		return pixels
+
+	def show(self, display, index):
+		"""Write image index to an ILI9341 or HX8357 display."""
+		display.display_frame(self.get(index))
+
+	def close(self):
+		"""Stop the worker threads and release every frame."""
+		with self._cond:
+			self._closed = True
+			self._frames.clear()
+			self._cond.notify_all()
+		for thread in self._threads:
+			thread.join()
+
+	def _load(self, index):
+		path = self.paths[index]
+		if self._cache is not None:
+			return self._cache.get(path, self.width, self.height)
+		data = image_to_data(self._loader(path, self.width, self.height))
+		return data.view('>u2').reshape(self.height, self.width)
+
+	def _worker(self):
+		while True:
+			with self._cond:
+				while not self._closed and not self._pending:
+					self._cond.wait()
+				if self._closed:
+					return
+				index = self._pending.pop(0)
+				self._loading.add(index)
+			pixels, error = None, None
+			try:
+				pixels = self._load(index)
+			except Exception as e:
+				error = e
+			with self._cond:
+				self._loading.discard(index)
+				# Drop frames the window moved past while they were loading.
+				if index in self._wanted and not self._closed:
+					self._frames[index] = (pixels, error)
+				self._cond.notify_all()
@@ -0,0 +1,228 @@
+# Copyright (c) 2014 Adafruit Industries
+# Author: Tony DiCola
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import threading
+import time
+
+import numpy as np
+
+
+def color565(r, g, b):
+	"""Convert red, green, blue components to a 16-bit 565 RGB value. Components
+	should be values 0 to 255.
+	"""
+	return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+def to_color565(color):
+	"""Return a 16-bit 565 RGB value for color, which can either be a 565 value
+	already or a tuple of red, green, blue components.
+	"""
+	if isinstance(color, tuple):
+		return color565(*color[:3])
+	return color
+
+def _rgb_array(image):
+	# Return a (height, width, 3) uint8 array for a PIL image or an RGB(A)
+	# array, without copying RGB images more than PIL requires.
+	if isinstance(image, np.ndarray):
+		return image[:,:,:3]
+	if image.mode != 'RGB':
+		image = image.convert('RGB')
+	return np.asarray(image)
+
+def _scratch_frame(shape):
+	# Per thread uint16 work frame, reused between calls of the same size so
+	# conversions don't allocate full frame temporaries.
+	frame = getattr(_scratch, 'frame', None)
+	if frame is None or frame.shape != shape:
+		frame = _scratch.frame = np.empty(shape, dtype=np.uint16)
+	return frame
+
+_scratch = threading.local()
+
+def _convert_shift(rgb, color):
+	# Build the 565 value directly in a big-endian view of the output so the
+	# high byte lands first without a separate byte swap or dstack.
+	color = color.view('>u2')
+	np.bitwise_and(rgb[:,:,0], 0xF8, out=color)
+	color <<= 8
+	color |= np.left_shift(rgb[:,:,1] & 0xFC, 3, dtype=np.uint16)
+	color |= rgb[:,:,2] >> 3
+
+def _convert_byteswap(rgb, color):
+	# Do the arithmetic on a native endian view, which NumPy handles faster,
+	# then swap the bytes in place once at the end.
+	color = color.view(np.uint16)
+	scratch = _scratch_frame(color.shape)
+	np.bitwise_and(rgb[:,:,0], 0xF8, out=color)
+	color <<= 8
+	np.bitwise_and(rgb[:,:,1], 0xFC, out=scratch)
+	scratch <<= 3
+	color |= scratch
+	np.right_shift(rgb[:,:,2], 3, out=scratch)
+	color |= scratch
+	color.byteswap(True)
+
+# Per channel lookup tables holding each component's bits of the 565 value,
+# already byte swapped so they combine into big-endian pixels natively.
+_LUT_RED = ((np.arange(256, dtype=np.uint16) & 0xF8) << 8).byteswap()
+_LUT_GREEN = ((np.arange(256, dtype=np.uint16) & 0xFC) << 3).byteswap()
+_LUT_BLUE = (np.arange(256, dtype=np.uint16) >> 3).byteswap()
+
+def _convert_lut(rgb, color):
+	color = color.view(np.uint16)
+	scratch = _scratch_frame(color.shape)
+	np.take(_LUT_RED, rgb[:,:,0], out=color)
+	np.take(_LUT_GREEN, rgb[:,:,1], out=scratch)
+	color |= scratch
+	np.take(_LUT_BLUE, rgb[:,:,2], out=scratch)
+	color |= scratch
+
+# 4x4 Bayer matrix used by the dithered conversion, and the per size tiled
+# thresholds built from it for the 5 bit and 6 bit channels.
+_BAYER = np.array([[ 0,  8,  2, 10],
+                   [12,  4, 14,  6],
+                   [ 3, 11,  1,  9],
+                   [15,  7, 13,  5]], dtype=np.uint16)
+_thresholds = {}
+
+def _dither_thresholds(shape):
+	thresholds = _thresholds.get(shape)
+	if thresholds is None:
+		height, width = shape
+		tiled = np.tile(_BAYER, ((height+3)//4, (width+3)//4))[:height, :width]
+		thresholds = _thresholds[shape] = (tiled // 2, tiled // 4)
+	return thresholds
+
+def _convert_dither(rgb, color):
+	# Ordered dither: add a position dependent fraction of one output step
+	# before truncating, so gradients don't show 565 banding.
+	color = color.view(np.uint16)
+	scratch = _scratch_frame(color.shape)
+	five, six = _dither_thresholds(color.shape)
+	np.add(rgb[:,:,0], five, out=color)
+	np.minimum(color, 255, out=color)
+	color &= 0xF8
+	color <<= 8
+	np.add(rgb[:,:,1], six, out=scratch)
+	np.minimum(scratch, 255, out=scratch)
+	scratch &= 0xFC
+	scratch <<= 3
+	color |= scratch
+	np.add(rgb[:,:,2], five, out=scratch)
+	np.minimum(scratch, 255, out=scratch)
+	scratch >>= 3
+	color |= scratch
+	color.byteswap(True)
+
+# Conversion methods accepted by image_to_data().  Dither changes the output,
+# the others produce identical pixels at different speeds.  See
+# benchmarks/conversion.py for timings.
+METHODS = {
+	'shift':    _convert_shift,
+	'byteswap': _convert_byteswap,
+	'lut':      _convert_lut,
+	'dither':   _convert_dither,
+}
+DEFAULT_METHOD = 'byteswap'
+
+def palette_lut(palette):
+	"""Return a 256 entry array of big-endian 565 RGB values for palette, a
+	sequence of up to 256 colors as 565 values or (red, green, blue) tuples.
+	Missing entries are black.
+	"""
+	lut = np.zeros(256, dtype='>u2')
+	for i, color in enumerate(list(palette)[:256]):
+		lut[i] = to_color565(color)
+	return lut
+
+def image_palette(image):
+	"""Return the palette of a PIL 'P' mode image as a list of (red, green,
+	blue) tuples.
+	"""
+	flat = image.getpalette() or []
+	return list(zip(flat[0::3], flat[1::3], flat[2::3]))
+
+def image_to_data(image, out=None, method=DEFAULT_METHOD):
+	"""Convert a PIL image, or a (height, width, 3) RGB uint8 NumPy array, to
+	16-bit 565 RGB bytes.  'P' mode images are looked up in their palette.
+	The bytes are written into out, a contiguous NumPy array (or other
+	writable buffer) holding width*height*2 bytes, which is allocated if not
+	provided.  Method picks one of the METHODS for RGB images.  Returns the
+	filled uint8 array, which can be passed straight to send().
+	"""
+	#NumPy is much faster at doing this. NumPy code provided by:
+	#Keith (https://www.blogger.com/profile/02555547344016007163)
+	if not isinstance(image, np.ndarray) and image.mode == 'P':
+		# Indexed images convert with one lookup through their palette.
+		indexes = np.asarray(image)
+		height, width = indexes.shape
+		if out is None:
+			out = np.empty(width*height*2, dtype=np.uint8)
+		out = np.frombuffer(out, dtype=np.uint8)
+		np.take(palette_lut(image_palette(image)), indexes,
+			out=out.view('>u2').reshape(height, width))
+		return out
+	rgb = _rgb_array(image)
+	height, width = rgb.shape[:2]
+	if out is None:
+		out = np.empty(width*height*2, dtype=np.uint8)
+	out = np.frombuffer(out, dtype=np.uint8)
+	METHODS[method](rgb, out.reshape(height, width*2))
+	return out
+
+def fastest_method(width, height, repeat=5):
+	"""Time the exact (not dithered) methods on a width x height frame and
+	return the name of the fastest on this machine.
+	"""
+	rgb = np.zeros((height, width, 3), dtype=np.uint8)
+	out = np.empty(width*height*2, dtype=np.uint8)
+	timings = []
+	for method in sorted(METHODS):
+		if method == 'dither':
+			continue
+		start = time.time()
+		for i in range(repeat):
+			image_to_data(rgb, out, method)
+		timings.append((time.time() - start, method))
+	return min(timings)[1]
+
+def image_to_array(image):
+	"""Convert a PIL image or RGB array to a (height, width) array of
+	big-endian 16-bit 565 RGB values, the layout the panels expect.
+	"""
+	if isinstance(image, np.ndarray):
+		height, width = image.shape[:2]
+	else:
+		width, height = image.size
+	return image_to_data(image).view('>u2').reshape(height, width)
+
+def array_to_image(pixels):
+	"""Convert a (height, width) array of 16-bit 565 RGB values back to a PIL
+	RGB image.
+	"""
+	from PIL import Image
+	pixels = np.asarray(pixels, dtype=np.uint16)
+	rgb = np.empty(pixels.shape + (3,), dtype=np.uint8)
+	# Replicate the high bits into the low bits so white stays 255.
+	rgb[:,:,0] = ((pixels >> 8) & 0xF8) | (pixels >> 13)
+	rgb[:,:,1] = ((pixels >> 3) & 0xFC) | ((pixels >> 9) & 0x03)
+	rgb[:,:,2] = ((pixels << 3) & 0xF8) | ((pixels >> 2) & 0x07)
+	return Image.fromarray(rgb, 'RGB')
@@ -0,0 +1,209 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import mmap
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+from PIL import ImageDraw
+
+import frametiming
+from framebuffer import Framebuffer
+import rgb565
+
+
+# Shared framebuffers are kept in RAM backed /dev/shm where available.
+DEFAULT_PATH = '/dev/shm/pyDrivers-fb0'
+DEFAULT_FPS = 20
+
+# Pixel layout of shared framebuffers: native little-endian 565 RGB rows, the
+# layout of a 16 bit Linux fbdev and of Qt's QImage::Format_RGB16, so the same
+# renderer code can draw into either.
+PIXEL_DTYPE = '<u2'
+
+
+def _map(path, size, create):
+	# Open path (creating it at size bytes if asked) and memory map it.
+	flags = os.O_RDWR | (os.O_CREAT if create else 0)
+	fd = os.open(path, flags, 0o666)
+	try:
+		if create and os.fstat(fd).st_size != size:
+			os.ftruncate(fd, size)
+		return mmap.mmap(fd, size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+	finally:
+		os.close(fd)
+
+def attach(path=DEFAULT_PATH, width=240, height=320):
+	"""Map an existing shared framebuffer in another process and return a
+	writable (height, width) array of little-endian 565 RGB pixels.  Writes
+	show up on the panel at the owner's next flush.
+	"""
+	data = _map(path, width*height*2, create=False)
+	return np.frombuffer(data, dtype=PIXEL_DTYPE).reshape(height, width)
+
+
+class SharedFramebuffer(object):
+	"""Expose an ILI9341 or HX8357 as a memory mapped framebuffer file that
+	any process can draw into, such as a C or Qt renderer next to a Python
+	agent.  A flusher thread compares the file with what the panel shows
+	fps times a second and writes only the damaged regions, using the
+	display's partial updates.  The file holds width*height little-endian
+	565 RGB pixels and no header.
+	"""
+
+	def __init__(self, display, path=DEFAULT_PATH, fps=DEFAULT_FPS):
+		"""Create (or reuse) the file at path sized for display's current
+		width and height.  Call start() to begin flushing.
+		"""
+		self._display = display
+		self.path = path
+		self.fps = fps
+		self.width = display.width
+		self.height = display.height
+		self._data = _map(path, self.width*self.height*2, create=True)
+		self.array = np.frombuffer(self._data, dtype=PIXEL_DTYPE).reshape(self.height, self.width)
+		# Panel order copy of the file taken each flush, so other processes
+		# drawing mid transfer can't tear the frame being sent.
+		self._frame = np.empty((self.height, self.width), dtype='>u2')
+		self._stop = threading.Event()
+		self._thread = None
+		self.flushes = 0
+
+	def flush(self, full=False):
+		"""Write any regions of the file that changed since the last flush to
+		the panel.
+		"""
+		# Assigning across the byte orders swaps every pixel in one pass.
+		self._frame[...] = self.array
+		self._display.display_frame(self._frame, full)
+		self.flushes += 1
+
+	def start(self):
+		"""Start the flusher thread."""
+		if self._thread is not None:
+			return
+		self._stop.clear()
+		self._thread = threading.Thread(target=self._run)
+		self._thread.daemon = True
+		self._thread.start()
+
+	def stop(self):
+		"""Stop the flusher thread after a final flush."""
+		if self._thread is None:
+			return
+		self._stop.set()
+		self._thread.join()
+		self._thread = None
+		self.flush()
+
+	def close(self, unlink=False):
+		"""Stop flushing and unmap the file, removing it if unlink is True."""
+		self.stop()
+		self.array = None
+		self._data.close()
+		if unlink:
+			os.remove(self.path)
+
+	def _run(self):
+		period = 1.0/self.fps
+		deadline = frametiming.clock()
+		while not self._stop.is_set():
+			self.flush()
+			deadline = max(deadline + period, frametiming.clock())
+			self._stop.wait(max(deadline - frametiming.clock(), 0))
+
+
+class FbdevPanel(object):
+	"""Draw on a panel driven by a kernel framebuffer driver such as fbtft
+	through its /dev/fbN device, with the same buffer, clear(), draw(),
+	display(), display_frame() and display_rect() calls as the SPI drivers.
+	The kernel flushes the panel, and other processes can map the same
+	device.  Geometry is read from sysfs unless given, so a plain file can
+	stand in for the device.
+	"""
+
+	def __init__(self, device='/dev/fb1', width=None, height=None, stride=None):
+		"""Map device.  Width, height and stride (bytes per row) default to the
+		values in /sys/class/graphics/fbN.  Only 16 bit 565 RGB framebuffers
+		are supported.
+		"""
+		if width is None or height is None or stride is None:
+			sysfs = os.path.join('/sys/class/graphics', os.path.basename(device))
+			bpp = int(_read(sysfs, 'bits_per_pixel'))
+			if bpp != 16:
+				raise ValueError('Framebuffer must be 16 bits per pixel, not {0}.'.format(bpp))
+			size = _read(sysfs, 'virtual_size').split(',')
+			width = width if width is not None else int(size[0])
+			height = height if height is not None else int(size[1])
+			stride = stride if stride is not None else int(_read(sysfs, 'stride'))
+		self.width = width
+		self.height = height
+		self._data = _map(device, stride*height, create=False)
+		rows = np.frombuffer(self._data, dtype=PIXEL_DTYPE).reshape(height, stride//2)
+		self.array = rows[:, :width]
+		# Image buffer written by display() without an image.
+		self.buffer = Image.new('RGB', (width, height))
+
+	def display_frame(self, pixels, full=False, rects=None):
+		"""Copy a (height, width) array of 565 RGB values to the framebuffer.
+		Full and rects are accepted for compatibility; the kernel driver
+		tracks damage itself.
+		"""
+		self.array[...] = pixels
+
+	def display(self, image=None, full=False):
+		"""Convert the image buffer, or the provided PIL image, RGB array or
+		Framebuffer, and copy it to the framebuffer.
+		"""
+		if image is None:
+			image = self.buffer
+		if isinstance(image, Framebuffer):
+			self.display_frame(image.pixels())
+		else:
+			self.display_frame(rgb565.image_to_array(image))
+		return True
+
+	def display_rect(self, pixels, x=0, y=0):
+		"""Copy a (height, width) array of 565 RGB values to the framebuffer
+		with its top left corner at x, y.  The array must fit on the panel.
+		"""
+		height, width = np.shape(pixels)
+		if x < 0 or y < 0 or x+width > self.width or y+height > self.height:
+			raise ValueError('Rectangle does not fit on the display.')
+		self.array[y:y+height, x:x+width] = pixels
+
+	def clear(self, color=(0,0,0)):
+		"""Clear the image buffer to the specified RGB color (default black)."""
+		self.buffer.paste(color, (0, 0) + self.buffer.size)
+
+	def draw(self):
+		"""Return a PIL ImageDraw instance for 2D drawing on the image buffer."""
+		return ImageDraw.Draw(self.buffer)
+
+	def close(self):
+		"""Unmap the device."""
+		self.array = None
+		self._data.close()
+
+
+def _read(directory, name):
+	with open(os.path.join(directory, name)) as f:
+		return f.read().strip()
@@ -0,0 +1,554 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import numbers
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+from PIL import ImageDraw
+
+import Adafruit_GPIO.Platform as Platform
+import Adafruit_GPIO as GPIO
+import Adafruit_GPIO.SPI as SPI
+
+import animation
+import dirty
+import frametiming
+from framebuffer import Framebuffer, PaletteFramebuffer
+from pipeline import DisplayPipeline
+import rgb565
+from rgb565 import image_to_data, to_color565
+
+
+# MIPI DCS commands shared by the panels.
+CASET  = 0x2A		# Column address set
+PASET  = 0x2B		# Page (row) address set
+RAMWR  = 0x2C		# Memory write
+MADCTL = 0x36		# Memory access control
+
+# Pixels per write for fill_rect() on SPI devices without a max_transfer.
+FILL_CHUNK = 2048
+
+
+def run_command_table(panel, table):
+	"""Send a table of panel commands.  Each entry is a tuple of the command
+	opcode, a sequence of parameter bytes (or None) and the number of seconds
+	to wait afterwards.  Parameters go out in a single data transaction, so
+	D/C only changes between a command and its parameters.  Panel must
+	provide command() and data() like SpiPanel.
+	"""
+	for opcode, params, delay in table:
+		panel.command(opcode)
+		if params:
+			panel.data(list(params))
+		if delay:
+			time.sleep(delay)
+
+
+class SpiPanel(object):
+	"""Shared transport for TFT panels driven over SPI with a D/C pin, such as
+	the ILI9341 and HX8357.  It tracks the D/C level, remembers the last
+	address window so unchanged CASET/PASET commands are skipped, converts
+	frames into preallocated buffers and only writes the regions that
+	changed.  A panel subclass provides the INIT command table for
+	run_command_table() and the ROTATIONS map of clockwise rotation to
+	MADCTL value.
+	"""
+
+	INIT = ()
+	ROTATIONS = {0: 0x00}
+
+	def __init__(self, dc, spi, width, height, rst=None, gpio=None,
+		partial_update=True, framebuffer=False):
+		"""Create an instance of the display using SPI communication.  Must
+		provide the GPIO pin number for the D/C pin, the SPI driver and the
+		panel's native width and height.  Can optionally provide the GPIO pin
+		number for the reset pin as the rst parameter.  Display() only sends
+		the regions that changed since the previous frame unless
+		partial_update is False.  If framebuffer is True the buffer is a
+		Framebuffer holding 565 RGB pixels instead of a PIL image, which
+		display() sends without any color conversion.  If framebuffer is
+		'palette' the buffer is a PaletteFramebuffer of palette indexes.
+		"""
+		self._dc = dc
+		self._rst = rst
+		self._spi = spi
+		self._gpio = gpio
+		self.width = width
+		self.height = height
+		self.rotation = 0
+		self._native_size = (width, height)
+		if self._gpio is None:
+			self._gpio = GPIO.get_platform_gpio()
+		# Set DC as output.  Its level is tracked so send() can skip writes.
+		self._gpio.setup(dc, GPIO.OUT)
+		self._dc_level = None
+		# Last address window set, so set_window() can skip repeated commands.
+		self._window = None
+		# Setup reset as output (if provided).
+		if rst is not None:
+			self._gpio.setup(rst, GPIO.OUT)
+		# Set SPI to mode 0, MSB first.
+		spi.set_mode(0)
+		spi.set_bit_order(SPI.MSBFIRST)
+
+		#need to nerf the clock for Minnow
+		if(Platform.platform_detect() == 3):
+			spi.set_clock_hz(16000000)
+		else:
+			spi.set_clock_hz(64000000)
+
+		# Size of the largest single SPI write, None if there is no limit.
+		self._max_transfer = getattr(spi, 'max_transfer', 4096)
+		# Create an image buffer.
+		if framebuffer == 'palette':
+			self.buffer = PaletteFramebuffer(width, height)
+		elif framebuffer:
+			self.buffer = Framebuffer(width, height)
+		else:
+			self.buffer = Image.new('RGB', (width, height))
+		# Preallocate the 565 RGB frame that display() converts into, so
+		# pushing a frame doesn't build any per-frame Python lists.  A second
+		# frame holds what the panel is showing for partial updates.
+		self._frame = np.zeros(width*height*2, dtype=np.uint8)
+		self._shown = np.zeros(width*height*2, dtype=np.uint8)
+		self._shown_valid = False
+		self.partial_update = partial_update
+		# Name of the rgb565 method display() converts images with, which
+		# rgb565.fastest_method() can pick for the machine.
+		self.conversion = rgb565.DEFAULT_METHOD
+		self.update_stats = dirty.UpdateStats()
+		# Optional stage timings and frame rate limit, see enable_timing() and
+		# set_target_fps().  A frame held back by the governor waits in pending
+		# until a timer sends it when its slot opens.  Every method writing to
+		# the panel holds the lock, so the timer's writes can't interleave
+		# with other drawing.
+		self.timing = None
+		self._governor = None
+		self._pending = None
+		self._pending_timer = None
+		self._lock = threading.RLock()
+		self.frames_skipped = 0
+		self._stats_start = frametiming.clock()
+		# Created by the first display_async() call.
+		self._pipeline = None
+		# Repeated color chunk streamed by fill_rect(), kept for the last color
+		# and chunk size.
+		self._fill_chunk = None
+
+	def send(self, data, is_data=True, chunk_size=None):
+		"""Write a byte or array of bytes to the display. Is_data parameter
+		controls if byte should be interpreted as display data (True) or command
+		data (False).  Chunk_size is an optional size of bytes to write in a
+		single SPI transaction.  By default it is the largest transfer the SPI
+		device accepts, its max_transfer attribute, or 4096 if it has none.
+		"""
+		with self._lock:
+			# Set DC low for command, high for data.  The pin is only written when
+			# the level changes, so runs of data writes don't toggle it.
+			is_data = bool(is_data)
+			if is_data != self._dc_level:
+				self._gpio.output(self._dc, is_data)
+				self._dc_level = is_data
+			# Convert scalar argument to list so either can be passed as parameter.
+			if isinstance(data, numbers.Number):
+				data = [data & 0xFF]
+			elif isinstance(data, np.ndarray):
+				# Flatten to bytes, which is free for contiguous arrays.
+				data = memoryview(np.ascontiguousarray(data).reshape(-1).view(np.uint8))
+			elif not isinstance(data, list):
+				# Bytes-like objects are sliced through a memoryview so each chunk
+				# reaches the SPI driver without being copied.
+				data = memoryview(data)
+			if chunk_size is None:
+				chunk_size = self._max_transfer or max(len(data), 1)
+			# Write data a chunk at a time.
+			for start in range(0, len(data), chunk_size):
+				self._spi.write(data[start:start+chunk_size])
+
+	def command(self, data):
+		"""Write a byte or array of bytes to the display as command data."""
+		self.send(data, False)
+
+	def data(self, data):
+		"""Write a byte or array of bytes to the display as display data."""
+		self.send(data, True)
+
+	def reset(self):
+		"""Reset the display, if reset pin is connected."""
+		if self._rst is not None:
+			self._gpio.set_high(self._rst)
+			time.sleep(0.005)
+			self._gpio.set_low(self._rst)
+			time.sleep(0.02)
+			self._gpio.set_high(self._rst)
+			time.sleep(0.150)
+
+	def _init(self):
+		# Initialize the display.  Broken out as a separate function so it can
+		# be overridden by panels that need more than a command table.
+		run_command_table(self, self.INIT)
+
+	def begin(self):
+		"""Initialize the display.  Should be called once before other calls that
+		interact with the display are called.
+		"""
+		with self._lock:
+			self.reset()
+			self._window = None
+			self._init()
+			# Panel RAM is undefined after reset so the next frame is sent in full.
+			self._shown_valid = False
+			# The init sequence selects the default orientation.
+			if self.rotation != 0:
+				self.set_rotation(self.rotation)
+
+	def set_rotation(self, rotation):
+		"""Rotate the display clockwise by 0, 90, 180 or 270 degrees.  The
+		panel's memory access control register does the rotation, so images
+		are drawn in the new orientation without rotating them first.  For 90
+		and 270 degrees width and height are swapped and the buffer is replaced
+		by a blank one of the new size.
+		"""
+		if rotation not in self.ROTATIONS:
+			raise ValueError('Rotation must be 0, 90, 180 or 270.')
+		width, height = self._native_size
+		if rotation in (90, 270):
+			width, height = height, width
+		resized = (width, height) != (self.width, self.height)
+		# The pipeline's buffers have the old shape.  It is closed before
+		# taking the lock, since its sender needs the lock to finish.
+		if resized and self._pipeline is not None:
+			self._pipeline.close()
+			self._pipeline = None
+		with self._lock:
+			self.command(MADCTL)
+			self.data(self.ROTATIONS[rotation])
+			if resized:
+				self.width = width
+				self.height = height
+				if isinstance(self.buffer, PaletteFramebuffer):
+					self.buffer = PaletteFramebuffer(width, height, self.buffer.palette)
+				elif isinstance(self.buffer, Framebuffer):
+					self.buffer = Framebuffer(width, height)
+				else:
+					self.buffer = Image.new('RGB', (width, height))
+			self.rotation = rotation
+			# What the panel shows no longer matches the new orientation, and the
+			# address window has to be sent again.
+			self._shown_valid = False
+			self._window = None
+
+	def set_window(self, x0=0, y0=0, x1=None, y1=None):
+		"""Set the pixel address window for proceeding drawing commands. x0 and
+		x1 should define the minimum and maximum x pixel bounds.  y0 and y1
+		should define the minimum and maximum y pixel bound.  If no parameters
+		are specified the default will be to update the entire display.  The
+		column or row range is only sent when it differs from the last window.
+		"""
+		with self._lock:
+			if x1 is None:
+				x1 = self.width-1
+			if y1 is None:
+				y1 = self.height-1
+			last = self._window or (None, None, None, None)
+			if (x0, x1) != (last[0], last[2]):
+				self.command(CASET)		# Column addr set
+				self.data([x0 >> 8, x0 & 0xFF, x1 >> 8, x1 & 0xFF])	# XSTART, XEND
+			if (y0, y1) != (last[1], last[3]):
+				self.command(PASET)		# Row addr set
+				self.data([y0 >> 8, y0 & 0xFF, y1 >> 8, y1 & 0xFF])	# YSTART, YEND
+			self.command(RAMWR)		# write to RAM
+			self._window = (x0, y0, x1, y1)
+
+	def display(self, image=None, full=False):
+		"""Write the display buffer or provided image to the hardware.  If no
+		image parameter is provided the display buffer will be written to the
+		hardware.  If an image is provided, it should be RGB format (or a
+		Framebuffer, (height, width, 3) RGB array or (height, width) array of
+		565 RGB values) and the same dimensions as the display hardware.  Only
+		rectangles that changed since the last displayed frame are written
+		unless full is True.  With a target frame rate set, a frame arriving
+		before its slot is held back and False is returned.  A snapshot of it
+		is sent from a timer thread when the slot opens, unless a newer frame
+		replaces it first.
+		"""
+		with self._lock:
+			delay = self._governor.delay() if self._governor is not None else 0.0
+			if delay > 0:
+				if self._pending is not None:
+					self.frames_skipped += 1
+					full = full or self._pending[1]
+				self._pending = (self._snapshot(image), full)
+				if self._pending_timer is None:
+					self._schedule_pending(delay)
+				return False
+			if self._pending is not None:
+				# A newer frame supersedes the held back one.
+				self.frames_skipped += 1
+				self._pending = None
+			self._show(image, full)
+			return True
+
+	def _schedule_pending(self, delay):
+		self._pending_timer = threading.Timer(delay, self._send_pending)
+		self._pending_timer.daemon = True
+		self._pending_timer.start()
+
+	def _send_pending(self):
+		# Timer callback sending the held back frame once its slot opens.
+		with self._lock:
+			self._pending_timer = None
+			if self._pending is None:
+				return
+			delay = self._governor.delay() if self._governor is not None else 0.0
+			if delay > 0:
+				self._schedule_pending(delay)
+				return
+			image, full = self._pending
+			self._pending = None
+			self._show(image, full)
+
+	def _snapshot(self, image=None):
+		# Copy of the display buffer or image that later drawing can't change.
+		if image is None:
+			image = self.buffer
+		if isinstance(image, Framebuffer):
+			return np.array(image.pixels())
+		if isinstance(image, np.ndarray):
+			return np.array(image)
+		return image.copy()
+
+	def _show(self, image, full):
+		# By default write the internal buffer to the display.
+		if image is None:
+			image = self.buffer
+		if isinstance(image, Framebuffer) and not isinstance(image, PaletteFramebuffer):
+			# Already in panel format, no conversion needed.
+			self.display_frame(image.array, full)
+			return
+		if isinstance(image, np.ndarray) and image.ndim == 2:
+			# Prepacked 565 RGB values, such as a snapshot of a Framebuffer.
+			self.display_frame(image, full)
+			return
+		# Convert image to 16bit 565 RGB data bytes in the preallocated frame
+		# so it can be compared with the frame on the panel.
+		start = frametiming.clock()
+		if isinstance(image, PaletteFramebuffer):
+			image.pixels(self._frame.view('>u2').reshape(self.height, self.width))
+		else:
+			image_to_data(image, self._frame, self.conversion)
+		if self.timing is not None:
+			self.timing.record('convert', frametiming.clock() - start)
+		self.display_frame(self._frame.view('>u2').reshape(self.height, self.width), full)
+
+	def display_frame(self, pixels, full=False, rects=None):
+		"""Write a (height, width) array of 16-bit 565 RGB values, such as a
+		Framebuffer's array, to the hardware.  Only rectangles that changed
+		since the last displayed frame are written unless full is True.
+		Rects can give the changed (x0, y0, x1, y1) rectangles when the
+		caller has already computed them against the previous frame.
+		"""
+		with self._lock:
+			pixels = np.asarray(pixels, dtype='>u2')
+			shown = self._shown.view('>u2').reshape(self.height, self.width)
+			if full or not self.partial_update or not self._shown_valid:
+				rects = [(0, 0, self.width-1, self.height-1)]
+			elif rects is None:
+				rects = dirty.find_dirty_rects(shown, pixels)
+			if self._governor is not None:
+				self._governor.start_frame()
+			window = transfer = 0.0
+			for x0, y0, x1, y1 in rects:
+				start = frametiming.clock()
+				self.set_window(x0, y0, x1, y1)
+				sent = frametiming.clock()
+				# Full width rectangles are contiguous and are sent without a copy.
+				self.data(pixels[y0:y1+1, x0:x1+1])
+				window += sent - start
+				transfer += frametiming.clock() - sent
+			if self.timing is not None:
+				self.timing.record('window', window)
+				self.timing.record('transfer', transfer)
+			self.update_stats.record(rects)
+			# The frame just written becomes the reference for the next update.
+			# Frames converted by display() are swapped in rather than copied.
+			if np.may_share_memory(pixels, self._frame):
+				self._frame, self._shown = self._shown, self._frame
+			else:
+				np.copyto(shown, pixels)
+			self._shown_valid = True
+
+	def display_rect(self, pixels, x=0, y=0):
+		"""Write a (height, width) array of 565 RGB values straight to the
+		panel with its top left corner at x, y, for small regions such as a
+		line of text.  The array must fit on the panel.  The buffer is left
+		unchanged.
+		"""
+		with self._lock:
+			pixels = np.asarray(pixels, dtype='>u2')
+			height, width = pixels.shape
+			x1, y1 = x+width-1, y+height-1
+			if x < 0 or y < 0 or x1 >= self.width or y1 >= self.height:
+				raise ValueError('Rectangle does not fit on the display.')
+			self.set_window(x, y, x1, y1)
+			self.data(pixels)
+			self._shown.view('>u2').reshape(self.height, self.width)[y:y1+1, x:x1+1] = pixels
+			self.update_stats.record([(x, y, x1, y1)])
+
+	def display_async(self, image=None, full=False, callback=None):
+		"""Queue the display buffer or provided image to be written by a
+		background DisplayPipeline and return a FrameFuture without waiting.
+		Conversion and the SPI transfer overlap with the caller's next frame,
+		and frames that are overtaken before they are started are dropped.
+		Without an image a snapshot of the buffer is queued.  Callback, if
+		given, is called with the future once the frame is done.
+		"""
+		if self._pipeline is None:
+			self._pipeline = DisplayPipeline(self)
+		if image is None:
+			image = self._snapshot()
+		return self._pipeline.submit(image, full, callback)
+
+	def flush(self, timeout=None):
+		"""Write a frame held back by the target frame rate and wait for frames
+		queued with display_async() to be written.  Returns False if timeout
+		seconds passed first.
+		"""
+		with self._lock:
+			if self._pending is not None:
+				image, full = self._pending
+				self._pending = None
+				self._show(image, full)
+		if self._pipeline is None:
+			return True
+		return self._pipeline.flush(timeout)
+
+	def enable_timing(self, enabled=True):
+		"""Start or stop recording per frame histograms of the time spent
+		converting, setting windows and transferring, reported by stats().
+		"""
+		self.timing = frametiming.FrameTimer() if enabled else None
+
+	def set_target_fps(self, fps):
+		"""Limit display() and display_async() to fps frames per second, or
+		remove the limit with None.  When frames come faster than that, or
+		faster than the bus can take them, intermediate frames are skipped
+		and only the newest is sent.
+		"""
+		self._governor = frametiming.Governor(fps) if fps else None
+
+	def _governor_delay(self):
+		# Seconds the async pipeline waits before sending its next frame.
+		return self._governor.delay() if self._governor is not None else 0.0
+
+	def stats(self):
+		"""Return a dict of display counters for monitoring: frames, rects and
+		pixel bytes written, the frame rate and bytes per second since the
+		stats were reset, frames skipped by the governor or dropped by the
+		async pipeline, the target frame rate and, if enabled, per stage
+		timing histograms.
+		"""
+		elapsed = frametiming.clock() - self._stats_start
+		stats = self.update_stats
+		return {
+			'frames': stats.updates,
+			'rects': stats.total_rects,
+			'bytes': stats.total_bytes,
+			'elapsed': elapsed,
+			'fps': stats.updates/elapsed if elapsed > 0 else 0.0,
+			'bytes_per_second': stats.total_bytes/elapsed if elapsed > 0 else 0.0,
+			'frames_skipped': self.frames_skipped,
+			'frames_dropped': self._pipeline.frames_dropped if self._pipeline is not None else 0,
+			'target_fps': self._governor.fps if self._governor is not None else None,
+			'timing': self.timing.as_dict() if self.timing is not None else None,
+		}
+
+	def reset_stats(self):
+		"""Restart the counters and timings reported by stats()."""
+		self.update_stats = dirty.UpdateStats()
+		self.frames_skipped = 0
+		if self._pipeline is not None:
+			self._pipeline.frames_dropped = 0
+		if self.timing is not None:
+			self.timing.reset()
+		self._stats_start = frametiming.clock()
+
+	def fill_rect(self, x0, y0, x1, y1, color):
+		"""Fill the rectangle with inclusive corners x0, y0 and x1, y1 on the
+		panel with color, a 565 value or (red, green, blue) tuple.  The panel's
+		window is set and a single chunk of the color is written repeatedly,
+		so no frame is converted and the buffer is left unchanged.
+		"""
+		with self._lock:
+			x0, y0 = max(x0, 0), max(y0, 0)
+			x1, y1 = min(x1, self.width-1), min(y1, self.height-1)
+			if x0 > x1 or y0 > y1:
+				return
+			color = to_color565(color)
+			# One SPI transfer of pixels per write, or FILL_CHUNK pixels when the
+			# device has no transfer limit.
+			size = max(self._max_transfer//2, 1) if self._max_transfer else FILL_CHUNK
+			if self._fill_chunk is None or self._fill_chunk[0] != (color, size):
+				self._fill_chunk = ((color, size), np.full(size, color, dtype='>u2'))
+			chunk = self._fill_chunk[1]
+			self.set_window(x0, y0, x1, y1)
+			remaining = (x1-x0+1)*(y1-y0+1)
+			while remaining > 0:
+				count = min(remaining, len(chunk))
+				self.data(chunk[:count])
+				remaining -= count
+			# Keep the copy of the panel contents in step for partial updates.  A
+			# full screen fill makes the whole copy valid again.
+			self._shown.view('>u2').reshape(self.height, self.width)[y0:y1+1, x0:x1+1] = color
+			if (x0, y0, x1, y1) == (0, 0, self.width-1, self.height-1):
+				self._shown_valid = True
+			self.update_stats.record([(x0, y0, x1, y1)])
+
+	def fill_screen(self, color=(0,0,0)):
+		"""Fill the whole panel with color (default black) without touching
+		the buffer, see fill_rect().
+		"""
+		self.fill_rect(0, 0, self.width-1, self.height-1, color)
+
+	def play(self, frames, fps):
+		"""Play an animation from an iterable of PIL images, Framebuffers or
+		prepacked 565 RGB arrays at fps frames per second, writing only what
+		changed between frames.  Returns a PlaybackStats with the achieved
+		frame rate, dropped frames and bus utilisation, see animation.play().
+		"""
+		return animation.play(self, frames, fps)
+
+	def clear(self, color=(0,0,0)):
+		"""Clear the image buffer to the specified RGB color (default black)."""
+		if isinstance(self.buffer, Framebuffer):
+			self.buffer.fill(color)
+			return
+		self.buffer.paste(color, (0, 0) + self.buffer.size)
+
+	def draw(self):
+		"""Return a PIL ImageDraw instance for 2D drawing on the image buffer.
+		With a Framebuffer this is a context manager yielding the ImageDraw,
+		see Framebuffer.draw().
+		"""
+		if isinstance(self.buffer, Framebuffer):
+			return self.buffer.draw()
+		return ImageDraw.Draw(self.buffer)
@@ -0,0 +1,106 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Stand-in SPI, GPIO and panel objects for testing the display drivers."""
+import os
+import sys
+
+# Make the repository packages importable when run from a checkout.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[0:0] = [ROOT, os.path.join(ROOT, 'Adafruit_Python_GPIO')]
+
+import numpy as np
+
+import Adafruit_GPIO as GPIO
+from pyDrivers import rgb565
+
+
+class MockGPIO(GPIO.BaseGPIO):
+	"""GPIO remembering the last level written to each pin."""
+
+	def __init__(self):
+		self.levels = {}
+
+	def setup(self, pin, mode, pull_up_down=GPIO.PUD_OFF):
+		pass
+
+	def output(self, pin, value):
+		self.levels[pin] = bool(value)
+
+	def input(self, pin):
+		return self.levels.get(pin, False)
+
+
+class MockSpi(object):
+	"""SPI device recording the bytes of every write as a list.  Given the
+	MockGPIO and D/C pin, the D/C level during each write is recorded in
+	dc_levels.
+	"""
+
+	def __init__(self, max_transfer=4096, gpio=None, dc=None):
+		self.max_transfer = max_transfer
+		self.writes = []
+		self.dc_levels = []
+		self._gpio = gpio
+		self._dc = dc
+
+	def set_mode(self, mode):
+		pass
+
+	def set_bit_order(self, order):
+		pass
+
+	def set_clock_hz(self, hz):
+		pass
+
+	def write(self, data):
+		self.writes.append(list(bytearray(data)))
+		if self._gpio is not None:
+			self.dc_levels.append(self._gpio.input(self._dc))
+
+	def commands(self):
+		"""Return the writes as a list of (opcode, parameter bytes) tuples,
+		using dc_levels to tell commands from data.
+		"""
+		commands = []
+		for level, data in zip(self.dc_levels, self.writes):
+			if level:
+				commands[-1][1].extend(data)
+			else:
+				commands.extend((opcode, []) for opcode in data)
+		return commands
+
+
+class MockPanel(object):
+	"""Panel recording the frames passed to display_frame().  It has the
+	attributes a DisplayPipeline reads, with no frame rate limit.
+	"""
+
+	def __init__(self, width=16, height=8):
+		self.width = width
+		self.height = height
+		self.frames = []
+		self.conversion = rgb565.DEFAULT_METHOD
+		self.timing = None
+
+	def _governor_delay(self):
+		return 0.0
+
+	def display_frame(self, pixels, full=False, rects=None):
+		self.frames.append(np.array(pixels, dtype='>u2'))
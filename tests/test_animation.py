@@ -0,0 +1,88 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import unittest
+
+from mock import patch
+import numpy as np
+
+from MockPanel import MockGPIO, MockSpi
+from pyDrivers import animation
+from pyDrivers.spipanel import SpiPanel, CASET, PASET, RAMWR
+
+
+class FakeClock(object):
+	"""Clock for animation._clock whose sleep() only advances the time."""
+
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		return self.now
+
+	def sleep(self, seconds):
+		self.now += seconds
+
+
+class TestPlay(unittest.TestCase):
+	def setUp(self):
+		self.clock = FakeClock()
+		for name, value in (('_clock', self.clock), ('time.sleep', self.clock.sleep)):
+			patcher = patch('pyDrivers.animation.' + name, value)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+		self.spi = MockSpi()
+		self.panel = SpiPanel(1, self.spi, 16, 8, gpio=MockGPIO())
+
+	def frame(self, x=None, value=0xFFFF):
+		pixels = np.zeros((8, 16), dtype='>u2')
+		if x is not None:
+			pixels[2, x] = value
+		return pixels
+
+	def test_paced(self):
+		stats = self.panel.play([self.frame(), self.frame(1), self.frame(2)], 10)
+		self.assertEqual((stats.frames, stats.dropped), (3, 0))
+		self.assertAlmostEqual(stats.elapsed, 0.2)
+
+	def test_late_frames_dropped(self):
+		def frames():
+			yield self.frame()
+			# Decoding the next frame takes three and a half frame periods.
+			self.clock.sleep(0.35)
+			for x in (1, 2, 3, 3):
+				yield self.frame(x)
+		stats = self.panel.play(frames(), 10)
+		self.assertEqual((stats.frames, stats.dropped), (3, 2))
+		shown = self.panel._shown.view('>u2').reshape(8, 16)
+		self.assertEqual(shown[2, 3], 0xFFFF)
+
+	def test_only_dirty_rects_sent(self):
+		self.panel.play([self.frame()], 10)
+		self.spi.writes = []
+		frames = [self.frame(), self.frame(5, 0x1234), self.frame(5, 0x1234)]
+		stats = self.panel.play(frames, 10)
+		self.assertEqual(self.spi.writes, [[CASET], [0, 5, 0, 5], [PASET], [0, 2, 0, 2],
+			[RAMWR], [0x12, 0x34]])
+		self.assertEqual(stats.bytes, 2)
+
+	def test_prepack(self):
+		frames = animation.prepack([self.frame(1), self.panel.buffer])
+		self.assertEqual([frame.shape for frame in frames], [(8, 16), (8, 16)])
+		self.assertEqual(frames[0][2, 1], 0xFFFF)
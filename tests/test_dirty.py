@@ -0,0 +1,104 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import unittest
+
+import numpy as np
+
+from MockPanel import MockGPIO, MockSpi
+from pyDrivers import dirty
+from pyDrivers.spipanel import SpiPanel, CASET, PASET, RAMWR
+
+
+def frame(width=64, height=32):
+	return np.zeros((height, width), dtype='>u2')
+
+
+class TestFindDirtyRects(unittest.TestCase):
+	def test_no_change(self):
+		self.assertEqual(dirty.find_dirty_rects(frame(), frame()), [])
+
+	def test_single_pixel(self):
+		current = frame()
+		current[5, 9] = 0xF800
+		self.assertEqual(dirty.find_dirty_rects(frame(), current), [(9, 5, 9, 5)])
+
+	def test_nearby_regions_merge(self):
+		current = frame()
+		current[5, 10] = 1
+		current[7, 14] = 1
+		self.assertEqual(dirty.find_dirty_rects(frame(), current), [(10, 5, 14, 7)])
+
+	def test_distant_regions_stay_apart(self):
+		current = frame()
+		current[2, 2] = 1
+		current[25, 50] = 1
+		self.assertEqual(sorted(dirty.find_dirty_rects(frame(), current)),
+			[(2, 2, 2, 2), (50, 25, 50, 25)])
+
+	def test_max_rects(self):
+		current = frame()
+		for y, x in ((0, 0), (0, 40), (20, 0), (20, 40), (31, 63)):
+			current[y, x] = 1
+		rects = dirty.find_dirty_rects(frame(), current, max_rects=3)
+		self.assertEqual(len(rects), 3)
+		for y, x in zip(*np.nonzero(current)):
+			self.assertTrue(any(x0 <= x <= x1 and y0 <= y <= y1 for x0, y0, x1, y1 in rects))
+		# With a single rectangle allowed it is the bounding box.
+		self.assertEqual(dirty.find_dirty_rects(frame(), current, max_rects=1),
+			[(0, 0, 63, 31)])
+
+
+class TestUpdateStats(unittest.TestCase):
+	def test_record(self):
+		stats = dirty.UpdateStats()
+		stats.record([(0, 0, 9, 9), (20, 0, 20, 0)])
+		stats.record([])
+		self.assertEqual((stats.updates, stats.rects, stats.bytes), (2, 0, 0))
+		self.assertEqual((stats.total_rects, stats.total_bytes), (2, 202))
+
+
+class TestPartialUpdate(unittest.TestCase):
+	def setUp(self):
+		self.spi = MockSpi()
+		self.panel = SpiPanel(1, self.spi, 16, 8, gpio=MockGPIO(), framebuffer=True)
+		self.panel.display()
+		self.spi.writes = []
+
+	def test_no_change_sends_nothing(self):
+		self.panel.display()
+		self.assertEqual(self.spi.writes, [])
+		self.assertEqual(self.panel.update_stats.rects, 0)
+
+	def test_single_pixel(self):
+		self.panel.buffer.pixel(3, 5, 0x1234)
+		self.panel.display()
+		self.assertEqual(self.spi.writes, [[CASET], [0, 3, 0, 3], [PASET], [0, 5, 0, 5],
+			[RAMWR], [0x12, 0x34]])
+
+	def test_full(self):
+		self.panel.display(full=True)
+		self.assertEqual(self.panel.update_stats.rects, 1)
+		self.assertEqual(self.panel.update_stats.bytes, 16*8*2)
+
+	def test_partial_update_disabled(self):
+		self.panel.partial_update = False
+		self.panel.buffer.pixel(3, 5, 0x1234)
+		self.panel.display()
+		self.assertEqual(self.panel.update_stats.bytes, 16*8*2)
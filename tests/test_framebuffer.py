@@ -0,0 +1,139 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import unittest
+
+import numpy as np
+
+from MockPanel import MockGPIO, MockSpi
+from pyDrivers.ILI9341 import ILI9341
+from pyDrivers.framebuffer import Framebuffer, PaletteFramebuffer
+from pyDrivers.spipanel import SpiPanel
+
+
+class TestFramebuffer(unittest.TestCase):
+	def setUp(self):
+		self.fb = Framebuffer(8, 4)
+
+	def test_fill_rect_tuple_color(self):
+		self.fb.fill_rect(1, 1, 2, 2, (255, 0, 0))
+		self.assertEqual(self.fb.array[1, 1], 0xF800)
+		self.assertEqual(np.count_nonzero(self.fb.array), 4)
+
+	def test_fill_rect_clipped(self):
+		self.fb.fill_rect(-3, -3, 1, 1, 5)
+		self.fb.fill_rect(6, 2, 20, 20, 7)
+		self.assertTrue((self.fb.array[0:2, 0:2] == 5).all())
+		self.assertTrue((self.fb.array[2:4, 6:8] == 7).all())
+		self.assertEqual(np.count_nonzero(self.fb.array), 8)
+
+	def test_fill_rect_off_screen(self):
+		self.fb.fill_rect(8, 0, 12, 3, 1)
+		self.fb.fill_rect(-5, -5, -1, -1, 1)
+		self.assertEqual(np.count_nonzero(self.fb.array), 0)
+
+	def test_blit_clipped(self):
+		sprite = np.arange(1, 10, dtype='>u2').reshape(3, 3)
+		self.fb.blit(sprite, -1, -1)
+		self.assertEqual(self.fb.array[0:2, 0:2].tolist(), [[5, 6], [8, 9]])
+		self.fb.blit(sprite, 6, 2)
+		self.assertEqual(self.fb.array[2:4, 6:8].tolist(), [[1, 2], [4, 5]])
+		self.assertEqual(np.count_nonzero(self.fb.array), 8)
+
+	def test_blit_off_screen(self):
+		self.fb.blit(np.ones((2, 2), dtype='>u2'), 10, 10)
+		self.assertEqual(np.count_nonzero(self.fb.array), 0)
+
+	def test_image_round_trip(self):
+		self.fb.fill_rect(0, 0, 7, 3, (0, 255, 0))
+		image = self.fb.image((2, 1, 4, 2))
+		self.assertEqual(image.size, (3, 2))
+		self.assertEqual(image.getpixel((0, 0)), (0, 255, 0))
+
+
+class TestFramebufferDisplay(unittest.TestCase):
+	def test_sent_without_conversion(self):
+		spi = MockSpi()
+		panel = SpiPanel(1, spi, 8, 4, gpio=MockGPIO(), framebuffer=True)
+		panel.buffer.fill(0x1234)
+		panel.display()
+		self.assertEqual(spi.writes[-1], [0x12, 0x34]*32)
+
+
+class TestPaletteFramebuffer(unittest.TestCase):
+	def setUp(self):
+		self.fb = PaletteFramebuffer(8, 4, [(0, 0, 0), (255, 0, 0), 0x07E0, 0x001F])
+
+	def test_pixels_looks_up_palette(self):
+		self.fb.fill_rect(0, 0, 3, 3, 1)
+		self.fb.pixel(7, 3, (0, 0, 255))
+		pixels = self.fb.pixels()
+		self.assertEqual(pixels.dtype, np.dtype('>u2'))
+		self.assertTrue((pixels[:, :4] == 0xF800).all())
+		self.assertEqual(pixels[3, 7], 0x001F)
+		self.assertEqual(pixels[0, 5], 0)
+		out = np.zeros((4, 8), dtype='>u2')
+		self.assertIs(self.fb.pixels(out), out)
+		self.assertTrue((out == pixels).all())
+
+	def test_color_not_in_palette(self):
+		self.assertRaises(ValueError, self.fb.fill, (128, 128, 128))
+		self.assertEqual(self.fb._color((0, 255, 0)), 2)
+
+	def test_blit_requires_indexes(self):
+		self.assertRaises(ValueError, self.fb.blit, np.zeros((2, 2), dtype='>u2'))
+		self.fb.blit(np.full((2, 2), 3, dtype=np.uint8), 7, 3)
+		self.assertEqual(self.fb.array[3, 7], 3)
+
+	def test_rotate_palette(self):
+		self.fb.rotate_palette(1, 4)
+		self.assertEqual(self.fb.palette[1:4].tolist(), [0x001F, 0xF800, 0x07E0])
+
+	def test_image(self):
+		self.fb.fill(2)
+		image = self.fb.image((0, 0, 1, 1))
+		self.assertEqual(image.mode, 'P')
+		self.assertEqual(image.convert('RGB').getpixel((0, 0)), (0, 255, 0))
+
+
+class TestPaletteDisplay(unittest.TestCase):
+	def setUp(self):
+		self.spi = MockSpi()
+		self.panel = ILI9341(1, self.spi, gpio=MockGPIO(), width=8, height=4,
+			framebuffer='palette')
+		self.panel.buffer.set_palette([0, 0x1111, 0x2222, 0x3333])
+
+	def test_rotate_palette_partial_update(self):
+		self.panel.buffer.fill_rect(2, 1, 3, 2, 1)
+		self.panel.display()
+		self.spi.writes = []
+		# Cycling the palette recolors the rectangle without drawing it again.
+		self.panel.buffer.rotate_palette(1, 4)
+		self.panel.display()
+		self.assertEqual(self.spi.writes, [[0x2A], [0, 2, 0, 3], [0x2B], [0, 1, 0, 2],
+			[0x2C], [0x33]*8])
+
+	def test_set_rotation_keeps_palette(self):
+		self.panel.set_rotation(90)
+		self.assertIsInstance(self.panel.buffer, PaletteFramebuffer)
+		self.assertEqual(self.panel.buffer.size, (4, 8))
+		self.assertEqual(self.panel.buffer.palette[:4].tolist(), [0, 0x1111, 0x2222, 0x3333])
+		self.panel.buffer.fill(2)
+		self.panel.display()
+		self.assertEqual(self.spi.writes[-1], [0x22]*64)
@@ -0,0 +1,141 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+
+from mock import patch
+import numpy as np
+
+from MockPanel import MockPanel
+from pyDrivers import frameserver
+
+
+def wait_for(condition, timeout=5):
+	deadline = time.time() + timeout
+	while not condition():
+		if time.time() > deadline:
+			raise AssertionError('Timed out waiting for the frame server.')
+		time.sleep(0.01)
+
+
+def pixels(value, width, height):
+	return np.full((height, width), value, dtype='>u2')
+
+
+class TestFrameServer(unittest.TestCase):
+	def setUp(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		self.panel = MockPanel(16, 8)
+		self.server = frameserver.FrameServer(self.panel,
+			os.path.join(directory, 'display.sock'), fps=100)
+		self.server.start()
+		self.addCleanup(self.server.stop)
+
+	def connect(self):
+		server_end, client_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.server.add_client(server_end)
+		client = frameserver.FrameClient(sock=client_end)
+		self.addCleanup(client.close)
+		return client
+
+	def is_closed(self, sock):
+		# A socket closed by the server reads as end of file.
+		sock.settimeout(5)
+		return sock.recv(1) == b''
+
+	def test_frame(self):
+		client = self.connect()
+		client.frame(pixels(0x1234, 16, 8))
+		wait_for(lambda: self.panel.frames)
+		self.assertTrue((self.panel.frames[-1] == 0x1234).all())
+		self.assertEqual(self.server.messages, 1)
+
+	def test_header(self):
+		client = self.connect()
+		client.rect(pixels(7, 3, 2), 5, 4, layer=2)
+		wait_for(lambda: self.server.messages == 1)
+		frame = self.server.composite()
+		self.assertEqual(np.count_nonzero(frame), 6)
+		self.assertTrue((frame[4:6, 5:8] == 7).all())
+
+	def test_layer_order(self):
+		client = self.connect()
+		client.frame(pixels(1, 16, 8), layer=0)
+		client.rect(pixels(3, 2, 2), 2, 2, layer=2)
+		client.rect(pixels(2, 2, 2), 3, 3, layer=1)
+		wait_for(lambda: self.server.messages == 3)
+		frame = self.server.composite()
+		self.assertEqual([frame[2, 2], frame[3, 3], frame[4, 4], frame[0, 0]], [3, 3, 2, 1])
+		client.clear(layer=2)
+		wait_for(lambda: self.server.messages == 4)
+		frame = self.server.composite()
+		self.assertEqual([frame[2, 2], frame[3, 3], frame[4, 4]], [1, 2, 2])
+
+	def test_short_header_waits_for_the_rest(self):
+		server_end, client_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.addCleanup(client_end.close)
+		self.server.add_client(server_end)
+		header = frameserver.HEADER.pack(frameserver.MSG_CLEAR, 0, 0, 0, 0, 0, 0)
+		client_end.sendall(header[:-3])
+		time.sleep(0.3)
+		self.assertEqual(self.server.messages, 0)
+		client_end.sendall(header[-3:])
+		wait_for(lambda: self.server.messages == 1)
+
+	def test_malformed_headers_drop_client(self):
+		bad = [frameserver.HEADER.pack(99, 0, 0, 0, 0, 0, 0),
+			# Payload doesn't match the rectangle.
+			frameserver.HEADER.pack(frameserver.MSG_RECT, 0, 0, 0, 2, 2, 6) + b'\0'*6,
+			frameserver.HEADER.pack(frameserver.MSG_FRAME, 0, 0, 0, 0, 0,
+				frameserver.MAX_PAYLOAD+1)]
+		for message in bad:
+			server_end, client_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+			self.addCleanup(client_end.close)
+			self.server.add_client(server_end)
+			client_end.sendall(message)
+			self.assertTrue(self.is_closed(client_end))
+		self.assertEqual(self.server.messages, 0)
+		# Other clients are still served.
+		self.connect().clear()
+		wait_for(lambda: self.server.messages == 1)
+
+	def test_display_errors_keep_serving(self):
+		display_frame = self.panel.display_frame
+		calls = []
+		def failing(frame, full=False, rects=None):
+			calls.append(frame)
+			if len(calls) == 1:
+				raise IOError(5, 'Input/output error')
+			display_frame(frame, full, rects)
+		self.panel.display_frame = failing
+		client = self.connect()
+		with patch('pyDrivers.frameserver.logger') as logger:
+			client.frame(pixels(1, 16, 8))
+			wait_for(lambda: self.server.errors == 1)
+			self.assertTrue(logger.exception.called)
+			client.frame(pixels(2, 16, 8))
+			wait_for(lambda: self.panel.frames)
+		self.assertTrue((self.panel.frames[-1] == 2).all())
+		self.assertEqual(self.server.frames, 1)
@@ -0,0 +1,87 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import unittest
+
+import numpy as np
+from PIL import ImageFont
+
+from MockPanel import MockGPIO, MockSpi
+from pyDrivers.framebuffer import Framebuffer
+from pyDrivers.glyphs import GlyphCache, TextRenderer
+from pyDrivers.spipanel import SpiPanel
+
+
+FONT = ImageFont.load_default()
+
+
+class TestGlyphCache(unittest.TestCase):
+	def test_hits_and_misses(self):
+		cache = GlyphCache()
+		tile = cache.glyph(FONT, 'A', (255, 255, 255), (0, 0, 0))
+		self.assertIs(cache.glyph(FONT, 'A', 0xFFFF, 0), tile)
+		cache.glyph(FONT, 'A', 0xFFFF, 0, rotation=90)
+		self.assertEqual((cache.hits, cache.misses), (1, 2))
+		self.assertFalse(tile.flags.writeable)
+
+	def test_lru_bound(self):
+		cache = GlyphCache(max_glyphs=2)
+		a = cache.glyph(FONT, 'a', 0xFFFF, 0)
+		cache.glyph(FONT, 'b', 0xFFFF, 0)
+		# Using a makes b the least recently used, so c replaces it.
+		cache.glyph(FONT, 'a', 0xFFFF, 0)
+		cache.glyph(FONT, 'c', 0xFFFF, 0)
+		self.assertEqual(len(cache), 2)
+		self.assertIs(cache.glyph(FONT, 'a', 0xFFFF, 0), a)
+		cache.glyph(FONT, 'b', 0xFFFF, 0)
+		self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+	def test_invalid_rotation(self):
+		self.assertRaises(ValueError, GlyphCache().glyph, FONT, 'a', 0xFFFF, 0, 45)
+
+
+class TestTextRenderer(unittest.TestCase):
+	def test_rotated_tile_order(self):
+		cache = GlyphCache()
+		upright = TextRenderer(cache=cache).render('AbC')
+		for rotation in (90, 180, 270):
+			rotated = TextRenderer(rotation=rotation, cache=cache).render('AbC')
+			# Joining rotated tiles gives the upright string rotated whole.
+			self.assertTrue((rotated == np.rot90(upright, rotation//90)).all(),
+				'rotation {0}'.format(rotation))
+
+	def test_empty(self):
+		renderer = TextRenderer(rotation=90)
+		self.assertEqual(renderer.size(''), (renderer._height, 0))
+
+	def test_draw_framebuffer(self):
+		renderer = TextRenderer(fg=0xFFFF, bg=0x001F)
+		fb = Framebuffer(16, 16)
+		width, height = renderer.draw(fb, 'AB', 10, 2)
+		self.assertEqual((width, height), renderer.size('AB'))
+		# The text is clipped at the right edge.
+		self.assertEqual(fb.array[2, 10], 0x001F)
+		self.assertEqual(fb.array[2, 9], 0)
+
+	def test_draw_panel(self):
+		panel = SpiPanel(1, MockSpi(), 32, 16, gpio=MockGPIO())
+		renderer = TextRenderer()
+		width, height = renderer.draw(panel, 'A', 1, 2)
+		shown = panel._shown.view('>u2').reshape(16, 32)
+		self.assertTrue((shown[2:2+height, 1:1+width] == renderer.render('A')).all())
@@ -0,0 +1,118 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from pyDrivers.imagecache import ImageCache, CACHE_SUFFIX
+
+
+class TestImageCache(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.directory)
+		self.loaded = []
+		self.cache = ImageCache(os.path.join(self.directory, 'cache'),
+			loader=self.loader)
+
+	def loader(self, path, width, height):
+		# Each source file holds a single byte giving its red level.
+		self.loaded.append(path)
+		with open(path, 'rb') as f:
+			red = bytearray(f.read(1))[0]
+		return Image.new('RGB', (width, height), (red, 0, 0))
+
+	def source(self, name, red=255):
+		path = os.path.join(self.directory, name)
+		with open(path, 'wb') as f:
+			f.write(bytearray([red]))
+		return path
+
+	def entries(self):
+		return sorted(name for name in os.listdir(self.cache.directory)
+			if name.endswith(CACHE_SUFFIX))
+
+	def test_hit_and_miss(self):
+		path = self.source('a.png')
+		pixels = self.cache.get(path, 4, 2)
+		self.assertEqual(pixels.shape, (2, 4))
+		self.assertTrue((pixels == 0xF800).all())
+		self.assertTrue((self.cache.get(path, 4, 2) == 0xF800).all())
+		self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+		self.assertEqual(self.loaded, [path])
+		# Another size is another entry.
+		self.cache.get(path, 2, 2)
+		self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+		self.assertEqual(len(self.entries()), 2)
+
+	def test_key_changes_with_mtime(self):
+		path = self.source('a.png')
+		self.cache.get(path, 4, 2)
+		st = os.stat(path)
+		os.utime(path, (st.st_atime, st.st_mtime - 10))
+		self.cache.get(path, 4, 2)
+		self.assertEqual(self.cache.misses, 2)
+
+	def test_key_changes_with_size(self):
+		path = self.source('a.png', 0x80)
+		st = os.stat(path)
+		self.assertTrue((self.cache.get(path, 4, 2) == 0x8000).all())
+		with open(path, 'wb') as f:
+			f.write(bytearray([0x08, 0]))
+		os.utime(path, (st.st_atime, st.st_mtime))
+		self.assertTrue((self.cache.get(path, 4, 2) == 0x0800).all())
+		self.assertEqual(self.cache.misses, 2)
+
+	def test_lru_eviction(self):
+		self.cache.max_bytes = 2 * 4*2*2
+		a, b, c = [self.source(name) for name in ('a.png', 'b.png', 'c.png')]
+		self.cache.get(a, 4, 2)
+		self.cache.get(b, 4, 2)
+		entry_a = self.cache._entry_path(a, 4, 2)
+		entry_b = self.cache._entry_path(b, 4, 2)
+		os.utime(entry_a, (1000, 1000))
+		os.utime(entry_b, (2000, 2000))
+		# The hit makes a the most recently used, so adding c evicts b.
+		self.cache.get(a, 4, 2)
+		self.cache.get(c, 4, 2)
+		self.assertTrue(os.path.exists(entry_a))
+		self.assertFalse(os.path.exists(entry_b))
+		self.assertEqual(len(self.entries()), 2)
+
+	def test_oversized_entry_served_from_memory(self):
+		self.cache.max_bytes = 10
+		path = self.source('a.png')
+		pixels = self.cache.get(path, 4, 2)
+		self.assertTrue((pixels == 0xF800).all())
+		self.assertEqual(self.entries(), [])
+		self.assertEqual(self.cache.misses, 1)
+
+	def test_missing_file(self):
+		self.assertRaises(OSError, self.cache.get,
+			os.path.join(self.directory, 'missing.png'), 4, 2)
+		self.assertEqual(self.loaded, [])
+
+	def test_clear(self):
+		self.cache.get(self.source('a.png'), 4, 2)
+		self.cache.clear()
+		self.assertEqual(self.entries(), [])
@@ -0,0 +1,209 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import unittest
+
+from mock import patch
+
+from MockPanel import MockGPIO, MockSpi
+from pyDrivers.console import ScrollingConsole
+from pyDrivers.HX8357 import HX8357
+from pyDrivers.ILI9341 import ILI9341
+
+
+# Commands and parameters sent by the ILI9341 and HX8357 _init() methods
+# before they were replaced by command tables.
+ILI9341_BEGIN = [
+	(0xEF, [0x03, 0x80, 0x02]),
+	(0xCF, [0x00, 0xC1, 0x30]),
+	(0xED, [0x64, 0x03, 0x12, 0x81]),
+	(0xE8, [0x85, 0x00, 0x78]),
+	(0xCB, [0x39, 0x2C, 0x00, 0x34, 0x02]),
+	(0xF7, [0x20]),
+	(0xEA, [0x00, 0x00]),
+	(0xC0, [0x23]),
+	(0xC1, [0x10]),
+	(0xC5, [0x3E, 0x28]),
+	(0xC7, [0x86]),
+	(0x36, [0x48]),
+	(0x3A, [0x55]),
+	(0xB1, [0x00, 0x18]),
+	(0xB6, [0x08, 0x82, 0x27]),
+	(0xF2, [0x00]),
+	(0x26, [0x01]),
+	(0xE0, [0x0F, 0x31, 0x2B, 0x0C, 0x0E, 0x08, 0x4E, 0xF1, 0x37, 0x07, 0x10,
+		0x03, 0x0E, 0x09, 0x00]),
+	(0xE1, [0x00, 0x0E, 0x14, 0x03, 0x11, 0x07, 0x31, 0xC1, 0x48, 0x08, 0x0F,
+		0x0C, 0x31, 0x36, 0x0F]),
+	(0x11, []),
+	(0x29, []),
+]
+
+HX8357_BEGIN = [
+	(0x01, []),
+	(0xB9, [0xFF, 0x83, 0x57]),
+	(0xB3, [0x80, 0x00, 0x06, 0x06]),
+	(0xB6, [0x25]),
+	(0xB0, [0x68]),
+	(0xCC, [0x05]),
+	(0xB1, [0x00, 0x15, 0x1C, 0x1C, 0x83, 0xAA]),
+	(0xC0, [0x50, 0x50, 0x01, 0x3C, 0x1E, 0x08]),
+	(0xB4, [0x02, 0x40, 0x00, 0x2A, 0x2A, 0x0D, 0x78]),
+	(0xE0, [0x02, 0x0A, 0x11, 0x1D, 0x23, 0x35, 0x41, 0x4B, 0x4B, 0x42, 0x3A,
+		0x27, 0x1B, 0x08, 0x09, 0x03, 0x02, 0x0A, 0x11, 0x1D, 0x23, 0x35, 0x41,
+		0x4B, 0x4B, 0x42, 0x3A, 0x27, 0x1B, 0x08, 0x09, 0x03, 0x00, 0x01]),
+	(0x3A, [0x55]),
+	(0x36, [0xC0]),
+	(0x35, [0x00]),
+	(0x44, [0x00, 0x02]),
+	(0x11, []),
+	(0x29, []),
+]
+
+
+def recording_panel(cls):
+	gpio = MockGPIO()
+	spi = MockSpi(gpio=gpio, dc=1)
+	return cls(1, spi, gpio=gpio), spi
+
+
+class TestBegin(unittest.TestCase):
+	@patch('pyDrivers.spipanel.time.sleep')
+	def test_ili9341(self, sleep):
+		panel, spi = recording_panel(ILI9341)
+		panel.begin()
+		self.assertEqual(spi.commands(), ILI9341_BEGIN)
+		self.assertEqual([args[0] for args, _ in sleep.call_args_list], [0.120])
+
+	@patch('pyDrivers.spipanel.time.sleep')
+	def test_hx8357(self, sleep):
+		panel, spi = recording_panel(HX8357)
+		panel.begin()
+		self.assertEqual(spi.commands(), HX8357_BEGIN)
+		self.assertEqual([args[0] for args, _ in sleep.call_args_list],
+			[0.300, 0.150, 0.500])
+
+	@patch('pyDrivers.spipanel.time.sleep')
+	def test_parameters_in_one_write(self, sleep):
+		panel, spi = recording_panel(ILI9341)
+		panel.begin()
+		# One write per command and one per parameter list.
+		self.assertEqual(len(spi.writes),
+			len(ILI9341_BEGIN) + sum(1 for _, params in ILI9341_BEGIN if params))
+
+
+class TestRotation(unittest.TestCase):
+	def setUp(self):
+		self.spi = MockSpi()
+		self.panel = ILI9341(1, self.spi, gpio=MockGPIO(), width=16, height=8,
+			framebuffer=True)
+
+	def test_swaps_width_and_height(self):
+		self.panel.set_rotation(90)
+		self.assertEqual(self.spi.writes, [[0x36], [0x28]])
+		self.assertEqual((self.panel.width, self.panel.height), (8, 16))
+		self.assertEqual(self.panel.buffer.size, (8, 16))
+		self.assertEqual(self.panel.buffer.array.shape, (16, 8))
+		self.panel.set_rotation(180)
+		self.assertEqual((self.panel.width, self.panel.height), (16, 8))
+		self.assertEqual(self.panel.buffer.array.shape, (8, 16))
+
+	def test_image_buffer_resized(self):
+		panel = ILI9341(1, MockSpi(), gpio=MockGPIO(), width=16, height=8)
+		panel.set_rotation(270)
+		self.assertEqual(panel.buffer.size, (8, 16))
+		panel.display()
+
+	def test_same_size_keeps_buffer(self):
+		buffer = self.panel.buffer
+		self.panel.set_rotation(180)
+		self.assertIs(self.panel.buffer, buffer)
+
+	def test_display_after_rotation(self):
+		self.panel.display()
+		self.panel.set_rotation(90)
+		self.spi.writes = []
+		self.panel.display()
+		# The whole rotated frame is sent.
+		self.assertEqual(self.spi.writes[:2], [[0x2A], [0, 0, 0, 7]])
+		self.assertEqual(self.spi.writes[2:4], [[0x2B], [0, 0, 0, 15]])
+		self.assertEqual(len(self.spi.writes[-1]), 16*8*2)
+
+	@patch('pyDrivers.spipanel.time.sleep')
+	def test_begin_restores_rotation(self, sleep):
+		self.panel.set_rotation(90)
+		self.spi.writes = []
+		self.panel.begin()
+		self.assertEqual(self.spi.writes[-2:], [[0x36], [0x28]])
+
+	def test_invalid_rotation(self):
+		self.assertRaises(ValueError, self.panel.set_rotation, 45)
+
+
+class TestScrolling(unittest.TestCase):
+	def setUp(self):
+		gpio = MockGPIO()
+		self.spi = MockSpi(gpio=gpio, dc=1)
+		self.panel = ILI9341(1, self.spi, gpio=gpio, width=16, height=40)
+
+	def sent(self, opcode):
+		return [params for command, params in self.spi.commands() if command == opcode]
+
+	def test_define_scroll_area(self):
+		self.panel.define_scroll_area(4, 6)
+		self.assertEqual(self.spi.commands(), [(0x33, [0, 4, 0, 30, 0, 6]),
+			(0x37, [0, 4])])
+		self.assertEqual(self.panel.scroll_area, (4, 30))
+		self.assertEqual(self.panel.scroll, 4)
+
+	def test_scroll_area_must_leave_a_row(self):
+		self.assertRaises(ValueError, self.panel.define_scroll_area, 20, 20)
+		self.assertRaises(ValueError, self.panel.define_scroll_area, -1, 0)
+
+	def test_scroll_to(self):
+		self.panel.define_scroll_area(4, 6)
+		self.panel.scroll_to(0x21)
+		self.assertEqual(self.sent(0x37)[-1], [0x00, 0x21])
+		self.assertRaises(ValueError, self.panel.scroll_to, 3)
+		self.assertRaises(ValueError, self.panel.scroll_to, 34)
+
+	def test_console_wraps_slots(self):
+		console = ScrollingConsole(self.panel, line_height=10, top=4, bottom=6)
+		self.assertEqual(console.lines, 3)
+		self.spi.writes = []
+		self.spi.dc_levels = []
+		for i in range(5):
+			console.append('line {0}'.format(i))
+		# Lines are drawn in slots 0, 1, 2, 0, 1 of the area.
+		rows = [params[1] for params in self.sent(0x2B)]
+		self.assertEqual(rows, [4, 14, 24, 4, 14])
+		# Scrolling starts once the area is full, showing the oldest line first.
+		self.assertEqual(self.sent(0x37), [[0, 4], [0, 14], [0, 24]])
+		self.assertEqual(self.panel.scroll, 24)
+
+	def test_console_clear(self):
+		console = ScrollingConsole(self.panel, line_height=10, top=4, bottom=6)
+		console.append('line')
+		console.clear()
+		self.assertEqual(self.panel.scroll, 4)
+		shown = self.panel._shown.view('>u2').reshape(40, 16)
+		self.assertFalse(shown[4:34].any())
+
+	def test_console_too_small(self):
+		self.assertRaises(ValueError, ScrollingConsole, self.panel, line_height=41)
@@ -0,0 +1,139 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import threading
+import time
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from MockPanel import MockGPIO, MockPanel, MockSpi
+from pyDrivers.pipeline import DisplayPipeline
+from pyDrivers.spipanel import SpiPanel
+
+
+def wait_for(condition, timeout=5):
+	deadline = time.time() + timeout
+	while not condition():
+		if time.time() > deadline:
+			raise AssertionError('Timed out waiting for the pipeline.')
+		time.sleep(0.001)
+
+
+def pixels(value, width=16, height=8):
+	return np.full((height, width), value, dtype='>u2')
+
+
+class BlockingPanel(MockPanel):
+	"""MockPanel whose display_frame() waits until release is set."""
+
+	def __init__(self, width=16, height=8):
+		super(BlockingPanel, self).__init__(width, height)
+		self.sending = threading.Event()
+		self.release = threading.Event()
+
+	def display_frame(self, pixels, full=False, rects=None):
+		self.sending.set()
+		self.release.wait()
+		super(BlockingPanel, self).display_frame(pixels, full, rects)
+
+
+class TestDisplayPipeline(unittest.TestCase):
+	def setUp(self):
+		self.panel = BlockingPanel()
+		self.pipeline = DisplayPipeline(self.panel)
+		self.addCleanup(self.pipeline.close)
+		self.addCleanup(self.panel.release.set)
+
+	def test_frames_written(self):
+		self.panel.release.set()
+		future = self.pipeline.submit(pixels(1))
+		self.assertTrue(future.result(5))
+		self.pipeline.submit(Image.new('RGB', (16, 8), (255, 0, 0)))
+		self.assertTrue(self.pipeline.flush(5))
+		self.assertEqual([frame[0, 0] for frame in self.panel.frames], [1, 0xF800])
+		self.assertEqual(self.pipeline.frames_shown, 2)
+
+	def test_stale_frame_dropped(self):
+		first = self.pipeline.submit(pixels(1))
+		self.assertTrue(self.panel.sending.wait(5))
+		second = self.pipeline.submit(pixels(2))
+		# Both buffers are in use once the second frame is converted, so the
+		# third waits unconverted until the fourth replaces it.
+		wait_for(lambda: self.pipeline._converted is not None)
+		third = self.pipeline.submit(pixels(3))
+		fourth = self.pipeline.submit(pixels(4))
+		self.assertTrue(third.done())
+		self.assertTrue(third.dropped)
+		self.assertFalse(third.result())
+		self.panel.release.set()
+		for future in (first, second, fourth):
+			self.assertTrue(future.result(5))
+		self.assertEqual([frame[0, 0] for frame in self.panel.frames], [1, 2, 4])
+		self.assertEqual(self.pipeline.frames_dropped, 1)
+
+	def test_conversion_error_reraised(self):
+		self.panel.release.set()
+		future = self.pipeline.submit(Image.new('RGB', (4, 4)))
+		self.assertRaises(ValueError, future.result, 5)
+		self.assertFalse(future.dropped)
+		# The failed frame's buffer is returned.
+		self.assertTrue(self.pipeline.submit(pixels(5)).result(5))
+		self.assertEqual(self.panel.frames[-1][0, 0], 5)
+
+	def test_callbacks(self):
+		called = []
+		future = self.pipeline.submit(pixels(1), callback=called.append)
+		self.assertEqual(called, [])
+		self.panel.release.set()
+		future.result(5)
+		wait_for(lambda: called)
+		self.assertEqual(called, [future])
+		# Callbacks added after completion run immediately.
+		future.add_done_callback(called.append)
+		self.assertEqual(called, [future, future])
+
+	def test_flush_and_close_free_both_buffers(self):
+		self.pipeline.submit(pixels(1))
+		self.assertTrue(self.panel.sending.wait(5))
+		self.pipeline.submit(pixels(2))
+		self.assertFalse(self.pipeline.flush(0.05))
+		self.panel.release.set()
+		self.assertTrue(self.pipeline.flush(5))
+		self.assertEqual(len(self.pipeline._free), 2)
+		self.pipeline.submit(pixels(3))
+		self.pipeline.close()
+		self.assertEqual(len(self.pipeline._free), 2)
+		self.assertEqual(self.panel.frames[-1][0, 0], 3)
+		self.assertRaises(RuntimeError, self.pipeline.submit, pixels(4))
+
+
+class TestDisplayAsync(unittest.TestCase):
+	def test_set_rotation_rebuilds_pipeline(self):
+		panel = SpiPanel(1, MockSpi(), 16, 8, gpio=MockGPIO())
+		panel.ROTATIONS = {0: 0x00, 90: 0x20}
+		self.assertTrue(panel.display_async().result(5))
+		pipeline = panel._pipeline
+		panel.set_rotation(90)
+		self.assertIsNone(panel._pipeline)
+		self.assertFalse(any(thread.is_alive() for thread in pipeline._threads))
+		self.assertTrue(panel.display_async().result(5))
+		self.assertEqual(panel._pipeline._free[0].shape, (16, 8))
+		panel._pipeline.close()
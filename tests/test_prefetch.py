@@ -0,0 +1,119 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import threading
+import time
+import unittest
+
+from PIL import Image
+
+from pyDrivers.prefetch import Prefetcher
+
+
+def wait_for(condition, timeout=5):
+	deadline = time.time() + timeout
+	while not condition():
+		if time.time() > deadline:
+			raise AssertionError('Timed out waiting for the prefetcher.')
+		time.sleep(0.001)
+
+
+class StubLoader(object):
+	"""Loader returning an image whose red level is the path, a number, and
+	raising IOError for the path 'bad'.  Loading path blocked waits until
+	release is set.
+	"""
+
+	def __init__(self):
+		self.loaded = []
+		self.release = threading.Event()
+
+	def __call__(self, path, width, height):
+		self.loaded.append(path)
+		if path == 'blocked':
+			self.release.wait()
+		if path == 'bad':
+			raise IOError('Damaged image.')
+		return Image.new('RGB', (width, height), (path, 0, 0))
+
+
+class TestPrefetcher(unittest.TestCase):
+	def prefetcher(self, paths, radius=1):
+		self.loader = StubLoader()
+		prefetcher = Prefetcher(paths, 4, 2, radius=radius, loader=self.loader)
+		self.addCleanup(prefetcher.close)
+		self.addCleanup(self.loader.release.set)
+		return prefetcher
+
+	def test_focus_preloads_neighbours(self):
+		prefetcher = self.prefetcher([0x08, 0x10, 0x18, 0x20, 0x28])
+		prefetcher.focus(2)
+		wait_for(lambda: len(prefetcher._frames) == 3)
+		self.assertEqual(sorted(prefetcher._frames), [1, 2, 3])
+		self.assertEqual(sorted(self.loader.loaded), [0x10, 0x18, 0x20])
+		self.assertTrue((prefetcher.get(3) == 0x2000).all())
+		self.assertEqual((prefetcher.hits, prefetcher.misses), (1, 0))
+
+	def test_focus_releases_frames_outside_window(self):
+		prefetcher = self.prefetcher([0x08, 0x10, 0x18, 0x20, 0x28])
+		prefetcher.focus(1)
+		wait_for(lambda: len(prefetcher._frames) == 3)
+		prefetcher.focus(3)
+		self.assertEqual(sorted(prefetcher._frames), [2])
+		wait_for(lambda: len(prefetcher._frames) == 3)
+		self.assertEqual(sorted(prefetcher._frames), [2, 3, 4])
+		# Frame 2 was kept rather than loaded again.
+		self.assertEqual(self.loader.loaded.count(0x18), 1)
+
+	def test_get_waits_for_load(self):
+		prefetcher = self.prefetcher([0x08, 0x10])
+		self.assertTrue((prefetcher.get(1) == 0x1000).all())
+		self.assertEqual((prefetcher.hits, prefetcher.misses), (0, 1))
+
+	def test_get_reraises_load_error(self):
+		prefetcher = self.prefetcher([0x08, 'bad'])
+		prefetcher.focus(0)
+		wait_for(lambda: prefetcher.error(1) is not None)
+		self.assertIsInstance(prefetcher.error(1), IOError)
+		self.assertIsNone(prefetcher.error(0))
+		self.assertRaises(IOError, prefetcher.get, 1)
+
+	def test_close_unblocks_get(self):
+		prefetcher = self.prefetcher(['blocked', 0x10], radius=0)
+		# The only worker is stuck loading image 0, so image 1 never loads.
+		prefetcher.focus(0)
+		wait_for(lambda: self.loader.loaded)
+		errors = []
+		def get():
+			try:
+				prefetcher.get(1)
+			except RuntimeError as e:
+				errors.append(e)
+		getter = threading.Thread(target=get)
+		getter.start()
+		wait_for(lambda: prefetcher.misses == 1)
+		# Close waits for the blocked load, so run it on another thread.
+		closer = threading.Thread(target=prefetcher.close)
+		closer.start()
+		getter.join(5)
+		self.assertFalse(getter.is_alive())
+		self.assertEqual(len(errors), 1)
+		self.loader.release.set()
+		closer.join(5)
+		self.assertFalse(closer.is_alive())
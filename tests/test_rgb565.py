@@ -0,0 +1,113 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from pyDrivers import rgb565
+
+
+def baseline(image):
+	# The conversion the drivers used before the methods were added.
+	pb = np.array(image.convert('RGB')).astype('uint16')
+	color = ((pb[:,:,0] & 0xF8) << 8) | ((pb[:,:,1] & 0xFC) << 3) | (pb[:,:,2] >> 3)
+	return np.dstack(((color >> 8) & 0xFF, color & 0xFF)).flatten().tolist()
+
+
+def random_rgb(width=37, height=11, channels=3):
+	return np.random.RandomState(565).randint(0, 256,
+		(height, width, channels)).astype(np.uint8)
+
+
+EXACT = [method for method in sorted(rgb565.METHODS) if method != 'dither']
+
+
+class TestImageToData(unittest.TestCase):
+	def setUp(self):
+		self.rgb = random_rgb()
+		self.image = Image.fromarray(self.rgb, 'RGB')
+		self.expected = baseline(self.image)
+
+	def test_methods_match_baseline(self):
+		for method in EXACT:
+			data = rgb565.image_to_data(self.image, method=method)
+			self.assertEqual(data.tolist(), self.expected, method)
+
+	def test_into_big_endian_out(self):
+		for method in EXACT:
+			out = np.zeros((11, 37), dtype='>u2')
+			data = rgb565.image_to_data(self.image, out, method)
+			self.assertTrue(np.may_share_memory(data, out), method)
+			self.assertEqual(out.view(np.uint8).reshape(-1).tolist(), self.expected, method)
+
+	def test_into_bytearray(self):
+		out = bytearray(37*11*2)
+		rgb565.image_to_data(self.image, out)
+		self.assertEqual(list(out), self.expected)
+
+	def test_other_modes(self):
+		for mode in ('P', 'L', 'RGBA'):
+			image = self.image.convert(mode)
+			for method in EXACT:
+				data = rgb565.image_to_data(image, method=method)
+				self.assertEqual(data.tolist(), baseline(image), '{0} {1}'.format(mode, method))
+
+	def test_arrays(self):
+		rgba = random_rgb(channels=4)
+		for method in EXACT:
+			self.assertEqual(rgb565.image_to_data(self.rgb, method=method).tolist(),
+				self.expected, method)
+			self.assertEqual(rgb565.image_to_data(rgba, method=method).tolist(),
+				baseline(Image.fromarray(rgba, 'RGBA')), method)
+
+	def test_dither_within_one_step(self):
+		pixels = rgb565.image_to_data(self.image, method='dither').view('>u2')
+		pixels = pixels.reshape(11, 37).astype(np.int32)
+		exact = self.rgb.astype(np.int32)
+		for shift, mask, channel, bits in ((11, 0x1F, 0, 5), (5, 0x3F, 1, 6), (0, 0x1F, 2, 5)):
+			difference = ((pixels >> shift) & mask) - (exact[:,:,channel] >> (8-bits))
+			self.assertTrue(((difference == 0) | (difference == 1)).all())
+		# Dithering does change some pixels.
+		self.assertNotEqual(pixels.astype('>u2').view(np.uint8).reshape(-1).tolist(),
+			self.expected)
+
+
+class TestHelpers(unittest.TestCase):
+	def image(self):
+		return Image.new('RGB', (3, 2), (0, 0, 255))
+
+	def test_to_color565(self):
+		self.assertEqual(rgb565.to_color565((255, 0, 0)), 0xF800)
+		self.assertEqual(rgb565.to_color565((0, 255, 0, 128)), 0x07E0)
+		self.assertEqual(rgb565.to_color565(0x1234), 0x1234)
+
+	def test_image_to_array(self):
+		pixels = rgb565.image_to_array(self.image())
+		self.assertEqual(pixels.dtype, np.dtype('>u2'))
+		self.assertEqual(pixels.shape, (2, 3))
+		self.assertEqual(pixels[0, 0], 0x001F)
+
+	def test_array_to_image_round_trip(self):
+		pixels = rgb565.image_to_array(self.image())
+		self.assertTrue((rgb565.image_to_array(rgb565.array_to_image(pixels)) == pixels).all())
+
+	def test_fastest_method(self):
+		self.assertIn(rgb565.fastest_method(8, 8, repeat=1), EXACT)
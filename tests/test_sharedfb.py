@@ -0,0 +1,112 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from MockPanel import MockPanel
+from pyDrivers import sharedfb
+from pyDrivers.framebuffer import Framebuffer
+
+
+def read_bytes(path):
+	with open(path, 'rb') as f:
+		return bytearray(f.read())
+
+
+class TestSharedFramebuffer(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.directory)
+		self.path = os.path.join(self.directory, 'fb')
+		self.panel = MockPanel(16, 8)
+		self.fb = sharedfb.SharedFramebuffer(self.panel, self.path)
+		self.addCleanup(self.fb.close)
+
+	def test_file_size(self):
+		self.assertEqual(os.path.getsize(self.path), 16*8*2)
+
+	def test_attach(self):
+		pixels = sharedfb.attach(self.path, 16, 8)
+		pixels[2, 3] = 0x1234
+		# The file holds little-endian pixels and no header.
+		data = read_bytes(self.path)
+		offset = (2*16 + 3)*2
+		self.assertEqual(data[offset:offset+2], bytearray([0x34, 0x12]))
+		self.assertEqual(self.fb.array[2, 3], 0x1234)
+
+	def test_flush(self):
+		sharedfb.attach(self.path, 16, 8)[2, 3] = 0x1234
+		self.fb.flush()
+		frame = self.panel.frames[-1]
+		self.assertEqual(frame.dtype, np.dtype('>u2'))
+		self.assertEqual(frame[2, 3], 0x1234)
+		self.assertEqual(np.count_nonzero(frame), 1)
+
+	def test_close_unlink(self):
+		self.fb.close(unlink=True)
+		self.assertFalse(os.path.exists(self.path))
+
+
+class TestFbdevPanel(unittest.TestCase):
+	def setUp(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		self.path = os.path.join(directory, 'fb1')
+		# Rows of 4 pixels padded to a 10 byte stride.
+		with open(self.path, 'wb') as f:
+			f.write(b'\xff'*10*3)
+		self.panel = sharedfb.FbdevPanel(self.path, width=4, height=3, stride=10)
+		self.addCleanup(self.panel.close)
+
+	def row(self, y):
+		return read_bytes(self.path)[y*10:y*10+10]
+
+	def test_display_frame(self):
+		pixels = np.arange(12, dtype='>u2').reshape(3, 4) + 0x0100
+		self.panel.display_frame(pixels)
+		self.assertEqual(self.row(1), bytearray([4, 1, 5, 1, 6, 1, 7, 1, 0xff, 0xff]))
+
+	def test_display_rect(self):
+		self.panel.display_frame(np.zeros((3, 4), dtype='>u2'))
+		self.panel.display_rect(np.array([[0xF800, 0x07E0]], dtype='>u2'), 1, 2)
+		self.assertEqual(self.row(2), bytearray([0, 0, 0x00, 0xF8, 0xE0, 0x07, 0, 0, 0xff, 0xff]))
+		self.assertEqual(self.row(1)[:8], bytearray(8))
+		self.assertRaises(ValueError, self.panel.display_rect, np.zeros((1, 2), dtype='>u2'), 3, 0)
+
+	def test_display_image(self):
+		self.panel.display(Image.new('RGB', (4, 3), (255, 0, 0)))
+		self.assertEqual(self.row(0)[:8], bytearray([0x00, 0xF8]*4))
+
+	def test_display_buffer(self):
+		self.panel.clear((0, 0, 255))
+		self.panel.draw().point((0, 0), fill=(255, 255, 255))
+		self.assertTrue(self.panel.display())
+		self.assertEqual(self.row(0)[:4], bytearray([0xFF, 0xFF, 0x1F, 0x00]))
+
+	def test_display_framebuffer(self):
+		fb = Framebuffer(4, 3)
+		fb.fill(0x1234)
+		self.panel.display(fb)
+		self.assertEqual(self.row(2)[:8], bytearray([0x34, 0x12]*4))
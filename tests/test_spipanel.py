@@ -0,0 +1,223 @@
+# Copyright (c) 2015 Intel Corporation. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+import unittest
+
+from mock import patch
+import numpy as np
+
+from MockPanel import MockGPIO, MockSpi
+from pyDrivers.spipanel import SpiPanel, CASET, PASET, RAMWR, FILL_CHUNK
+
+
+class SlowSpi(MockSpi):
+	"""MockSpi taking delay seconds per write."""
+
+	delay = 0
+
+	def write(self, data):
+		time.sleep(self.delay)
+		super(SlowSpi, self).write(data)
+
+
+class TestGovernor(unittest.TestCase):
+	def setUp(self):
+		self.panel = SpiPanel(1, MockSpi(), 16, 8, gpio=MockGPIO(), framebuffer=True)
+		self.panel.set_target_fps(5)
+
+	def shown(self):
+		return self.panel._shown.view('>u2').reshape(8, 16)
+
+	def test_held_back_frame_sent_when_slot_opens(self):
+		for value in range(1, 6):
+			self.panel.buffer.fill(value)
+			self.panel.display()
+		self.assertEqual(self.panel.update_stats.updates, 1)
+		time.sleep(0.5)
+		self.assertTrue((self.shown() == 5).all())
+		self.assertEqual(self.panel.update_stats.updates, 2)
+		self.assertEqual(self.panel.frames_skipped, 3)
+
+	def test_held_back_frame_is_a_snapshot(self):
+		self.panel.display()
+		self.panel.buffer.fill(7)
+		self.assertFalse(self.panel.display())
+		# Drawing after display() doesn't change the frame waiting to go out.
+		self.panel.buffer.fill(9)
+		self.panel.flush()
+		self.assertTrue((self.shown() == 7).all())
+
+	def test_flush_sends_held_back_frame(self):
+		self.panel.display()
+		self.panel.buffer.fill(3)
+		self.panel.display()
+		self.assertTrue(self.panel.flush())
+		self.assertTrue((self.shown() == 3).all())
+		# The timer finds nothing left to send.
+		time.sleep(0.3)
+		self.assertEqual(self.panel.update_stats.updates, 2)
+
+	def test_fill_while_frame_pending(self):
+		spi = SlowSpi(max_transfer=16)
+		panel = SpiPanel(1, spi, 16, 8, gpio=MockGPIO(), framebuffer=True)
+		panel.set_target_fps(5)
+		panel.display()
+		panel.buffer.fill(3)
+		self.assertFalse(panel.display())
+		start = len(spi.writes)
+		# The held back frame's slot opens while the fill is being written.
+		spi.delay = 0.03
+		panel.fill_screen(0x0101)
+		fill = spi.writes[start:]
+		self.assertEqual(fill[-16:], [[1]*16]*16)
+		deadline = time.time() + 5
+		while panel.update_stats.updates < 3 and time.time() < deadline:
+			time.sleep(0.01)
+		# The timer's frame followed the fill instead of interleaving with it.
+		self.assertEqual(spi.writes[start:start+len(fill)], fill)
+		self.assertEqual(spi.writes[start+len(fill)], [RAMWR])
+		self.assertTrue((panel._shown.view('>u2') == 3).all())
+
+	def test_no_limit(self):
+		self.panel.set_target_fps(None)
+		for value in range(3):
+			self.assertTrue(self.panel.display(np.full((8, 16), value, dtype='>u2')))
+		self.assertEqual(self.panel.update_stats.updates, 3)
+
+
+class TestFillRect(unittest.TestCase):
+	def panel(self, max_transfer=4096, width=16, height=8):
+		self.spi = MockSpi(max_transfer)
+		return SpiPanel(1, self.spi, width, height, gpio=MockGPIO(), framebuffer=True)
+
+	def shown(self, panel):
+		return panel._shown.view('>u2').reshape(panel.height, panel.width)
+
+	def test_chunks_sized_from_max_transfer(self):
+		panel = self.panel(max_transfer=64)
+		panel.fill_rect(0, 0, 15, 7, 0x1234)
+		pixels = self.spi.writes[-4:]
+		self.assertEqual([len(write) for write in pixels], [64]*4)
+		self.assertEqual(pixels[0][:4], [0x12, 0x34, 0x12, 0x34])
+
+	def test_no_transfer_limit(self):
+		panel = self.panel(max_transfer=None, width=64, height=64)
+		panel.fill_rect(0, 0, 63, 63, 1)
+		self.assertEqual([len(write) for write in self.spi.writes[-2:]],
+			[FILL_CHUNK*2]*2)
+
+	def test_chunk_cached_by_color_and_size(self):
+		panel = self.panel()
+		panel.fill_rect(0, 0, 3, 3, 1)
+		chunk = panel._fill_chunk[1]
+		panel.fill_rect(4, 4, 5, 5, 1)
+		self.assertIs(panel._fill_chunk[1], chunk)
+		panel._max_transfer = 8
+		panel.fill_rect(0, 0, 3, 3, 1)
+		self.assertEqual(len(panel._fill_chunk[1]), 4)
+		panel.fill_rect(0, 0, 3, 3, 2)
+		self.assertEqual(panel._fill_chunk[1][0], 2)
+
+	def test_shown_kept_in_sync(self):
+		panel = self.panel()
+		panel.display()
+		panel.fill_rect(-2, 6, 3, 20, (255, 0, 0))
+		shown = self.shown(panel)
+		self.assertTrue((shown[6:8, 0:4] == 0xF800).all())
+		self.assertEqual(np.count_nonzero(shown), 8)
+		# The next display() restores the filled pixels from the buffer.
+		self.spi.writes = []
+		panel.display()
+		self.assertEqual(panel.update_stats.rects, 1)
+		self.assertEqual(self.spi.writes[-1], [0]*16)
+		self.assertEqual(np.count_nonzero(shown), 0)
+
+	def test_fill_screen_validates_shown(self):
+		panel = self.panel()
+		panel.fill_screen(3)
+		self.assertTrue(panel._shown_valid)
+		panel.buffer.fill(3)
+		self.spi.writes = []
+		panel.display()
+		self.assertEqual(self.spi.writes, [])
+
+	def test_off_screen(self):
+		panel = self.panel()
+		panel.fill_rect(16, 0, 20, 7, 1)
+		self.assertEqual(self.spi.writes, [])
+
+
+class TestTransport(unittest.TestCase):
+	def setUp(self):
+		self.gpio = MockGPIO()
+		self.spi = MockSpi(gpio=self.gpio, dc=1)
+		self.panel = SpiPanel(1, self.spi, 16, 8, gpio=self.gpio)
+		self.panel.ROTATIONS = {0: 0x00, 90: 0x20}
+
+	def opcodes(self):
+		return [opcode for opcode, _ in self.spi.commands()]
+
+	def test_repeated_window_skips_address(self):
+		self.panel.set_window(1, 2, 3, 4)
+		self.panel.set_window(1, 2, 3, 4)
+		self.panel.set_window(1, 5, 3, 6)
+		self.panel.set_window(0, 5, 3, 6)
+		self.assertEqual(self.opcodes(), [CASET, PASET, RAMWR, RAMWR, PASET, RAMWR,
+			CASET, RAMWR])
+
+	@patch('pyDrivers.spipanel.time.sleep')
+	def test_begin_invalidates_window(self, sleep):
+		self.panel.set_window()
+		self.panel.begin()
+		self.spi.writes = []
+		self.spi.dc_levels = []
+		self.panel.set_window()
+		self.assertEqual(self.opcodes(), [CASET, PASET, RAMWR])
+
+	def test_set_rotation_invalidates_window(self):
+		self.panel.set_window()
+		self.panel.set_rotation(0)
+		self.panel.set_window()
+		self.assertEqual(self.opcodes(), [CASET, PASET, RAMWR, 0x36, CASET, PASET,
+			RAMWR])
+
+	def test_dc_toggles_at_boundaries(self):
+		with patch.object(self.gpio, 'output', wraps=self.gpio.output) as output:
+			self.panel.display(full=True)
+			# Window and pixels: command, data, command, data, command, data.
+			self.assertEqual([args[1] for args, _ in output.call_args_list],
+				[False, True, False, True, False, True])
+		# The pixels went out in a single run of data writes.
+		self.assertEqual(self.spi.dc_levels[-1], True)
+		self.assertEqual(len(self.spi.writes[-1]), 16*8*2)
+
+	def test_dc_kept_between_data_writes(self):
+		self.panel.command(RAMWR)
+		with patch.object(self.gpio, 'output', wraps=self.gpio.output) as output:
+			self.panel.data([1, 2])
+			self.panel.data(np.zeros(4, dtype=np.uint8))
+			self.panel.data(bytearray(2))
+			self.assertEqual(output.call_count, 1)
+
+	def test_chunked_by_max_transfer(self):
+		self.spi.max_transfer = 100
+		panel = SpiPanel(1, self.spi, 16, 8, gpio=self.gpio)
+		panel.data(np.zeros(250, dtype=np.uint8))
+		self.assertEqual([len(write) for write in self.spi.writes], [100, 100, 50])